@@ -0,0 +1,169 @@
+"""
+Benchmarks for min_interpreter.py
+
+Run '$python -m benchmarks.bench_interpreter' from the repository root
+"""
+
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from interpreter.min_cache import output_cache_info
+from interpreter.min_interpreter import compile as compile_program, execute, execute_line
+from interpreter.min_libraries import clear_library_cache
+from interpreter.min_lexer import lex_line
+from interpreter.min_parser import parse_line
+from interpreter.utils.structures import Node, Token
+
+EXPRESSIONS = ['result = result + (counter * step) % 7', 'counter < limit', 'result == 0']
+LOOP_ITERATIONS = 20000
+
+
+def __count_operators(node) -> int:
+    # number of operators executed for given line
+    if not isinstance(node, Node):
+        return 0
+
+    return 1 + __count_operators(node.left) + __count_operators(node.right)
+
+
+def bench_dispatch(repeat: int = 5, count: int = 20000) -> None:
+    """
+    measures time of executing single lines, per operator of each line
+    """
+    print('Execution of single lines:')
+
+    variables = {0: {'result': Token('int', 0), 'counter': Token('int', 3),
+                     'step': Token('int', 2), 'limit': Token('int', 10)}}
+
+    for expression in EXPRESSIONS:
+        line = parse_line(lex_line(expression)[0], 1)
+        assert line is not None
+        operators_count = __count_operators(line)
+
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for _ in range(count):
+                execute_line(line, {}, 0, 1, variables)
+            best = min(best, time.perf_counter() - started)
+
+        print(f'\t{expression:40} {best / count / operators_count * 10 ** 6:6.2f} us per operator')
+
+
+def bench_loop(repeat: int = 3) -> None:
+    """
+    measures running of program with arithmetical loop in main
+    """
+    source = '\n'.join([
+        'start main',
+        '\tcounter is int',
+        '\tresult is int',
+        '\tcounter = 0',
+        '\tresult = 0',
+        f'\twhile counter < {LOOP_ITERATIONS}',
+        '\t\tresult = result + (counter * 2) % 7',
+        '\t\tcounter = counter + 1',
+        '\tend',
+        'end',
+    ]) + '\n'
+
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        execute(source)
+        best = min(best, time.perf_counter() - started)
+
+    print(f'Loop of {LOOP_ITERATIONS} iterations: {best * 1000:8.1f} ms, '
+          f'{best / LOOP_ITERATIONS * 10 ** 6:6.2f} us per iteration')
+
+
+def bench_compile(runs: int = 200) -> None:
+    """
+    compares compiling program before each run with running one compiled program,
+    for each of many inputs (like grader running one submission against test cases)
+    """
+    path = 'examples/factorial.min'
+
+    started = time.perf_counter()
+    for index in range(runs):
+        compile_program(path, cache=False).run(stdin=f'{index % 20}\n', stdout=io.StringIO())
+    each_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    program = compile_program(path, cache=False)
+    for index in range(runs):
+        program.run(stdin=f'{index % 20}\n', stdout=io.StringIO())
+    once_seconds = time.perf_counter() - started
+
+    print(f'{runs} runs of {path}:')
+    print(f'\tcompiled for each run: {each_seconds * 1000:8.1f} ms')
+    print(f'\tcompiled once:         {once_seconds * 1000:8.1f} ms')
+
+
+def bench_link(runs: int = 200) -> None:
+    """
+    compares compiling program, which uses libraries, with libraries read again for each
+    compilation (as before they were kept) and with libraries kept once per process
+    """
+    source = 'use io\nuse math\n\nstart main\n\tout | (sqrt | 16)\nend\n'
+
+    started = time.perf_counter()
+    for _ in range(runs):
+        clear_library_cache()
+        compile_program(source).run(stdout=io.StringIO())
+    cold_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(runs):
+        compile_program(source).run(stdout=io.StringIO())
+    warm_seconds = time.perf_counter() - started
+
+    print(f'{runs} compilations and runs of program using io and math:')
+    print(f'\tlibraries read each time: {cold_seconds / runs * 10 ** 6:8.1f} us per run')
+    print(f'\tlibraries kept:           {warm_seconds / runs * 10 ** 6:8.1f} us per run')
+
+
+def bench_output_cache() -> None:
+    """
+    compares first run of pure program (which output is stored) with next one (which output
+    is replayed from '__mincache__')
+    """
+    source = '\n'.join([
+        'use io',
+        '',
+        'start main',
+        '\tcounter is int',
+        '\tcounter = 0',
+        f'\twhile counter < {LOOP_ITERATIONS}',
+        '\t\tcounter = counter + 1',
+        '\tend',
+        '\tout | counter',
+        'end',
+    ]) + '\n'
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'loop.min')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(source)
+
+        times: list[float] = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(2):
+                started = time.perf_counter()
+                execute(path)
+                times.append(time.perf_counter() - started)
+
+    print(f'Pure program with loop of {LOOP_ITERATIONS} iterations:')
+    print(f'\trun:      {times[0] * 1000:8.1f} ms')
+    print(f'\treplayed: {times[1] * 1000:8.1f} ms ({output_cache_info()["hits"]} cache hits)')
+
+
+if __name__ == '__main__':
+    bench_dispatch()
+    bench_loop()
+    bench_compile()
+    bench_link()
+    bench_output_cache()
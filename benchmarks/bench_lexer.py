@@ -0,0 +1,122 @@
+"""
+Benchmarks for min_lexer.py
+
+Run '$python -m benchmarks.bench_lexer' from the repository root
+"""
+
+import os
+import tempfile
+import time
+import tracemalloc
+
+from interpreter.min_lexer import get_tokens, get_token_stream
+
+from .programs import examples_source, generated_program
+
+LINE_LENGTHS = [1250, 2500, 5000, 10000]
+
+
+def __long_line(length: int) -> str:
+    # function call with long argument list and long string literal, roughly 'length' symbols
+    args: list[str] = []
+    while len(', '.join(args)) < length // 2:
+        args.append(f'arg{len(args)} + 1')
+
+    text = 'a \\"quoted\\" ~ text ' * (length // 40 + 1)
+    line = f'out | "{text}", ' + ', '.join(args)
+    return line[:length] if len(line) > length else line
+
+
+def __time_file(source: str, repeat: int = 5) -> float:
+    with tempfile.NamedTemporaryFile('w', suffix='.min', delete=False) as file:
+        file.write(source)
+
+    try:
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            get_tokens(file.name)
+            best = min(best, time.perf_counter() - started)
+    finally:
+        os.unlink(file.name)
+
+    return best
+
+
+def bench_line_length() -> None:
+    """
+    lexes files made of long lines and prints time per symbol for each line length,
+    which must stay flat if lexing is linear
+    """
+    print('Lexing time for long lines:')
+    for length in LINE_LENGTHS:
+        line = __long_line(length)
+        seconds = __time_file('\n'.join([line] * 10))
+        per_symbol = seconds / (len(line) * 10) * 1e9
+        print(f'\t{len(line):>6} symbols per line: {seconds * 1000:8.2f} ms, '
+              f'{per_symbol:6.1f} ns per symbol')
+
+
+def bench_throughput(copies: int = 200) -> None:
+    """
+    lexes all examples glued together 'copies' times and prints tokens per second
+    """
+    source = examples_source(copies)
+
+    tokens, _ = get_tokens(source)
+    tokens_count = sum(len(line) for line in tokens)
+    seconds = __time_file(source, repeat=3)
+
+    print(f'Throughput: {tokens_count} tokens in {seconds * 1000:.1f} ms, '
+          f'{tokens_count / seconds:,.0f} tokens per second')
+
+
+def bench_allocations(copies: int = 200) -> None:
+    """
+    prints how many distinct Token objects lexer output holds and how much memory it takes
+    """
+    source = examples_source(copies)
+
+    tracemalloc.start()
+    tokens, _ = get_tokens(source)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tokens_count = sum(len(line) for line in tokens)
+    distinct = len({id(token) for line in tokens for token in line})
+    print(f'Allocations: {distinct} distinct Token objects for {tokens_count} tokens, '
+          f'{memory / 1024:.0f} KiB held, {memory / tokens_count:.1f} bytes per token')
+
+
+def bench_token_stream(functions_count: int = 5000) -> None:
+    """
+    compares memory held by list of lists of Tokens and by TokenStream
+    for a generated program of several megabytes
+    """
+    source = generated_program(functions_count)
+
+    tracemalloc.start()
+    tokens, line_numbers = get_tokens(source)
+    lists_memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tokens_count = sum(len(line) for line in tokens)
+    del tokens, line_numbers
+
+    tracemalloc.start()
+    stream = get_token_stream(source)
+    stream_memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert stream.tokens_count == tokens_count
+
+    print(f'Token stream: {len(source) / 2 ** 20:.1f} MiB source, {tokens_count} tokens, '
+          f'lists {lists_memory / tokens_count:.1f} bytes per token, '
+          f'TokenStream {stream_memory / tokens_count:.1f} bytes per token')
+
+
+if __name__ == '__main__':
+    bench_line_length()
+    bench_throughput()
+    bench_allocations()
+    bench_token_stream()
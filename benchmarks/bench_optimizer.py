@@ -0,0 +1,69 @@
+"""
+Benchmarks for min_optimizer.py
+
+Run '$python -m benchmarks.bench_optimizer' from the repository root
+"""
+
+import io
+import time
+
+from interpreter.min_interpreter import compile as compile_program
+from interpreter.min_optimizer import pass_info
+from interpreter.utils.commons import MAX_OPTIMIZATION_LEVEL
+
+LOOP_ITERATIONS = 20000
+
+# loop with expressions of literals and constants, and branch which is never taken
+SOURCE = '\n'.join([
+    'use io',
+    'use math',
+    '',
+    'start main',
+    '\tlimit is int',
+    '\tstep is int',
+    '\tcounter is int',
+    '\tresult is int',
+    f'\tlimit = {LOOP_ITERATIONS // 10} * 10',
+    '\tstep = (4 + 1)',
+    '\tcounter = 0',
+    '\tresult = 0',
+    '\twhile counter < limit',
+    '\t\tresult = result + (counter * step) % (6 + 1)',
+    '\t\tif step > 10',
+    '\t\t\tout | "never"',
+    '\t\tend',
+    '\t\tcounter = counter + 1',
+    '\tend',
+    '\tout | result',
+    'end',
+]) + '\n'
+
+
+def bench_levels(repeat: int = 3) -> None:
+    """
+    measures compiling and running of program with loop at each optimization level,
+    with time and changes of each pass
+    """
+    for level in range(MAX_OPTIMIZATION_LEVEL + 1):
+        started = time.perf_counter()
+        program = compile_program(SOURCE, optimization=level)
+        compile_seconds = time.perf_counter() - started
+        passes = pass_info()
+
+        best = float('inf')
+        for _ in range(repeat):
+            stdout = io.StringIO()
+            started = time.perf_counter()
+            program.run(stdout=stdout)
+            best = min(best, time.perf_counter() - started)
+
+        print(f'-O{level}: compiled in {compile_seconds * 1000:6.2f} ms, '
+              f'run in {best * 1000:8.1f} ms, output {stdout.getvalue()!r}')
+        for stats in passes:
+            print(f"\t{stats['name']:24} {stats['seconds'] * 1000:8.3f} ms, "
+                  f"{stats['changed']:4} changed, {stats['removed']:4} removed, "
+                  f"{stats['nodes']:4} nodes left")
+
+
+if __name__ == '__main__':
+    bench_levels()
@@ -0,0 +1,232 @@
+"""
+Benchmarks for min_parser.py
+
+Run '$python -m benchmarks.bench_parser' from the repository root
+"""
+
+import os
+import tempfile
+import time
+import tracemalloc
+
+from interpreter.min_lexer import get_tokens, lex_line
+from interpreter.min_parser import iter_tree, parse, parse_line, clear_line_cache, line_cache_info
+from interpreter.utils.commons import LINE_CACHE_SIZE
+from interpreter.utils.structures import Function
+
+from .programs import examples_source, generated_program
+
+OPERANDS_COUNTS = [125, 250, 500, 1000, 2000]
+BLOCKS_COUNTS = [250, 500, 1000, 2000]
+NESTING_DEPTH = 25
+
+
+def __long_expression(operands_count: int) -> str:
+    # assign of arithmetic expression with brackets and a call, 'operands_count' operands
+    operators = ['+', '*', '-', '%', '/']
+    parts: list[str] = ['result =']
+
+    for index in range(operands_count):
+        if index % 10 == 9:
+            parts.append(f'(helper | value{index}, {index}) {operators[index % 5]}')
+        elif index % 4 == 3:
+            parts.append(f'(value{index} - 1) {operators[index % 5]}')
+        else:
+            parts.append(f'value{index} {operators[index % 5]}')
+
+    return ' '.join(parts) + ' 1'
+
+
+def bench_long_expressions(repeat: int = 5) -> None:
+    """
+    measures parsing of single line with long generated expression,
+    time per operand should not grow with length of expression
+    """
+    print('Parsing of long expressions:')
+
+    for operands_count in OPERANDS_COUNTS:
+        line, _ = lex_line(__long_expression(operands_count))
+
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            parse_line(line, 1)
+            best = min(best, time.perf_counter() - started)
+
+        print(f'\t{operands_count:5} operands ({len(line):5} tokens): {best * 1000:8.2f} ms, '
+              f'{best / len(line) * 10 ** 6:6.2f} us per token')
+
+
+def __blocks_function(blocks_count: int) -> str:
+    # one function with 'blocks_count' blocks, half of them in a row and half nested
+    # in groups of NESTING_DEPTH
+    lines: list[str] = ['start main | value is int']
+
+    for index in range(blocks_count // 2):
+        lines += [f'\tif value > {index}', '\t\tvalue = value - 1',
+                  f'\telif value < {index}', '\t\tvalue = value + 1', '\tend']
+
+    for _ in range(blocks_count // 2 // NESTING_DEPTH):
+        for index in range(NESTING_DEPTH):
+            lines += ['\t' * (index + 1) + f'while value > {index}']
+        lines += ['\t' * (NESTING_DEPTH + 1) + 'value = value - 1']
+        for index in range(NESTING_DEPTH - 1, -1, -1):
+            lines += ['\t' * (index + 1) + 'end']
+
+    return '\n'.join(lines + ['end']) + '\n'
+
+
+def bench_blocks(repeat: int = 3) -> None:
+    """
+    measures parsing of single function with many if/elif and while blocks,
+    time per block should not grow with number of blocks
+    """
+    print('Parsing of functions with many blocks:')
+
+    for blocks_count in BLOCKS_COUNTS:
+        source = __blocks_function(blocks_count)
+
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            parse(source)
+            best = min(best, time.perf_counter() - started)
+
+        print(f'\t{blocks_count:5} blocks: {best * 1000:8.2f} ms, '
+              f'{best / blocks_count * 10 ** 6:6.2f} us per block')
+
+
+def bench_program(functions_count: int = 2000) -> None:
+    """
+    measures parsing of whole generated program, and memory held by the tree
+    against peak memory of parsing (lines are parsed as lexer produces them)
+    """
+    source = generated_program(functions_count)
+
+    started = time.perf_counter()
+    parse(source)
+    seconds = time.perf_counter() - started
+
+    tracemalloc.start()
+    tree = parse(source)
+    memory, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tree
+
+    print(f'Parsing of {source.count(chr(10))} lines program ({functions_count} functions): '
+          f'{seconds:.2f} s, tree {memory / 1024:.0f} KiB, peak {peak / 1024:.0f} KiB')
+
+
+def bench_lazy(functions_count: int = 2000) -> None:
+    """
+    compares eager and lazy parsing (lexing included) of generated program,
+    in which main calls one function of many
+    """
+    source = generated_program(functions_count)
+
+    started = time.perf_counter()
+    parse(source)
+    eager_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    tree = parse(source, lazy=True)
+    lazy_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for element in tree:
+        if isinstance(element, Function) and element.name in ('main', 'helper_0'):
+            assert element.body
+    called_seconds = time.perf_counter() - started
+
+    print(f'Lazy parsing of {source.count(chr(10))} lines program ({functions_count} functions):')
+    print(f'\teager:                           {eager_seconds * 1000:8.1f} ms')
+    print(f'\tlazy:                            {lazy_seconds * 1000:8.1f} ms')
+    print(f'\tlazy, bodies of called functions: {called_seconds * 1000:8.1f} ms')
+
+
+def bench_parallel(functions_count: int = 4000) -> None:
+    """
+    measures parsing of generated program (lexed beforehand) with different number of
+    worker processes, up to number of CPUs (and at least 2)
+    """
+    source = generated_program(functions_count)
+    tokens, line_numbers = get_tokens(source)
+
+    print(f'Parallel parsing of {len(tokens)} lines program ({functions_count} functions):')
+
+    serial_seconds = 0.0
+    for workers in range(1, max(2, os.cpu_count() or 1) + 1):
+        started = time.perf_counter()
+        for _ in iter_tree(zip(line_numbers, tokens), workers=workers):
+            pass
+        seconds = time.perf_counter() - started
+
+        serial_seconds = serial_seconds or seconds
+        print(f'\t{workers:3} workers: {seconds * 1000:8.1f} ms, '
+              f'speedup {serial_seconds / seconds:4.2f}x')
+
+
+def bench_line_cache(repeat: int = 5) -> None:
+    """
+    compares parsing with and without cache of parse_line (cleared before each parse),
+    reports share of lines taken from cache
+    """
+    sources = [('examples', examples_source(1)), ('examples x300', examples_source(300)),
+               ('generated program', generated_program(2000))]
+
+    print('Cache of parsed lines:')
+
+    for label, source in sources:
+        seconds: dict[int, float] = {}
+        for max_size in (0, LINE_CACHE_SIZE):
+            best = float('inf')
+            for _ in range(repeat):
+                clear_line_cache(max_size)
+                started = time.perf_counter()
+                parse(source)
+                best = min(best, time.perf_counter() - started)
+            seconds[max_size] = best
+
+        info = line_cache_info()
+        lookups = info['hits'] + info['misses']
+        print(f'\t{label:18} {lookups:6} lines, {info["hits"] / lookups:6.1%} hits: '
+              f'{seconds[0] * 1000:8.1f} ms without cache, '
+              f'{seconds[LINE_CACHE_SIZE] * 1000:8.1f} ms with it')
+
+    clear_line_cache()
+
+
+def bench_disk_cache(copies: int = 300, repeat: int = 5) -> None:
+    """
+    compares parsing of .min file with stored tree loaded from __mincache__
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'examples.min')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(examples_source(copies))
+
+        seconds: dict[str, float] = {}
+        for label, cache in (('without cache', False), ('stored', True), ('loaded', True)):
+            best = float('inf')
+            for _ in range(1 if label == 'stored' else repeat):
+                started = time.perf_counter()
+                parse(path, cache=cache)
+                best = min(best, time.perf_counter() - started)
+            seconds[label] = best
+
+        entry_size = sum(os.path.getsize(os.path.join(directory, '__mincache__', name))
+                         for name in os.listdir(os.path.join(directory, '__mincache__')))
+
+    print(f'Cache of trees on disk, examples x{copies} ({entry_size / 1024:.0f} KiB entry):')
+    for label, best in seconds.items():
+        print(f'\t{label:14} {best * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    bench_long_expressions()
+    bench_blocks()
+    bench_program()
+    bench_lazy()
+    bench_parallel()
+    bench_line_cache()
+    bench_disk_cache()
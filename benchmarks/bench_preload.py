@@ -0,0 +1,81 @@
+"""
+Benchmarks for min_preload.py
+
+Run '$python -m benchmarks.bench_preload' from the repository root (needs os.fork)
+"""
+
+import gc
+import io
+import json
+import os
+import tempfile
+
+from interpreter.min_interpreter import compile as compile_program
+from interpreter.min_preload import preload, get_program, clear_preload, worker_memory
+
+from .programs import generated_program
+
+
+def __run_worker(path: str, preloaded: bool, write_end: int) -> None:
+    # runs program in forked worker and sends its memory to parent
+    try:
+        program = get_program(path) if preloaded else compile_program(path, cache=False)
+        program.run(stdout=io.StringIO())  # type: ignore
+        gc.collect()  # collection in long-living worker, which touches every tracked object
+
+        os.write(write_end, json.dumps(worker_memory()).encode() + b'\n')
+    finally:
+        os._exit(0)  # pylint: disable=protected-access
+
+
+def __fork_workers(path: str, preloaded: bool, workers: int) -> list[dict[str, int]]:
+    # forks workers and collects memory of each of them
+    read_end, write_end = os.pipe()
+
+    children = []
+    for _ in range(workers):
+        child = os.fork()
+        if child == 0:
+            os.close(read_end)
+            __run_worker(path, preloaded, write_end)
+        children.append(child)
+
+    os.close(write_end)
+    with os.fdopen(read_end, 'rb') as pipe:
+        memories = [json.loads(line) for line in pipe]
+
+    for child in children:
+        os.waitpid(child, 0)
+
+    return memories
+
+
+def bench_preload(functions_count: int = 2000, workers: int = 4) -> None:
+    """
+    compares private memory of workers, which compile program themselves, with workers
+    forked after program was preloaded, with and without gc.freeze
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'generated.min')
+        with open(path, 'w', encoding='utf-8') as file:
+            # main only prints, as calls with several arguments in brackets fail in interpreter
+            file.write(generated_program(functions_count).replace('(helper_0 | 10, 3)', '"done"'))
+
+        print(f'{workers} workers running program with {functions_count} functions:')
+        for title in ('compiled in each worker', 'preloaded, not frozen', 'preloaded, frozen'):
+            if title != 'compiled in each worker':
+                preload([path])
+                if title == 'preloaded, not frozen':
+                    gc.unfreeze()
+
+            memories = __fork_workers(path, title != 'compiled in each worker', workers)
+            clear_preload()
+
+            private = sum(memory['private'] for memory in memories) / workers
+            shared = sum(memory['shared'] for memory in memories) / workers
+            print(f'\t{title:24}: {private / 1024:7.1f} MB private, {shared / 1024:7.1f} MB '
+                  f'shared per worker')
+
+
+if __name__ == '__main__':
+    bench_preload()
@@ -0,0 +1,59 @@
+"""
+Benchmarks for min_session.py
+
+Run '$python -m benchmarks.bench_session' from the repository root
+"""
+
+import time
+
+from interpreter.min_lexer import get_tokens
+from interpreter.min_parser import parse
+from interpreter.min_session import CompileSession
+
+from .programs import generated_program
+
+
+def bench_edits(functions_count: int = 2000, repeat: int = 5) -> None:
+    """
+    compares lexing and parsing whole generated program after each edit with
+    CompileSession, for an edit inside one function and for an edit adding a line
+    """
+    source = generated_program(functions_count)
+    lines_count = source.count('\n')
+
+    started = time.perf_counter()
+    get_tokens(source)
+    parse(source)
+    full_seconds = time.perf_counter() - started
+
+    session = CompileSession(source)
+    assert session.tree == parse(source)
+
+    # line inside of a function in the middle of program
+    lines = source.splitlines(keepends=True)
+    line = lines_count // 2
+    while not lines[line - 1].startswith('\t\tresult'):
+        line += 1
+    text = lines[line - 1]
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        session.edit(line, line, text.replace('result + ', 'result - '))
+        assert session.tree
+    in_place_seconds = (time.perf_counter() - started) / repeat
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        session.edit(line, line - 1, '\t\tresult = result + 1\n')
+        assert session.tree
+    added_line_seconds = (time.perf_counter() - started) / repeat
+
+    print(f'Edits of {lines_count} lines program ({functions_count} functions):')
+    print(f'\tlexing and parsing from scratch: {full_seconds * 1000:8.1f} ms')
+    print(f'\tCompileSession, line changed:    {in_place_seconds * 1000:8.1f} ms')
+    print(f'\tCompileSession, line added:      {added_line_seconds * 1000:8.1f} ms '
+          f'(functions below get new line numbers)')
+
+
+if __name__ == '__main__':
+    bench_edits()
@@ -0,0 +1,86 @@
+"""
+Benchmarks for structures.py
+
+Run '$python -m benchmarks.bench_structures' from the repository root
+"""
+
+import sys
+import time
+import tracemalloc
+
+from interpreter.min_parser import parse
+from interpreter.utils.commons import IF, PLUS
+from interpreter.utils.structures import Block, Node, Token, set_debug_mode, is_debug_mode
+
+from .programs import generated_program
+
+
+def __count_nodes(element) -> int:
+    # number of Nodes and Blocks in element of tree
+    if isinstance(element, Node):
+        return 1 + __count_nodes(element.left) + __count_nodes(element.right)
+    if isinstance(element, Block):
+        return 1 + __count_nodes(element.condition) + __count_nodes(element.next_block) + \
+            sum(__count_nodes(line) for line in element.body)
+    if isinstance(element, list):
+        return sum(__count_nodes(line) for line in element)
+
+    return 0
+
+
+def bench_nodes(count: int = 200000, repeat: int = 5) -> None:
+    """
+    measures memory taken by one Node and Block, and Nodes created per second
+    with and without debug mode
+    """
+    left, right = Token('var', 'a'), Token('int', 1)
+
+    tracemalloc.start()
+    nodes = [Node(PLUS, 1, right, left) for _ in range(count)]
+    node_memory, _ = tracemalloc.get_traced_memory()
+    blocks = [Block(IF, nodes[0], [], 1) for _ in range(count)]
+    block_memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    node_bytes = (node_memory - sys.getsizeof(nodes)) / count
+    block_bytes = (block_memory - node_memory - sys.getsizeof(blocks)) / count
+    print(f'Memory: {node_bytes:.0f} bytes per Node, '
+          f'{block_bytes:.0f} bytes per Block (its empty body included)')
+
+    debug_mode = is_debug_mode()
+    for enabled in (False, True):
+        set_debug_mode(enabled)
+
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for _ in range(count):
+                Node(PLUS, 1, right, left)
+            best = min(best, time.perf_counter() - started)
+
+        print(f'\tdebug mode {"on " if enabled else "off"}: {count / best / 10 ** 6:5.2f} M Nodes '
+              f'created per second')
+
+    set_debug_mode(debug_mode)
+
+
+def bench_tree(functions_count: int = 2000) -> None:
+    """
+    measures memory taken by logical tree of generated program per its Node or Block
+    """
+    source = generated_program(functions_count)
+
+    tracemalloc.start()
+    tree = parse(source)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    nodes_count = sum(__count_nodes(element.body if hasattr(element, 'body') else element)
+                      for element in tree)
+    print(f'Tree of {source.count(chr(10))} lines program: {nodes_count} Nodes and Blocks, '
+          f'{memory / nodes_count:.0f} bytes per each (lists and Functions included)')
+
+
+if __name__ == '__main__':
+    bench_nodes()
+    bench_tree()
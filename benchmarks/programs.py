@@ -0,0 +1,63 @@
+"""
+Sources of .min programs used by benchmarks
+"""
+
+import os
+
+EXAMPLES_DIRECTORY = os.path.join(os.path.dirname(__file__), os.pardir, 'examples')
+
+
+def examples_source(copies: int) -> str:
+    """
+    :param copies: how many times examples are repeated
+    :return: source code of all examples glued together 'copies' times
+    """
+    sources: list[str] = []
+    for name in sorted(os.listdir(EXAMPLES_DIRECTORY)):
+        if not name.endswith('.min'):
+            continue  # like cache directory of parsed trees
+        with open(os.path.join(EXAMPLES_DIRECTORY, name), 'r', encoding='utf-8') as file:
+            sources.append(file.read())
+
+    return '\n'.join(sources * copies)
+
+
+def generated_program(functions_count: int) -> str:
+    """
+    machine-generated-like program: many small utility functions and main calling few of them
+
+    :param functions_count: number of utility functions
+    :return: source code of program
+    """
+    lines: list[str] = ['use io', '']
+
+    for index in range(functions_count):
+        lines += [
+            f'start helper_{index} | value is int, step is int',
+            '\tresult is int',
+            '\tcounter is int',
+            '\tresult = 0',
+            '\tcounter = 0',
+            '\twhile counter < value',
+            f'\t\tresult = result + (counter * step) % {index % 7 + 2}',
+            '\t\tif result > 1000',
+            '\t\t\tresult = result - 1000',
+            '\t\telse',
+            '\t\t\tresult = result + 1',
+            '\t\tend',
+            '\t\tcounter = counter + 1',
+            '\tend',
+            '\tout | "done\\n"',
+            '\treturn result',
+            'end',
+            ''
+        ]
+
+    lines += [
+        'start main',
+        '\tout | (helper_0 | 10, 3)',
+        '\tout | "\\n"',
+        'end'
+    ]
+
+    return '\n'.join(lines) + '\n'
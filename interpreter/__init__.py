@@ -0,0 +1,3 @@
+# version of interpreter; entries of __mincache__ are keyed by it together with hash of modules
+# of interpreter (see min_cache.cache_version), so it needs no change for changes of trees
+__version__ = '1.0.0'
@@ -0,0 +1,344 @@
+"""
+This module keeps logical trees of .min files on disk, so repeated runs of the same
+source skip lexing and parsing. Like __pycache__, trees are stored in '__mincache__'
+directory next to the source, each entry is keyed by hash of source and version of
+interpreter (see cache_version), so entries of changed sources or other versions are never
+loaded. Trees are stored as JSON of plain values, so entry, which was put in '__mincache__'
+by anyone else, can not run any code when it is loaded
+
+Output of programs, which can not read input, is kept there too, keyed by hash of source
+and of libraries; such programs are not run again, their output is replayed
+
+Cache is used by parse() and execute() for paths to files, set environment variable
+MIN_NO_CACHE to anything but '0' (or pass cache=False) to turn it off
+
+Use as module 'from min_cache import prune_cache'
+"""
+
+# region Imported modules
+
+import hashlib
+import io
+import json
+import os
+import re
+import tempfile
+
+from typing import Any, Optional, TextIO, TypeGuard
+
+from . import __version__
+from .utils.structures import Token, Node, Block, Function
+from .utils.commons import Source, CACHE_DIRECTORY, LIBRARIES_DIRECTORY, shared_token
+
+# endregion
+
+# region Private functions
+
+# 'pickle' entries were made by earlier versions, they are only pruned
+__ENTRY_NAME = re.compile(r'(?P<source>.+)\.(?P<digest>[0-9a-f]{16})'
+                          r'\.min-(?P<version>.+)\.(?P<kind>json|pickle|out)')
+
+__output_stats = {'hits': 0, 'misses': 0}
+
+
+def __modules_digest() -> str:
+    # hash of all modules of interpreter, as any of them may change trees or output of programs
+    hash_ = hashlib.sha256()
+    package = os.path.dirname(os.path.abspath(__file__))
+    for directory in (package, os.path.join(package, 'utils')):
+        for name in sorted(os.listdir(directory)):
+            if name.endswith('.py'):
+                with open(os.path.join(directory, name), 'rb') as file:
+                    hash_.update(name.encode() + b'\0' + file.read() + b'\0')
+
+    return hash_.hexdigest()[:8]
+
+
+__CACHE_VERSION = f'{__version__}-{__modules_digest()}'
+
+
+def __digest(data: bytes) -> str:
+    # key of source content in names of entries
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def __libraries_digest() -> bytes:
+    # hash of all libraries, output of program may change with any of them
+    hash_ = hashlib.sha256()
+    for name in sorted(os.listdir(LIBRARIES_DIRECTORY)):
+        if name.endswith(('.py', '.min')):
+            with open(os.path.join(LIBRARIES_DIRECTORY, name), 'rb') as file:
+                hash_.update(name.encode() + b'\0' + file.read() + b'\0')
+
+    return hash_.digest()
+
+
+def __entry_path(source_path: str, digest: str, kind: str) -> str:
+    # entry of source is '__mincache__/<name of source>.<hash>.min-<version>.<kind>'
+    directory, name = os.path.split(os.path.abspath(source_path))
+    return os.path.join(directory, CACHE_DIRECTORY,
+                        f'{name}.{digest}.min-{__CACHE_VERSION}.{kind}')
+
+
+def __split_entry_name(entry_name: str) -> Optional[tuple[str, str, str, str]]:
+    # gives (name of source, hash, version, kind) of entry, or None for foreign files
+    match = __ENTRY_NAME.fullmatch(entry_name)
+    if match is None:
+        return None
+
+    return match['source'], match['digest'], match['version'], match['kind']
+
+
+def __is_stale(directory: str, entry_name: str) -> bool:
+    # entry is stale if its source (or library, for output) was changed or removed,
+    # or it was made by other version
+    parts = __split_entry_name(entry_name)
+    if parts is None:
+        return False
+
+    source_name, digest, version, kind = parts
+    source_path = os.path.join(os.path.dirname(directory), source_name)
+
+    if version != __CACHE_VERSION or kind == 'pickle' or not os.path.isfile(source_path):
+        return True
+
+    with open(source_path, 'rb') as file:
+        data = file.read()
+
+    return __digest(data + __libraries_digest() if kind == 'out' else data) != digest
+
+
+def __encode(element: Any) -> Any:
+    # gives element of logical tree as plain lists, which are stored as JSON
+    if element is None:
+        return None
+
+    if isinstance(element, Token):
+        return ['T', element.type, element.value]
+
+    if isinstance(element, Node):
+        return ['N', __encode(element.operator), element.line_number,
+                __encode(element.right), __encode(element.left)]
+
+    if isinstance(element, Block):
+        return ['B', __encode(element.operator), __encode(element.condition),
+                [__encode(line) for line in element.body], element.line_number,
+                __encode(element.next_block)]
+
+    if isinstance(element, Function):
+        return ['F', element.name, [__encode(arg) for arg in element.args],
+                [__encode(line) for line in element.body], element.line_number]
+
+    raise TypeError(f'{type(element).__name__} CAN NOT BE STORED IN CACHE')
+
+
+def __decode(data: Any) -> Any:
+    # gives element of logical tree back from plain lists made by __encode
+    if data is None:
+        return None
+
+    kind, *fields = data
+    if kind == 'T':
+        return shared_token(*fields)
+
+    if kind == 'N':
+        operator, line_number, right, left = fields
+        return Node(__decode(operator), line_number, __decode(right), __decode(left))
+
+    if kind == 'B':
+        operator, condition, body, line_number, next_block = fields
+        return Block(__decode(operator), __decode(condition), [__decode(line) for line in body],
+                     line_number, __decode(next_block))
+
+    if kind == 'F':
+        name, args, body, line_number = fields
+        return Function(name, [__decode(arg) for arg in args], [__decode(line) for line in body],
+                        line_number)
+
+    raise ValueError(f'UNKNOWN ELEMENT {kind} IN CACHE')
+
+
+def __write_entry(entry_path: str, data: bytes) -> bool:
+    # writes entry, replacing entries of the same kind of previous contents of the same source
+    directory, entry_name = os.path.split(entry_path)
+    source_name, _, _, kind = __split_entry_name(entry_name)  # type: ignore
+
+    try:
+        os.makedirs(directory, exist_ok=True)
+
+        for name in os.listdir(directory):
+            parts = __split_entry_name(name)
+            if parts is not None and parts[0] == source_name and parts[3] == kind and \
+                    name != entry_name:
+                os.remove(os.path.join(directory, name))
+
+        # entry is written aside and moved in place, so readers never see it half-written
+        descriptor, temporary_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                file.write(data)
+            os.replace(temporary_path, entry_path)
+        except OSError:
+            os.remove(temporary_path)
+            raise
+    except OSError:
+        return False
+
+    return True
+
+# endregion
+
+# region Public functions
+
+def cache_version() -> str:
+    """
+    :return: version of entries, which is version of interpreter with hash of its modules, so
+             entries made before any change of interpreter are not loaded
+    """
+    return __CACHE_VERSION
+
+
+def is_cache_enabled() -> bool:
+    """
+    :return: False if cache is turned off by environment variable MIN_NO_CACHE
+    """
+    return os.environ.get('MIN_NO_CACHE', '0') == '0'
+
+
+def is_cacheable(source: Source) -> TypeGuard[str | os.PathLike]:
+    """
+    :param source: path to .min file, opened text stream or source code itself
+    :return: True if source is path to existing file, only such sources are cached
+    """
+    if isinstance(source, str) and ('\n' in source or '\r' in source):
+        return False  # string with line breaks is source code itself, not a path
+
+    return isinstance(source, str | os.PathLike) and os.path.isfile(source)
+
+
+def read_source(source_path: str | os.PathLike) -> tuple[TextIO, str]:
+    """
+    reads file once for both hashing and lexing
+
+    :param source_path: path to .min file
+    :return: text stream of source (decoded as lexer decodes files) and path to its cache entry
+    """
+    with open(source_path, 'rb') as file:
+        data = file.read()
+
+    return io.TextIOWrapper(io.BytesIO(data), encoding='utf-8'), \
+        __entry_path(str(source_path), __digest(data), 'json')
+
+
+def load_tree(entry_path: str) -> Optional[list[Function | Node]]:
+    """
+    :param entry_path: path to cache entry, see read_source
+    :return: logical tree stored in entry, or None if there is no valid entry
+    """
+    try:
+        with open(entry_path, 'rb') as file:
+            version, tree = json.load(file)
+
+        if version != __CACHE_VERSION:
+            return None
+
+        return [__decode(element) for element in tree]
+    except FileNotFoundError:
+        return None
+    except (OSError, RecursionError, AttributeError, KeyError, IndexError,
+            TypeError, ValueError):
+        return None  # broken entry is replaced on next store
+
+
+def store_tree(entry_path: str, tree: list[Function | Node]) -> bool:
+    """
+    stores logical tree in cache entry, replacing entries of previous contents of the same
+    source; failures (like read-only directory) are ignored, as cache is only a speed-up
+
+    :param entry_path: path to cache entry, see read_source
+    :param tree: fully parsed logical tree (without LazyFunctions)
+    :return: True if tree was stored
+    """
+    try:
+        data = json.dumps([__CACHE_VERSION, [__encode(element) for element in tree]],
+                          separators=(',', ':')).encode('utf-8')
+    except (RecursionError, TypeError, ValueError):
+        return False
+
+    return __write_entry(entry_path, data)
+
+
+def output_entry_path(source_path: str | os.PathLike) -> str:
+    """
+    :param source_path: path to .min file
+    :return: path to cache entry of output of program, keyed by source and libraries
+    """
+    with open(source_path, 'rb') as file:
+        data = file.read()
+
+    return __entry_path(str(source_path), __digest(data + __libraries_digest()), 'out')
+
+
+def load_output(entry_path: str) -> Optional[str]:
+    """
+    :param entry_path: path to cache entry, see output_entry_path
+    :return: output of program stored in entry, or None if there is no entry
+    """
+    try:
+        with open(entry_path, 'r', encoding='utf-8', newline='') as file:
+            output = file.read()
+    except (OSError, UnicodeDecodeError):
+        __output_stats['misses'] += 1
+        return None
+
+    __output_stats['hits'] += 1
+    return output
+
+
+def store_output(entry_path: str, output: str) -> bool:
+    """
+    stores output of program, which can not read input; failures are ignored
+
+    :param entry_path: path to cache entry, see output_entry_path
+    :param output: whole output of program
+    :return: True if output was stored
+    """
+    return __write_entry(entry_path, output.encode('utf-8'))
+
+
+def output_cache_info() -> dict[str, int]:
+    """
+    numbers of programs, which output was replayed from cache (hits) and which were run
+    (misses), since interpreter was started
+
+    :return: dictionary with 'hits' and 'misses'
+    """
+    return dict(__output_stats)
+
+
+def prune_cache(root: str | os.PathLike[str]) -> int:
+    """
+    removes stale entries (of changed or removed sources or libraries, or of other versions of
+    interpreter) from all '__mincache__' directories under root, and directories left empty
+
+    :param root: directory to be searched
+    :return: number of entries removed
+    """
+    removed = 0
+
+    for directory, subdirectories, names in os.walk(root):
+        if os.path.basename(directory) != CACHE_DIRECTORY:
+            continue
+
+        subdirectories.clear()
+        for name in names:
+            if __is_stale(directory, name) or name.endswith('.tmp'):
+                os.remove(os.path.join(directory, name))
+                removed += 1
+
+        if not os.listdir(directory):
+            os.rmdir(directory)
+
+    return removed
+
+# endregion
@@ -6,23 +6,30 @@ Interpreter handles runtime errors such as invalid types, missing
 parameters, wrong casting, mathematical errors and so on
 
 Run '$python min_interpreter.py --help' to see more usage instructions, or use
-as module 'from interpreter import execute'
+as module 'from interpreter import execute' ('from interpreter import compile' to parse
+program once and run it many times)
 """
 
 # region Imported modules
 
-import os
-import importlib.util
+import io
 import copy
+import sys
 
-from typing import Callable, Optional, Any
+from types import MappingProxyType
+from typing import Callable, Optional, Any, TextIO
 
+from .min_cache import is_cache_enabled, is_cacheable, output_entry_path, load_output, store_output
+from .min_libraries import add_methods, link_library
+from .min_optimizer import optimize
 from .min_parser import parse
 from .utils.structures import Token, Node, Function, Block
-from .utils.commons import PyFunction, CallablesList, VariablesList, ExecutionResult, EQUALS, TRUE
-from .utils.commons import MORE_THAN, LESS_THAN, NO_MORE_THAN, NO_LESS_THAN, NOT_EQUALS, ELSE
-from .utils.commons import COMMA, PLUS, MINUS, DIVIDE, MULTIPLY, MODULO, ASSIGN, CREATE, WHILE
-from .utils.commons import RETURN, PIPE, USE
+from .utils.commons import PyFunction, CallablesList, VariablesList, ExecutionResult, TRUE
+from .utils.commons import COMMA, ASSIGN, CREATE, WHILE, ELSE, RETURN, PIPE, USE, FALSE
+from .utils.commons import Source, LineContext
+from .utils.globals import redirect_streams, write, TeeStream
+from .utils.operations import ARITHMETICAL_OPERATIONS, LOGICAL_OPERATIONS, called_names
+from .utils.operations import operate_arithmetical, operate_logical
 
 # endregion
 
@@ -44,12 +51,10 @@ def __unpack_var(token: Token, line_number: int, nesting_level: int,
 
     return token
 
-def __execute_separator_block(expression: Node,
-                              line_number: int, nesting_level: int,
-                              visible_variables: VariablesList) -> tuple[list[Token], bool]:
+def __execute_separator_block(left: Any, _operator: Token, right: Any,
+                              context: LineContext) -> tuple[list[Token], bool]:
     # merges two separated operands to array of operands
-    left: Token = expression.left
-    right: Token = expression.right
+    line_number, nesting_level, visible_variables, _ = context
 
     args: list = []
     if isinstance(left, list):
@@ -66,85 +71,33 @@ def __execute_separator_block(expression: Node,
 
     return args, True
 
-def __execute_arithmetical_block(expression: Node,
-                                 line_number: int, nesting_level: int,
-                                 visible_variables: VariablesList) -> ExecutionResult:
+def __execute_arithmetical_block(left: Token, operator: Token, right: Token,
+                                 context: LineContext) -> ExecutionResult:
     # executes processed [operand] [operation] [operand]-like block of code
     # if none of known operators present raises a runtime error
     # if any of types doesn't match raises a runtime error
-    left: Token = expression.left
-    right: Token = expression.right
-    operator: Token = expression.operator
+    line_number, nesting_level, visible_variables, _ = context
 
     left = __unpack_var(left, line_number, nesting_level, visible_variables)
     right = __unpack_var(right, line_number, nesting_level, visible_variables)
 
-    if not isinstance(left.value, (int, float)) or not isinstance(right.value, (int, float)):
-        raise RuntimeError(f'UNABLE TO RECOGNIZE TYPE OF VARIABLES AT LINE {line_number}')
-
-    if left.type not in 'int float' or right.type not in 'int float':
-        raise RuntimeError(f'COMPILATION ERROR AT LINE {line_number}: OPERANDS SUPPOSED TO '
-                           f'BE OF TYPE int OR float, GOT {left.type} AND {right.type}')
-
-    result: float | int
-    if operator == PLUS:
-        result = left.value + right.value
-    elif operator == MINUS:
-        result = left.value - right.value
-    elif operator == MULTIPLY:
-        result = left.value * right.value
-    elif operator == DIVIDE:
-        if right.value == 0:
-            raise RuntimeError(f'ZERO-DIVISION ERROR AT LINE {line_number}')
-
-        result = left.value / right.value
-    elif operator == MODULO:
-        result = left.value % right.value
-    else:
-        raise RuntimeError(f'UNKNOWN IDENTIFIER ERROR AT LINE {line_number}')
-
-    new_type = 'int' if int(result) == result else 'float'
-    return Token(new_type, result), True
+    return operate_arithmetical(left, operator, right, line_number), True
 
-def __execute_logical_block(expression: Node,
-                            line_number: int, nesting_level: int,
-                            visible_variables: VariablesList) -> ExecutionResult:
+def __execute_logical_block(left: Token, operator: Token, right: Token,
+                            context: LineContext) -> ExecutionResult:
     # executes processed [operand] [operation] [operand]-like block of code
-    # if none of known operators present raises a runtime error
     # if any of types doesn't match raises a runtime error
-    left: Token = expression.left
-    right: Token = expression.right
-    operator: Token = expression.operator
+    line_number, nesting_level, visible_variables, _ = context
 
     left = __unpack_var(left, line_number, nesting_level, visible_variables)
     right = __unpack_var(right, line_number, nesting_level, visible_variables)
 
-    result: bool = False
-    try:
-        if operator == EQUALS:
-            result = left.value == right.value  # type: ignore
-        elif operator == MORE_THAN:
-            result = left.value > right.value  # type: ignore
-        elif operator == LESS_THAN:
-            result = left.value < right.value  # type: ignore
-        elif operator == NO_MORE_THAN:
-            result = left.value <= right.value  # type: ignore
-        elif operator == NO_LESS_THAN:
-            result = left.value >= right.value  # type: ignore
-        elif operator == NOT_EQUALS:
-            result = left.value != right.value  # type: ignore
-    except TypeError as error:
-        raise TypeError(f'{left.type} AND {right.type} CAN NOT BE COMPARED') from error
-
-    return Token('bool', result), True
-
-def __execute_var_related_block(expression: Node,
-                                line_number: int, nesting_level: int,
-                                visible_variables: VariablesList) -> ExecutionResult:
+    return operate_logical(left, operator, right), True
+
+def __execute_var_related_block(left: Token, operator: Token, right: Token,
+                                context: LineContext) -> ExecutionResult:
     # executes operations of variable creation and assigning
-    left: Token = expression.left
-    right: Token = expression.right
-    operator = expression.operator
+    line_number, nesting_level, visible_variables, _ = context
 
     if operator == CREATE:
         # type check
@@ -161,7 +114,7 @@ def __execute_var_related_block(expression: Node,
             if right.value == 'str':
                 visible_variables[nesting_level][left.value] = Token('str', '')
             elif right.value == 'bool':
-                visible_variables[nesting_level][left.value] = Token('bool', False)
+                visible_variables[nesting_level][left.value] = FALSE
             else:
                 visible_variables[nesting_level][left.value] = Token(str(right.value), 0)
 
@@ -184,43 +137,38 @@ def __execute_var_related_block(expression: Node,
 
     return None, True
 
-def __execute_func_related_block(expression: list[Token | list[Token]],
-                                 line_number: int, nesting_level: int,
-                                 visible_variables: VariablesList,
-                                 callables: CallablesList) -> ExecutionResult:
+def __execute_func_related_block(left: Any, operator: Token, right: Any,
+                                 context: LineContext) -> ExecutionResult:
     # executes operations function calling, function returning
-    if not isinstance(expression[0], Token | type(None)) or \
-            not isinstance(expression[2], list | Token | type(None)) or \
-            not isinstance(expression[1], Token | type(None)):
+    line_number, nesting_level, visible_variables, callables = context
+
+    if not isinstance(left, Token | type(None)) or \
+            not isinstance(right, list | Token | type(None)):
         raise RuntimeError('FAILED TO USE PIPE OPERATOR ON WRONG OPERANDS ' +
                            f'AT LINE {line_number}')
 
-    left: Token = expression[0]
-    right: list[Token] | Token = expression[2] if expression[2] is not None else []
-    operator: Token = expression[1]
-
     if operator == PIPE:
-        right = expression[2] if isinstance(expression[2], list) else [expression[2]]
-        if left.value in callables.keys():
-            if isinstance(left.value, str) and isinstance(right, list):
-                right = [execute_line(arg, callables, nesting_level, line_number,
-                                      visible_variables)[0] for arg in right if arg is not None]
-                right = [__unpack_var(arg, line_number, nesting_level, visible_variables)
-                         for arg in right if arg is not None]
+        if left is None:
+            raise RuntimeError('FAILED TO USE PIPE OPERATOR ON WRONG OPERANDS ' +
+                               f'AT LINE {line_number}')
 
-                return execute_function(left.value, callables, right), True
+        # names of functions are strings, so other values are never found
+        name = left.value
+        if isinstance(name, str) and name in callables:
+            args = [execute_line(arg, callables, nesting_level, line_number,
+                                 visible_variables)[0]
+                    for arg in (right if isinstance(right, list) else [right])
+                    if arg is not None]
+            args = [__unpack_var(arg, line_number, nesting_level, visible_variables)
+                    for arg in args if arg is not None]
 
-            raise RuntimeError('CANNOT EXECUTE FUNCTION WITH NON-STRING NAME ' +
-                               f'AT LINE {line_number}')
+            return execute_function(name, callables, args), True
 
-        raise RuntimeError(f'COMPILATION ERROR AT LINE {line_number}: FUNCTION {left.value} ' +
+        raise RuntimeError(f'COMPILATION ERROR AT LINE {line_number}: FUNCTION {name} ' +
                            'IS NOT FOUND')
 
     if operator == RETURN:
-        if right is None:
-            return None, False
-
-        return_ = right
+        return_ = right  # bare 'return' gives no Token, which is not processable
         if isinstance(right, Node):
             return_, _ = execute_line(right, callables, nesting_level,
                                       line_number, visible_variables)
@@ -300,11 +248,12 @@ def __execute_body(body: list[Node | Block], callables: CallablesList,
 def __execute_block(block: Block, callables: CallablesList,
                     visible_variables: VariablesList, nesting_level: int) -> ExecutionResult:
     condition_pass: Token
+    condition: Node | Token = TRUE if block.condition is None else block.condition
 
     if block.operator == ELSE:
         condition_pass = TRUE
     else:
-        condition_pass, _ = execute_line(block.condition, callables, nesting_level - 1,
+        condition_pass, _ = execute_line(condition, callables, nesting_level - 1,
                                          block.line_number, visible_variables)
 
     visible_variables[nesting_level] = {}
@@ -320,7 +269,7 @@ def __execute_block(block: Block, callables: CallablesList,
                 if not running:
                     return return_, False
 
-                condition_pass, _ = execute_line(block.condition, callables, nesting_level - 1,
+                condition_pass, _ = execute_line(condition, callables, nesting_level - 1,
                                                  block.line_number, visible_variables)
 
             return return_, running
@@ -355,35 +304,132 @@ def __execute_min_function(function_name: str, function: Function, args: list,
     return None
 
 
-def __find_callables(tree: list[Function | Node]) -> CallablesList:
+def __find_callables(tree: list[Function | Node]) -> tuple[CallablesList, set[str]]:
     # fills functions_list, which are either Python callables
-    # from imported libraries or MINIMUM functions
+    # from imported libraries or MINIMUM functions; also gives names of impure
+    # library functions (which results depend on anything but arguments, like 'in');
+    # functions of program take place of library functions with the same names
     callables: CallablesList = {}
+    impure: set[str] = set()
     for block in tree:
-        if isinstance(block, Function):
-            callables[block.name] = block
-        elif isinstance(block, Node) and block.operator == USE:
-            root_directory = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
-            path = root_directory + '/libraries/' + block.right.value + '.py'
-            spec = importlib.util.spec_from_file_location(block.right.value, path)
+        if isinstance(block, Node) and block.operator == USE:
+            # libraries are kept once per process, see min_libraries.py
+            library = link_library(block.right.value)
 
-            if spec is None or spec.loader is None:
+            if library is None:
                 raise RuntimeError(f'UNABLE TO READ/FIND LIBRARY {block.right} ' +
                                    f'AT LINE {block.line_number}')
 
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
+            add_methods(callables, library, f'AT LINE {block.line_number}')
+            impure.update(library.impure)
+
+    for block in tree:
+        if isinstance(block, Function):
+            callables[block.name] = block
+            impure.discard(block.name)
 
-            methods = module.get_methods()
+    return callables, impure
 
-            for method in methods:
-                name = method[0]
-                callable_ = method[1]
-                args = method[2]
+def __has_valid_syntax(tree: tuple[Function | Node, ...]) -> bool:
+    # parses bodies of lazy functions, if they are not parsed yet
+    try:
+        return all(element.body is not None for element in tree if isinstance(element, Function))
+    except SyntaxError:
+        return False
+
+# handlers of operators in execute_line, all of them take (left, operator, right, context) with
+# operands already executed, context is (line_number, nesting_level, visible_variables, callables)
+__LINE_HANDLERS: dict[Token, Callable[..., tuple[Any, bool]]] = {
+    CREATE: __execute_var_related_block,
+    ASSIGN: __execute_var_related_block,
+    PIPE: __execute_func_related_block,
+    RETURN: __execute_func_related_block,
+    COMMA: __execute_separator_block,
+    **{operator: __execute_logical_block for operator in LOGICAL_OPERATIONS},
+    **{operator: __execute_arithmetical_block for operator in ARITHMETICAL_OPERATIONS}
+}
 
-                callables[name] = [callable_, args]
+# endregion
 
-    return callables
+# region Public classes
+
+class Program:
+    """
+    Program is source code lexed, parsed and linked with its libraries, see compile();
+    it does not change once created, so it may be run any number of times, also from
+    several threads at once, each run with its own input and output
+    """
+    __slots__ = ('__tree', '__callables', '__impure')
+
+    def __init__(self, tree: list[Function | Node], callables: CallablesList,
+                 impure: Optional[set[str]] = None):
+        """
+        creates Program, use compile() instead
+
+        :param tree: logical tree of source code
+        :param callables: functions of program and of its libraries by their names
+        :param impure: names of library functions, which results depend on anything
+                       but their arguments (like 'in')
+        """
+        self.__tree: tuple[Function | Node, ...] = tuple(tree)
+        self.__callables = MappingProxyType(dict(callables))
+        self.__impure: frozenset[str] = frozenset(impure or ())
+
+    @property
+    def tree(self) -> tuple[Function | Node, ...]:
+        """
+        :return: logical tree of program
+        """
+        return self.__tree
+
+    @property
+    def functions(self) -> tuple[str, ...]:
+        """
+        :return: names of functions of program and of its libraries
+        """
+        return tuple(self.__callables.keys())
+
+    @property
+    def is_pure(self) -> bool:
+        """
+        pure program can not call impure library functions (like 'in') from 'main',
+        so it gives the same output on every run; lazy functions, which can be called,
+        are parsed to find it out
+
+        :return: True if program is pure
+        """
+        called: set[str] = set()
+        names: list[str] = ['main']
+
+        while names:
+            name = names.pop()
+            if name in called:
+                continue
+            called.add(name)
+
+            function = self.__callables.get(name)
+            if name in self.__impure or function is None:
+                return False  # calls of unknown functions are not followed
+
+            if isinstance(function, Function):
+                try:
+                    names += called_names(function.body)
+                except SyntaxError:
+                    return False
+
+        return True
+
+    def run(self, stdin: Optional[str | TextIO] = None,
+            stdout: Optional[TextIO | io.TextIOBase] = None) -> None:
+        """
+        executes program, starting from 'main' function
+
+        :param stdin: input of program, either stream or whole input as a string
+                      (standard input if None)
+        :param stdout: output of program (standard output if None)
+        """
+        with redirect_streams(stdin, stdout):
+            execute_function('main', self.__callables, [])  # type: ignore
 
 # endregion
 
@@ -427,24 +473,10 @@ def execute_line(line: Node | Token, callables: CallablesList,
         left, _ = execute_line(left, callables, nesting_level,
                                line_number, visible_variables)
 
-    if line.operator in [CREATE, ASSIGN]:
-        return __execute_var_related_block(Node(line.operator, line_number, right, left),
-                                           line_number, nesting_level, visible_variables)
-
-    if line.operator in [PIPE, RETURN]:
-        return __execute_func_related_block([left, line.operator, right],
-                                            line_number, nesting_level, visible_variables,
-                                            callables)
-    if line.operator == COMMA:
-        return __execute_separator_block(Node(line.operator, line_number, right, left),
-                                         line_number, nesting_level, visible_variables)
-
-    if line.operator in [EQUALS, MORE_THAN, NO_MORE_THAN, LESS_THAN, NO_LESS_THAN, NOT_EQUALS]:
-        return __execute_logical_block(Node(line.operator, line_number, right, left),
-                                       line_number, nesting_level, visible_variables)
-
-    return __execute_arithmetical_block(Node(line.operator, line_number, right, left),
-                                        line_number, nesting_level, visible_variables)
+    # operators which are not in table are arithmetical ones (or unknown)
+    handler = __LINE_HANDLERS.get(line.operator, __execute_arithmetical_block)
+    return handler(left, line.operator, right,
+                   (line_number, nesting_level, visible_variables, callables))
 
 
 def execute_function(function_name: str, callables: CallablesList, args: list) -> Optional[Token]:
@@ -465,22 +497,66 @@ def execute_function(function_name: str, callables: CallablesList, args: list) -
     return __execute_py_function(function_name, function, args)
 
 
-def execute(file_name: str):
+def compile(file_name: Source, lazy: bool = False,  # pylint: disable=redefined-builtin
+            cache: bool = True, optimization: int = 0) -> Program:
+    """
+    lexes and parses given code and loads its libraries once, so it can be run many times
+    raises an error if there is no 'main' function
+
+    :param file_name: name of .min file to be compiled (or opened stream, or source code itself)
+    :param lazy: if True, body of each function is parsed when function is called for the first
+                 time, so syntax errors in functions which are never called are not raised
+    :param cache: if True, tree of .min file is kept in '__mincache__' next to it for next runs
+    :param optimization: optimization level (see min_optimizer.py), levels above 0 parse all
+                         functions right away, as if lazy was False
+    :return: Program to be run
+    """
+    tree: list[Function | Node] = parse(file_name, lazy and not optimization, cache=cache)
+    tree = optimize(tree, optimization)
+
+    callables, impure = __find_callables(tree)
+
+    if 'main' not in callables:
+        raise RuntimeError("COMPILATION ERROR: 'main' FUNCTION NOT FOUND")
+
+    return Program(tree, callables, impure)
+
+
+def execute(file_name: Source, lazy: bool = False, cache: bool = True, optimization: int = 0):
     """
     executes given code, starting from 'main' function
     raises an error is there is no 'main' function
 
-    :param file_name: name of .min file to be executed
+    :param file_name: name of .min file to be executed (or opened stream, or source code itself)
+    :param lazy: if True, body of each function is parsed when function is called for the first
+                 time, so syntax errors in functions which are never called are not raised
+    :param cache: if True, tree of .min file is kept in '__mincache__' next to it for next runs;
+                  output of pure .min file (see Program.is_pure) is kept there too and is given
+                  without running program next time, if neither file nor libraries change
+    :param optimization: optimization level (see min_optimizer.py)
     """
-    tree: list[Function | Node] = parse(file_name)
+    if not cache or not is_cache_enabled() or not is_cacheable(file_name):
+        compile(file_name, lazy, cache, optimization).run()
+        return
 
-    callables: CallablesList = __find_callables(tree)
+    entry_path = output_entry_path(file_name)
 
-    functions = callables.keys()
-    if 'main' in functions:
-        execute_function('main', callables, [])
-    else:
-        raise RuntimeError("COMPILATION ERROR: 'main' FUNCTION NOT FOUND")
+    output = load_output(entry_path)
+    if output is not None:
+        write(output)
+        return
+
+    program = compile(file_name, lazy, cache, optimization)
+
+    # output is kept only if it can not change with input and if it does not hide syntax errors,
+    # which are raised without lazy parsing
+    if not program.is_pure or not __has_valid_syntax(program.tree):
+        program.run()
+        return
+
+    captured = io.StringIO()
+    program.run(stdout=TeeStream(sys.stdout, captured))
+    store_output(entry_path, captured.getvalue())
 
 
 def print_code(file_name: str):
@@ -490,17 +566,14 @@ def print_code(file_name: str):
     :param file_name: name of .min file to be read
     """
     print('Executed code:')
-    file = open(file_name, 'r')
-
-    lines: list[str] = file.readlines()
+    with open(file_name, 'r', encoding='utf-8') as file:
+        lines: list[str] = file.readlines()
 
     max_len: int = len(lines[0])
     for line in lines:
         max_len = max(max_len, len(line))
         print(line, end=('' if line[-1] == '\n' else '\n'))
 
-    file.close()
-
     print("-" * (max_len + 1))
 
 # endregion
@@ -4,279 +4,249 @@ and divide it on tokens, with recognized types
 
 Run '$python min_lexer.py' to only create tokens from raw
 text in .min file or use as module 'from lexer import get_tokens'
+('from lexer import iter_tokens' to process source line by line)
 """
 
 # region Imported modules
 
+import io
+import os
+import re
+import sys
+
+from contextlib import ExitStack
 from pprint import pprint
-from typing import TextIO
+from typing import Callable, Generator, Optional, TextIO, TypeGuard
+
+from .utils.structures import Token, TokenStream
+from .utils.commons import LITERAL_PATTERNS, SYMBOLIC_LEXEMES, SPECIAL_SYMBOLS
+from .utils.commons import WHITESPACES, FIXED_TOKENS, PIPE
+from .utils.commons import TokenList, Source
+
+# endregion
 
-from .utils.structures import Token
-from .utils.commons import INNER_TYPES, KEYWORDS, SPECIAL_SYMBOLS, OPERATORS, NUMERALS, BOOLEANS
-from .utils.commons import PIPE
-from .utils.commons import TokenList
+# region Scanner and lookups compiled from lexical grammar (see LEXICAL_GRAMMAR in commons.py)
+
+# longer lexemes go first, so '<=' is taken instead of '<' followed by '='
+__SYMBOLIC = '|'.join(re.escape(lexeme) for lexeme in
+                      sorted(SYMBOLIC_LEXEMES, key=len, reverse=True))
+__SEPARATORS = ''.join(re.escape(symbol) for symbol in SPECIAL_SYMBOLS)
+__NOT_WHITESPACE_SEPARATORS = ''.join(re.escape(symbol) for symbol in SPECIAL_SYMBOLS
+                                      if symbol not in WHITESPACES)
+
+# quote opens or closes a string unless it goes right after '\', string without closing
+# quote lasts till the end of line; quotes are not separators, so they stay inside of token
+__STRING = r'"(?:[^"]|(?<=\\)")*(?:"|$)'
+__TOKEN = (rf'(?:[^{__SEPARATORS}"]+|(?<=\\)"|{__STRING})+'  # name or literal
+           rf'|{__SYMBOLIC}'  # operator or separator
+           rf'|[{__NOT_WHITESPACE_SEPARATORS}]')  # special symbol which is not a lexeme, like '!'
+__CODE = rf'(?:[^"~]+|(?<=\\)"|{__STRING})*'  # everything before comment
+
+__TOKEN_PATTERN = re.compile(__TOKEN, re.DOTALL)
+__CODE_PATTERN = re.compile(__CODE, re.DOTALL)
+
+__STRING_PATTERN = re.compile(rf'(?<=\\)"|({__STRING})', re.DOTALL)
+__ESCAPE_PATTERN = re.compile(r'\\(.)', re.DOTALL)
+__ESCAPES: dict[str, str] = {'n': '\n', '"': '"', '\\': '\\'}  # others are dropped
+
+__LITERAL_PATTERN = re.compile('|'.join(f'(?P<{type_}>{pattern})'
+                                        for type_, pattern in LITERAL_PATTERNS.items()), re.DOTALL)
+__LITERAL_VALUES: dict[str, Callable[[str], int | float | str]] = {
+    'int': int,
+    'float': float,
+    'str': lambda lexeme: lexeme[1:-1]
+}
+
+# names which are not literals get their type from previous token
+__NAME_TYPES: dict[str, str] = {'start': 'fnc', 'use': 'lib'}
 
 # endregion
 
 # region Private functions
 
-def __give_type(token: str, prev_token: str) -> Token:
+def __give_type(token: str, prev_token: str,
+                interned: Optional[dict[tuple[str, str], Token]] = None) -> Token:
     # for given token return token with evaluated type (sometimes depends on previous token)
+    # fixed lexemes give shared tokens from commons.py, other tokens are shared via 'interned'
     if not isinstance(token, str) or not isinstance(prev_token, str):
         return None
 
-    if __is_keyword(token):
-        typed_token = Token('kwd', token)
-    elif __is_operator(token):
-        typed_token = Token('opr', token)
-    elif __is_separator(token):
-        typed_token = Token('sep', token)
-    elif __is_type(token):
-        typed_token = Token('typ', token)
-    elif __is_boolean(token):
-        typed_token = Token('bool', token == 'true')
-    elif __is_integer(token):
-        typed_token = Token('int', int(token))
-    elif __is_float(token):
-        typed_token = Token('float', float(token))
-    elif __is_string(token):
-        typed_token = Token('str', token[1:-1])
-    else:
-        match prev_token:
-            case 'start':
-                typed_token = Token('fnc', token)
-            case 'use':
-                typed_token = Token('lib', token)
-            case _:
-                typed_token = Token('var', token)
+    fixed_token: Optional[Token] = FIXED_TOKENS.get(token)
+    if fixed_token is not None:
+        return fixed_token
 
-    return typed_token
+    name_type: str = __NAME_TYPES.get(prev_token, 'var')
 
-def __give_types_for_tokens(tokens_raw: list[list[str]]) -> list[TokenList]:
-    # gives each given token a type
-    if not isinstance(tokens_raw, list):
-        return None
-
-    for line in tokens_raw:
-        if not isinstance(line, list):
-            return None
-
-    prev_token: str = ''
-
-    tokens: list[TokenList] = []
+    if interned is not None:
+        typed_token: Optional[Token] = interned.get((token, name_type))
+        if typed_token is not None:
+            return typed_token
 
-    for line in tokens_raw:
-        line_with_types: list = []
-
-        for token in line:
-            typed_token: Token = __give_type(token, prev_token)
-
-            if typed_token == PIPE and line_with_types:
-                old_value = line_with_types[-1].value
-                line_with_types[-1] = Token('fnc', old_value)
-
-            line_with_types.append(typed_token)
-            prev_token = token
-
-        if line_with_types:
-            tokens.append(line_with_types)
-
-    return tokens
-
-
-def __in_string(line: str, index_needed: int) -> bool:
-    # returns True if symbol in index_needed is inside string, otherwise False
-    if line is None or index_needed is None:
-        return False
-
-    previous: str = ''
-
-    in_string_flag: bool = False
-    symbols_count = len(line)
-    for index in range(symbols_count):
-        current = line[index]
+    literal = __LITERAL_PATTERN.fullmatch(token)
+    if literal is not None and literal.lastgroup is not None:
+        type_ = literal.lastgroup
+        typed_token = Token(type_, __LITERAL_VALUES[type_](token))
+    else:
+        typed_token = Token(name_type, sys.intern(token))
 
-        if current == '"' and previous != '\\':
-            in_string_flag = not in_string_flag
-            continue
+    if interned is not None:
+        interned[(token, name_type)] = typed_token
 
-        if index == index_needed:
-            return in_string_flag
+    return typed_token
 
-        previous = current
+def __called_function(name: int | float | str | bool,
+                      interned: Optional[dict[tuple[str, str], Token]] = None) -> Token:
+    # gives 'fnc' token for whatever stands before pipe operator
+    if interned is None or not isinstance(name, str):
+        return Token('fnc', name)
 
-    return False
+    # keys from __give_type always end with token type, so '|' keeps these keys apart
+    function: Optional[Token] = interned.get((name, '|'))
+    if function is None:
+        function = interned[(name, '|')] = Token('fnc', sys.intern(name))
 
-def __clear_lines(lines_raw: list[str]) -> tuple[list[str], list[int]]:
-    # deletes whitespace, eol, comments
-    if not isinstance(lines_raw, list):
-        return None, None
+    return function
 
-    for line in lines_raw:
-        if not isinstance(line, str):
-            return None, None
+def __give_types_for_line(line: list[str], prev_token: str,
+                          interned: Optional[dict[tuple[str, str], Token]] = None
+                          ) -> tuple[TokenList, str]:
+    # gives each token of one line a type, returns typed line and last raw token,
+    # which is needed to type first token of the next line
+    line_with_types: list = []
 
-    lines: list[str] = []
-    line_numbers: list[int] = []
+    for token in line:
+        typed_token: Token = __give_type(token, prev_token, interned)
 
-    # removing comments, tabs, eol symbols
-    lines_count = len(lines_raw)
-    for index in range(lines_count):
-        line = lines_raw[index]
+        if typed_token == PIPE and line_with_types:
+            old_value = line_with_types[-1].value
+            line_with_types[-1] = __called_function(old_value, interned)
 
-        symbols_count = len(line)
-        for symbol_index in range(symbols_count):
-            symbol = line[symbol_index]
-            if not __in_string(line, symbol_index) and symbol == '~':
-                line = line[:symbol_index]
-                break
-        line = line.strip()
+        line_with_types.append(typed_token)
+        prev_token = token
 
-        if line == '':
-            continue
+    return line_with_types, prev_token
 
-        line_numbers.append(index + 1)  # line count starts from 1
-        lines.append(line)
+def __is_path(source: Source) -> TypeGuard[str | os.PathLike]:
+    # string with line breaks is source code itself, not a path
+    if isinstance(source, str):
+        return '\n' not in source and '\r' not in source
 
-    return lines, line_numbers
+    return isinstance(source, os.PathLike)
 
+def __open_source(source: Source, files: ExitStack) -> TextIO:
+    # gives text stream for path, already opened stream or source code itself;
+    # file opened here is closed together with files
+    if __is_path(source):
+        try:
+            return files.enter_context(open(source, 'r', encoding='utf-8'))
+        except (FileNotFoundError, TypeError) as file_e:
+            raise FileNotFoundError('FILE NOT FOUND, MAKE SURE YOUR ' +
+                                    'PATH TO FILE IS CORRECT') from file_e
+    if isinstance(source, str):
+        return io.StringIO(source, newline=None)
+    if not isinstance(source, os.PathLike) and hasattr(source, 'readline'):
+        return source
 
-def __is_keyword(token: str) -> bool:
-    return token in KEYWORDS
+    raise FileNotFoundError('FILE NOT FOUND, MAKE SURE YOUR ' +
+                            'PATH TO FILE IS CORRECT')
 
 
-def __is_operator(token: str) -> bool:
-    return token in OPERATORS
+def __strip_comment(line: str) -> str:
+    # cuts off comment, '~' inside of string is not a comment
+    code = __CODE_PATTERN.match(line)
+    return line if code is None else line[:code.end()]
 
+def __unescape(match: re.Match) -> str:
+    # translates escape sequences of a string literal, quotes after '\\' are left as they are
+    if match.group(1) is None:
+        return match.group()
 
-def __is_type(token: str) -> bool:
-    return token in INNER_TYPES
+    return __ESCAPE_PATTERN.sub(lambda escape: __ESCAPES.get(escape.group(1), ''), match.group())
 
+def __split_line(line: str) -> list[str]:
+    # separates cleared line into raw tokens with compiled scanner
+    line_of_tokens: list[str] = __TOKEN_PATTERN.findall(line)
 
-def __is_boolean(token: str) -> bool:
-    return token in BOOLEANS
+    if '\\' not in line:  # nothing to unescape, which is the case for most lines
+        return line_of_tokens
 
+    return [__STRING_PATTERN.sub(__unescape, token) if '\\' in token and '"' in token else token
+            for token in line_of_tokens]
 
-def __is_integer(token: str) -> bool:
-    if token is None:
-        return False
 
-    if token[0] == '-':
-        token = token[1:]
+# endregion
 
-    for numeral in token:
-        if numeral not in NUMERALS:
-            return False
+# region Public functions
 
-    return True
+def iter_tokens(source: Source) -> Generator[tuple[int, TokenList], None, None]:
+    """
+    lazily separates lines into tokens, with types, reading source one line at a time
 
+    :param source: path to .min file, opened text stream or source code itself
+                   (string with at least one line break is treated as source code)
+    :return: generator of (line number, tokens of that line) pairs, empty lines are skipped;
+             file opened here is closed when generator is closed, finished or raises
+    """
+    with ExitStack() as files:
+        file = __open_source(source, files)
+        prev_token: str = ''
+        interned: dict[tuple[str, str], Token] = {}  # one Token per distinct name and literal
 
-def __is_float(token: str) -> bool:
-    if token is None:
-        return False
+        for index, raw_line in enumerate(file):
+            line_of_tokens, prev_token = lex_line(raw_line, prev_token, interned)
 
-    parts: list[str] = token.split('.')
+            if line_of_tokens:
+                yield index + 1, line_of_tokens  # line count starts from 1
 
-    # if string has NO point '.', it isn't a floating point number
-    if len(parts) != 2:
-        return False
 
-    return __is_integer(parts[0]) and __is_integer(parts[1])
+def lex_line(raw_line: str, prev_token: str = '',
+             interned: Optional[dict[tuple[str, str], Token]] = None) -> tuple[TokenList, str]:
+    """
+    separates one line of source into tokens, with types
+
+    :param raw_line: line of source code, line break at the end is allowed
+    :param prev_token: last raw token of previous non-empty line, as type of a name
+                       depends on it (like function name after 'start')
+    :param interned: dictionary to share Tokens of names and literals between lines
+    :return: tokens of the line (empty for empty line) and last raw token to be given
+             for the next line
+    """
+    line = __strip_comment(raw_line).strip()
 
+    if line == '':
+        return [], prev_token
 
-def __is_string(token: str) -> bool:
-    if token is None:
-        return False
+    return __give_types_for_line(__split_line(line), prev_token, interned)
 
-    return token[0] == '"' and token[-1] == '"' and len(token) > 1
 
+def get_tokens(file_name: Source) -> tuple[list[TokenList], list[int]]:
+    """
+    separate lines into tokens, with types
+    :param file_name: path to .min file to be processed (or anything iter_tokens accepts)
+    :return: nested array of tokens and line numbers to each line
+    """
+    tokens: list[TokenList] = []
+    line_numbers: list[int] = []
 
-def __is_separator(token: str) -> bool:
-    return token == ','
+    for line_number, line in iter_tokens(file_name):
+        tokens.append(line)
+        line_numbers.append(line_number)
 
-# endregion
+    return tokens, line_numbers
 
-# region Public functions
 
-def get_tokens(file_name: str) -> tuple[list[TokenList], list[int]]:
+def get_token_stream(source: Source) -> TokenStream:
     """
-    separate lines into tokens, with types
-    :param file_name: path to .min file to be processed
-    :return: nested array of tokens and line numbers to each line
+    separate lines into tokens, with types, and pack them into compact TokenStream
+    :param source: anything iter_tokens accepts
+    :return: token stream, which can be given to parser directly
     """
-    try:
-        file: TextIO = open(file_name, 'r')
-    except (FileNotFoundError, TypeError) as file_e:
-        raise FileNotFoundError('FILE NOT FOUND, MAKE SURE YOUR ' +
-                                'PATH TO FILE IS CORRECT') from file_e
-
-    raw_lines: list[str] = file.readlines()
-    lines, line_numbers = __clear_lines(raw_lines)
-
-    tokens_raw: list[list[str]] = []  # separated, but no types
-
-    for line in lines:
-        line_of_tokens: list[str] = []
-
-        length: int = len(line)
-        token: str = ''
-
-        skip_next: bool = False
-
-        for index in range(length):
-            # next 3 if's cares about special symbols (\', \\, \", \n)
-            # and how to add them, properly, cause in string it doesn't
-            # recognize '\ + symbol' as special symbol, but as '\\ + \ +
-            # symbol'
-
-            # we added special symbol in the previous iteration, so we must skip it
-            if skip_next:
-                skip_next = False
-                continue
-
-            # when we are in string we don't care about any operators, spaces, but care about '\'
-            if __in_string(line, index) and line[index] == '\\' and index + 1 < length:
-                match line[index + 1]:
-                    case 'n':
-                        token += '\n'
-                    case '"':
-                        token += '\"'
-                    case '\\':
-                        token += '\\'
-
-                skip_next = True
-                continue  # we've already added token
-
-            # when we're not in string things are easier
-            if line[index] in SPECIAL_SYMBOLS and not __in_string(line, index):
-                # several special symbols in raw creates '' tokens
-                if token != '':
-                    line_of_tokens.append(token)
-
-                token = ''
-                if line[index] != ' ':
-                    # we count operators as tokens as well, except spaces
-                    line_of_tokens.append(line[index])
-
-                    # for 2-symbol operators, like '++', '--', '>=', '<=' or '=='
-                    if index + 1 < length and line[index + 1] == '=' \
-                            and line[index] in ['>', '<', '=']:
-                        line_of_tokens[-1] += '='
-                        skip_next = True
-
-            else:
-                token += line[index]
-
-        # using previous method we don't add last token, so we add it manually
-        if token != '':
-            line_of_tokens.append(token)
-
-        if line_of_tokens:
-            tokens_raw.append(line_of_tokens)
-
-    tokens: list[TokenList] = __give_types_for_tokens(tokens_raw)  # differentiate tokens
+    stream = TokenStream()
 
-    return tokens, line_numbers
+    for line_number, line in iter_tokens(source):
+        stream.append_line(line_number, line)
+
+    return stream
 
 
 def print_tokens(file_name: str) -> None:
@@ -0,0 +1,396 @@
+"""
+This module keeps libraries of MINIMUM (python modules or .min files in 'libraries'
+directory) once per process, so programs using the same library do not load it again
+
+Names of functions of python library are bound when program is linked: they are read from
+METHODS and IMPURE_METHODS constants of library, which are literals, without running it, while
+library module itself is executed only when one of its functions is called for the first time;
+libraries without such constants are executed right away and give their functions by
+get_methods() and get_impure_methods()
+
+Trees of .min libraries are kept by hash of their content, both in memory and in '__mincache__'
+(see min_cache.py), so library is parsed once, however many programs use it
+
+Use as module 'from min_libraries import link_library'
+"""
+
+# region Imported modules
+
+import ast
+import hashlib
+import importlib.util
+import os
+import threading
+
+from types import ModuleType
+from typing import Any, Optional
+
+from .min_parser import parse
+from .utils.structures import Function, Node
+from .utils.commons import PyFunction, CallablesList, USE, LIBRARIES_DIRECTORY
+
+# endregion
+
+# region Public classes
+
+class LibraryFunction:
+    """
+    LibraryFunction is function of library bound by its name; it executes library
+    when it is called for the first time
+    """
+    __slots__ = ('__library', '__name', '__function')
+
+    def __init__(self, library: 'Library', name: str):
+        """
+        :param library: library, which has function
+        :param name: name of function in MINIMUM
+        """
+        self.__library = library
+        self.__name = name
+        self.__function: Optional[Any] = None
+
+    @property
+    def name(self) -> str:
+        """
+        :return: name of function in MINIMUM
+        """
+        return self.__name
+
+    def bind(self) -> Any:
+        """
+        executes library, if it was not executed yet, and binds function to its implementation
+
+        :return: python function, which implements function
+        """
+        if self.__function is None:
+            self.__function = self.__library.resolve(self.__name)
+
+        return self.__function
+
+    def __call__(self, args: list) -> Any:
+        if self.__function is None:
+            self.bind()
+
+        return self.__function(args)  # type: ignore
+
+    def __repr__(self) -> str:
+        return f'LibraryFunction({self.__library.name}.{self.__name})'
+
+
+class Library:
+    """
+    Library is python module from 'libraries' directory with table of its functions
+    (from METHODS or get_methods()) and names of its impure functions (from IMPURE_METHODS
+    or get_impure_methods())
+    """
+    __slots__ = ('__name', '__path', '__methods', '__impure', '__module', '__lock',
+                 '__implementations')
+
+    def __init__(self, name: str, path: str):
+        """
+        reads names of functions of library, executing it only if it has no METHODS constant
+
+        :param name: name of library, used after 'use'
+        :param path: path to .py file of library
+        """
+        self.__name = name
+        self.__path = path
+        self.__module: Optional[ModuleType] = None
+        self.__lock = threading.Lock()
+
+        # python functions (or their names in module, if it is not executed yet) by names
+        # of functions in MINIMUM, so each of them is found at once when it is called
+        self.__implementations: dict[str, Any] = {}
+
+        table = _read_table(path)
+        if table is None:
+            module = self.module
+            table = [(method[0], method[1], method[2]) for method in module.get_methods()], \
+                module.get_impure_methods() if hasattr(module, 'get_impure_methods') else None
+
+        methods, impure = table
+        self.__methods: dict[str, PyFunction] = {}
+        for name_, implementation, args in methods:
+            self.__implementations[name_] = implementation
+            self.__methods[name_] = [LibraryFunction(self, name_), list(args)]
+
+        # library, which does not tell it, is taken as impure completely
+        self.__impure: frozenset[str] = frozenset(self.__methods if impure is None else impure)
+
+    @property
+    def name(self) -> str:
+        """
+        :return: name of library, used after 'use'
+        """
+        return self.__name
+
+    @property
+    def methods(self) -> dict[str, PyFunction]:
+        """
+        :return: functions of library as [callable, types of arguments] by their names
+        """
+        return self.__methods
+
+    @property
+    def impure(self) -> frozenset[str]:
+        """
+        :return: names of functions, which results depend on anything but their arguments
+        """
+        return self.__impure
+
+    @property
+    def is_loaded(self) -> bool:
+        """
+        :return: True if library module was executed
+        """
+        return self.__module is not None
+
+    @property
+    def module(self) -> ModuleType:
+        """
+        library module, executed when it is needed for the first time
+
+        :return: library module
+        """
+        with self.__lock:
+            if self.__module is None:
+                spec = importlib.util.spec_from_file_location(self.__name, self.__path)
+                if spec is None or spec.loader is None:
+                    raise ImportError(f'UNABLE TO READ/FIND LIBRARY {self.__name}')
+
+                module = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(module)
+                self.__module = module
+                _library_stats['loaded'] += 1
+
+        return self.__module
+
+    def resolve(self, name: str) -> Any:
+        """
+        :param name: name of function in MINIMUM
+        :return: python function, which implements it
+        """
+        implementation = self.__implementations.get(name)
+        if isinstance(implementation, str):
+            implementation = getattr(self.module, implementation, None)
+
+        if not callable(implementation):
+            raise RuntimeError(f'FUNCTION {name} NOT FOUND IN LIBRARY {self.__name}')
+
+        return implementation
+
+
+class MinLibrary:
+    """
+    MinLibrary is .min file from 'libraries' directory; its functions (but 'main') are linked
+    together with functions of libraries it uses
+    """
+    __slots__ = ('__name', '__digest', '__tree', '__methods', '__impure')
+
+    def __init__(self, name: str, path: str, digest: str):
+        """
+        parses library (or loads its tree from '__mincache__') and links libraries it uses
+
+        :param name: name of library, used after 'use'
+        :param path: path to .min file of library
+        :param digest: hash of content of library
+        """
+        self.__name = name
+        self.__digest = digest
+        self.__tree: tuple[Function | Node, ...] = tuple(parse(path))
+        _library_stats['parsed'] += 1
+
+        self.__methods: CallablesList = {}
+        impure: set[str] = set()
+
+        for element in self.__tree:
+            if isinstance(element, Node) and element.operator == USE:
+                library = link_library(element.right.value)
+                if library is None:
+                    raise RuntimeError(f'UNABLE TO READ/FIND LIBRARY {element.right} ' +
+                                       f'AT LINE {element.line_number} OF LIBRARY {name}')
+
+                add_methods(self.__methods, library,
+                            f'AT LINE {element.line_number} OF LIBRARY {name}')
+                impure.update(library.impure)
+
+        # own functions of library take place of functions of libraries it uses
+        for element in self.__tree:
+            if isinstance(element, Function) and element.name != 'main':
+                self.__methods[element.name] = element
+                impure.discard(element.name)
+
+        self.__impure: frozenset[str] = frozenset(impure)
+
+    @property
+    def name(self) -> str:
+        """
+        :return: name of library, used after 'use'
+        """
+        return self.__name
+
+    @property
+    def digest(self) -> str:
+        """
+        :return: hash of content of library
+        """
+        return self.__digest
+
+    @property
+    def tree(self) -> tuple[Function | Node, ...]:
+        """
+        :return: logical tree of library
+        """
+        return self.__tree
+
+    @property
+    def methods(self) -> CallablesList:
+        """
+        :return: functions of library and of libraries it uses by their names
+        """
+        return self.__methods
+
+    @property
+    def impure(self) -> frozenset[str]:
+        """
+        :return: names of impure python functions, which library can call
+        """
+        return self.__impure
+
+# endregion
+
+# region Private functions
+
+__libraries: dict[str, Library | MinLibrary] = {}
+__libraries_lock = threading.RLock()  # .min libraries link libraries they use while it is held
+__linking: list[str] = []  # .min libraries being linked now, to find circular uses
+_library_stats = {'loaded': 0, 'parsed': 0}
+
+
+def _read_table(path: str) -> Optional[tuple[list[tuple[str, str, list[str]]],
+                                            Optional[list[str]]]]:
+    # reads METHODS and IMPURE_METHODS of library without running it, they have to be literals
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            module = ast.parse(file.read(), path)
+    except (OSError, SyntaxError, ValueError):
+        return None
+
+    constants: dict[str, Any] = {}
+    for statement in module.body:
+        if isinstance(statement, ast.Assign) and len(statement.targets) == 1:
+            target, value = statement.targets[0], statement.value
+        elif isinstance(statement, ast.AnnAssign) and statement.value is not None:
+            target, value = statement.target, statement.value
+        else:
+            continue
+
+        if isinstance(target, ast.Name) and target.id in ('METHODS', 'IMPURE_METHODS'):
+            try:
+                constants[target.id] = ast.literal_eval(value)
+            except ValueError:
+                return None
+
+    methods = constants.get('METHODS')
+    impure = constants.get('IMPURE_METHODS')
+
+    if not isinstance(methods, list) or \
+            not all(isinstance(method, list) and len(method) == 3 and
+                    isinstance(method[0], str) and isinstance(method[1], str) and
+                    isinstance(method[2], list) for method in methods):
+        return None
+
+    if impure is not None and (not isinstance(impure, list) or
+                               not all(isinstance(name, str) for name in impure)):
+        return None
+
+    return [(method[0], method[1], method[2]) for method in methods], impure
+
+# endregion
+
+# region Public functions
+
+def link_library(name: str) -> Optional[Library | MinLibrary]:
+    """
+    gives library, reading it only when it is used for the first time in this process;
+    python library is taken before .min library with the same name, and .min library is read
+    again if its content was changed
+
+    :param name: name of library, used after 'use'
+    :return: library, or None if there is no such library
+    """
+    library = __libraries.get(name)
+    if isinstance(library, Library):
+        return library
+
+    path = os.path.join(LIBRARIES_DIRECTORY, name + '.py')
+    if os.path.isfile(path):
+        with __libraries_lock:
+            if name not in __libraries:
+                __libraries[name] = Library(name, path)
+
+        return __libraries[name]
+
+    path = os.path.join(LIBRARIES_DIRECTORY, name + '.min')
+    try:
+        with open(path, 'rb') as file:
+            digest = hashlib.sha256(file.read()).hexdigest()
+    except OSError:
+        return None
+
+    if library is not None and library.digest == digest:
+        return library
+
+    with __libraries_lock:
+        if name in __linking:
+            raise RuntimeError(f'CIRCULAR USE OF LIBRARY {name}: ' +
+                               ' -> '.join(__linking + [name]))
+
+        library = __libraries.get(name)
+        if library is None or library.digest != digest:  # type: ignore
+            __linking.append(name)
+            try:
+                library = MinLibrary(name, path, digest)
+            finally:
+                __linking.pop()
+            __libraries[name] = library
+
+    return library
+
+
+def add_methods(callables: CallablesList, library: Library | MinLibrary, place: str) -> None:
+    """
+    adds functions of library to functions of other libraries, used by the same program (or
+    library); two libraries can not give different functions with the same name, but own
+    functions of program are added after libraries and take place of their functions
+
+    :param callables: functions of libraries by their names
+    :param library: library, used by program
+    :param place: where library is used, for error message
+    """
+    for name, method in library.methods.items():
+        if callables.get(name, method) is not method:
+            raise RuntimeError(f'LIBRARY {library.name} REDEFINES FUNCTION {name} {place}')
+
+        callables[name] = method
+
+
+def library_cache_info() -> dict[str, int]:
+    """
+    numbers of libraries kept (linked), python libraries executed (loaded) and .min libraries
+    parsed (parsed, their trees may be loaded from '__mincache__') since cache was last cleared
+
+    :return: dictionary with 'linked', 'loaded' and 'parsed'
+    """
+    return {'linked': len(__libraries), **_library_stats}
+
+
+def clear_library_cache() -> None:
+    """
+    drops libraries kept, so they are read again (after they were changed, for example)
+    """
+    with __libraries_lock:
+        __libraries.clear()
+        _library_stats.update(loaded=0, parsed=0)
+
+# endregion
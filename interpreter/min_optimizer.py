@@ -0,0 +1,613 @@
+"""
+This module transforms logical tree created in parser before it is run. Transformations are
+made by passes: functions, which are given tree and give new tree (sharing unchanged parts
+of the old one) with number of Nodes and Blocks they changed
+
+Passes are run in order they were registered, each one only at optimization levels not lower
+than its own (-O0 runs none of them, -O1 runs simple ones, -O2 runs all); time and changes of
+each pass are recorded, and tree is verified after each pass in debug mode
+
+LazyFunctions, which bodies are not parsed yet, are left as they are
+
+Use as module 'from min_optimizer import optimize, register_pass'
+"""
+
+# region Imported modules
+
+import time
+
+from typing import Any, Optional, Sequence
+
+from .min_libraries import link_library
+from .utils.structures import Token, Node, Block, Function, LazyFunction, is_debug_mode
+from .utils.commons import FIXED_TOKENS, TOKEN_TYPES, BLOCK_HEADER_TOKENS, USE, RETURN, BREAK
+from .utils.commons import IF, ELIF, ELSE, CREATE, ASSIGN, COMMA, LEFT_BRACKET, RIGHT_BRACKET
+from .utils.commons import PLUS, MINUS, MULTIPLY, DIVIDE, MODULO, EQUALS, NOT_EQUALS, MORE_THAN
+from .utils.commons import LESS_THAN, NO_MORE_THAN, NO_LESS_THAN, WHILE, TRUE
+from .utils.commons import OptimizationPass, MAX_OPTIMIZATION_LEVEL
+from .utils.operations import LOGICAL_OPERATIONS, called_names, operate_arithmetical
+from .utils.operations import operate_logical
+
+# endregion
+
+# region Private functions
+
+__passes: list[tuple[str, int, OptimizationPass]] = []
+__pass_stats: list[dict[str, Any]] = []
+
+# operators Nodes in bodies of functions may have
+__NODE_OPERATORS: frozenset[Token] = frozenset(
+    token for token in FIXED_TOKENS.values() if token.type == 'opr'
+) - {LEFT_BRACKET, RIGHT_BRACKET} | {COMMA, RETURN, BREAK}
+
+
+def __is_parsed(element: Function | Node) -> bool:
+    # LazyFunction is parsed when its body is accessed, optimizer does not do it
+    return not isinstance(element, LazyFunction) or element.is_parsed
+
+
+def __malformed(message: str, line_number: Any, pass_name: str) -> RuntimeError:
+    # error of verifier, pass which made tree malformed is named
+    return RuntimeError(f'MALFORMED TREE AFTER {pass_name}: {message} AT LINE {line_number}')
+
+
+def __verify_header(element: Any, pass_name: str) -> Optional[Function]:
+    # checks element of tree itself, gives Function which body has to be checked
+    if isinstance(element, Node):
+        if element.operator != USE or element.left is not None or \
+                not isinstance(element.right, Token) or element.right.type != 'lib':
+            raise __malformed('ONLY USE OF LIBRARY CAN BE OUTSIDE OF FUNCTION',
+                              element.line_number, pass_name)
+        return None
+
+    if not isinstance(element, Function):
+        raise __malformed(f'UNEXPECTED {type(element).__name__} IN TREE', '?', pass_name)
+
+    if not isinstance(element.name, str) or not element.name:
+        raise __malformed('FUNCTION WITHOUT NAME', element.line_number, pass_name)
+
+    for arg in element.args:
+        if not isinstance(arg, Node) or arg.operator != CREATE:
+            raise __malformed(f'INVALID ARGUMENT OF FUNCTION {element.name}',
+                              element.line_number, pass_name)
+
+    return element if __is_parsed(element) else None
+
+
+def __verify_block(block: Block, place: str, pass_name: str) -> None:
+    # checks header of block, its lines are checked by __verify_body
+    if place not in ('line', 'next') or (place == 'next') != (block.operator in (ELIF, ELSE)):
+        raise __malformed(f'MISPLACED {block.operator.value} BLOCK', block.line_number,
+                          pass_name)
+    if block.operator not in BLOCK_HEADER_TOKENS or \
+            (block.condition is None) != (block.operator == ELSE):
+        raise __malformed('INVALID BLOCK HEADER', block.line_number, pass_name)
+    if block.next_block is not None and block.operator not in (IF, ELIF):
+        raise __malformed(f'{block.operator.value} BLOCK CAN NOT BE CONTINUED',
+                          block.line_number, pass_name)
+    if not isinstance(block.body, list):
+        raise __malformed('BODY OF BLOCK IS NOT A LIST', block.line_number, pass_name)
+
+
+def __verify_body(function: Function, pass_name: str) -> None:
+    # checks lines of function body, nodes are walked with stack, as they may be deep
+    elements: list[tuple[Any, str]] = [(line, 'line') for line in function.body]
+
+    while elements:
+        element, place = elements.pop()
+
+        if isinstance(element, Node | Block) and \
+                (not isinstance(element.line_number, int) or element.line_number < 1):
+            raise __malformed(f'{type(element).__name__} WITHOUT LINE NUMBER',
+                              function.line_number, pass_name)
+
+        if isinstance(element, Block):
+            __verify_block(element, place, pass_name)
+
+            elements += [(line, 'line') for line in element.body]
+            if element.condition is not None:
+                elements.append((element.condition, 'operand'))
+            if element.next_block is not None:
+                elements.append((element.next_block, 'next'))
+
+        elif isinstance(element, Node):
+            if element.operator not in __NODE_OPERATORS:
+                raise __malformed(f'UNKNOWN OPERATOR {element.operator}',
+                                  element.line_number, pass_name)
+
+            for operand in (element.left, element.right):
+                if isinstance(operand, Node):
+                    elements.append((operand, 'operand'))
+                elif operand is not None and (not isinstance(operand, Token) or
+                                              operand.type not in TOKEN_TYPES):
+                    raise __malformed(f'INVALID OPERAND {operand!r}', element.line_number,
+                                      pass_name)
+
+        elif place == 'line' or not isinstance(element, Token):
+            raise __malformed(f'UNEXPECTED {type(element).__name__} IN BODY',
+                              function.line_number, pass_name)
+
+# endregion
+
+# region Public functions
+
+def register_pass(name: str, pass_: OptimizationPass, level: int = 1) -> None:
+    """
+    adds pass after all passes registered before
+
+    :param name: name of pass, shown in its stats
+    :param pass_: function, which is given tree and gives (new tree, number of Nodes and
+                  Blocks changed); it SHOULD NOT change given tree
+    :param level: lowest optimization level, which runs pass
+    """
+    if not isinstance(level, int) or not 1 <= level <= MAX_OPTIMIZATION_LEVEL:
+        raise ValueError(f'LEVEL OF PASS MUST BE FROM 1 TO {MAX_OPTIMIZATION_LEVEL}')
+    if any(registered[0] == name for registered in __passes):
+        raise ValueError(f'PASS {name} IS ALREADY REGISTERED')
+
+    __passes.append((name, level, pass_))
+
+
+def remove_pass(name: str) -> None:
+    """
+    :param name: name of registered pass, which will not be run anymore
+    """
+    __passes[:] = [registered for registered in __passes if registered[0] != name]
+
+
+def get_passes(level: int = MAX_OPTIMIZATION_LEVEL) -> list[str]:
+    """
+    :param level: optimization level
+    :return: names of passes run at this level, in order they are run
+    """
+    return [name for name, pass_level, _ in __passes if pass_level <= level]
+
+
+def pass_info() -> list[dict[str, Any]]:
+    """
+    stats of passes run by last call of optimize
+
+    :return: list of dictionaries with 'name', 'seconds' (time pass took), 'changed'
+             (Nodes and Blocks it changed), 'removed' (Nodes and Blocks it pruned from tree)
+             and 'nodes' (Nodes and Blocks in tree after it)
+    """
+    return [dict(stats) for stats in __pass_stats]
+
+
+def count_nodes(tree: Sequence[Optional[Function | Node | Block]]) -> int:
+    """
+    :param tree: logical tree or body of block (None elements are skipped)
+    :return: number of Nodes and Blocks in tree (bodies of LazyFunctions are not counted,
+             if they are not parsed yet)
+    """
+    count = 0
+    elements: list[Any] = []
+    for element in tree:
+        if isinstance(element, Function):
+            if __is_parsed(element):
+                elements += element.body
+        else:
+            elements.append(element)
+
+    while elements:
+        element = elements.pop()
+        if isinstance(element, Node):
+            count += 1
+            elements += [element.left, element.right]
+        elif isinstance(element, Block):
+            count += 1
+            elements += [element.condition, element.next_block, *element.body]
+
+    return count
+
+
+def verify_tree(tree: list[Function | Node], pass_name: str = 'PARSER') -> None:
+    """
+    checks that tree has the shape interpreter expects, raises an error if it has not
+
+    :param tree: logical tree
+    :param pass_name: name of pass which made tree, for error message
+    """
+    if not isinstance(tree, list):
+        raise __malformed('TREE IS NOT A LIST', '?', pass_name)
+
+    for element in tree:
+        function = __verify_header(element, pass_name)
+        if function is not None:
+            __verify_body(function, pass_name)
+
+
+def optimize(tree: list[Function | Node], level: int = 1,
+             verify: Optional[bool] = None) -> list[Function | Node]:
+    """
+    runs passes of given optimization level over tree
+
+    :param tree: logical tree, which is not changed
+    :param level: optimization level, 0 leaves tree as it is
+    :param verify: if True, tree is verified after each pass, by default it is done
+                   in debug mode only (see set_debug_mode)
+    :return: optimized logical tree
+    """
+    if not isinstance(level, int) or not 0 <= level <= MAX_OPTIMIZATION_LEVEL:
+        raise ValueError(f'OPTIMIZATION LEVEL MUST BE FROM 0 TO {MAX_OPTIMIZATION_LEVEL}')
+
+    __pass_stats.clear()
+
+    passes = [(name, pass_) for name, pass_level, pass_ in __passes if pass_level <= level]
+    if not passes:
+        return tree
+
+    verify = is_debug_mode() if verify is None else verify
+    if verify:
+        verify_tree(tree)
+
+    nodes = count_nodes(tree)
+    for name, pass_ in passes:
+        started = time.perf_counter()
+        tree, changed = pass_(tree)
+        seconds = time.perf_counter() - started
+
+        if verify:
+            verify_tree(tree, f'PASS {name}')
+
+        removed, nodes = nodes, count_nodes(tree)
+        __pass_stats.append({'name': name, 'seconds': seconds, 'changed': changed,
+                             'removed': removed - nodes, 'nodes': nodes})
+
+    return tree
+
+
+
+def print_pass_info() -> None:
+    """
+    outputs stats of passes run by last call of optimize
+    """
+    print("-" * 70)
+    print("Optimization passes:")
+
+    for stats in __pass_stats:
+        print(f"\t{stats['name']:24} {stats['seconds'] * 1000:8.3f} ms, "
+              f"{stats['changed']:6} changed, {stats['removed']:6} removed, "
+              f"{stats['nodes']:6} nodes left")
+
+    if not __pass_stats:
+        print("\tnone were run")
+
+# endregion
+
+# region Passes
+
+# operators, which Nodes are folded if both their operands are literals
+__FOLDABLE_OPERATORS: frozenset[Token] = frozenset([PLUS, MINUS, MULTIPLY, DIVIDE, MODULO, EQUALS,
+                                                    NOT_EQUALS, MORE_THAN, LESS_THAN,
+                                                    NO_MORE_THAN, NO_LESS_THAN])
+__LITERAL_TYPES = frozenset(['int', 'float', 'str', 'bool'])
+
+
+def __is_literal(operand: Any) -> bool:
+    return isinstance(operand, Token) and operand.type in __LITERAL_TYPES
+
+
+def __evaluate(node: Node) -> Optional[Token]:
+    # evaluates Node of literals just as interpreter does, gives None if it raises an error,
+    # so the error is still raised by interpreter at the same line
+    try:
+        if node.operator in LOGICAL_OPERATIONS:
+            return operate_logical(node.left, node.operator, node.right)
+
+        return operate_arithmetical(node.left, node.operator, node.right, node.line_number)
+    except (RuntimeError, ArithmeticError, TypeError, ValueError):
+        return None  # like division by zero or overflow of float
+
+
+def __fold(operand: Any, constants: dict[str, Token], changes: list[int]) -> Any:
+    # gives operand with constants put in place of variables and Nodes of literals folded;
+    # nodes are walked with stack, as they may be deep
+    results: list[Any] = []
+    elements: list[tuple[Any, bool]] = [(operand, False)]
+
+    while elements:
+        element, visited = elements.pop()
+
+        if not isinstance(element, Node):
+            if isinstance(element, Token) and element.type == 'var' and \
+                    element.value in constants:
+                changes[0] += 1
+                element = constants[element.value]  # type: ignore
+            results.append(element)
+            continue
+
+        if not visited:
+            elements += [(element, True), (element.right, False), (element.left, False)]
+            continue
+
+        right, left = results.pop(), results.pop()
+        if right is not element.right or left is not element.left:
+            element = Node(element.operator, element.line_number, right, left)
+
+        if element.operator in __FOLDABLE_OPERATORS and __is_literal(left) and \
+                __is_literal(right):
+            folded = __evaluate(element)
+            if folded is not None:
+                changes[0] += 1
+                element = folded
+
+        results.append(element)
+
+    return results[0]
+
+
+def __fold_line(line: Node, constants: dict[str, Token], changes: list[int]) -> Node:
+    # folds line of body, variable being declared or assigned is kept
+    if line.operator == CREATE:
+        return line
+
+    right = __fold(line.right, constants, changes)
+    left = line.left if line.operator == ASSIGN else __fold(line.left, constants, changes)
+
+    if right is line.right and left is line.left:
+        return line
+
+    return Node(line.operator, line.line_number, right, left)
+
+
+def __fold_body(body: list[Node | Block], constants: dict[str, Token],
+                changes: list[int]) -> list[Node | Block]:
+    # folds lines of nested body, constants are not changed in it
+    new_body: list[Node | Block] = []
+
+    for line in body:
+        if isinstance(line, Block):
+            line = __fold_block(line, constants, changes)
+        elif isinstance(line, Node):
+            line = __fold_line(line, constants, changes)
+        new_body.append(line)
+
+    return new_body
+
+
+def __fold_block(block: Block, constants: dict[str, Token], changes: list[int]) -> Block:
+    condition = block.condition
+    if condition is not None:
+        condition = __fold(condition, constants, changes)
+
+    next_block = block.next_block
+    if next_block is not None:
+        next_block = __fold_block(next_block, constants, changes)
+
+    return Block(block.operator, condition, __fold_body(block.body, constants, changes),
+                 block.line_number, next_block)
+
+
+def __single_assignments(function: Function) -> set[str]:
+    # names of variables declared and assigned once in function, which are not its arguments;
+    # each declaration gives variable its default value, so it is counted as assignment too
+    writes: dict[str, int] = {}
+    elements: list[Any] = list(function.body)
+
+    while elements:
+        element = elements.pop()
+        if isinstance(element, Node):
+            if element.operator in (CREATE, ASSIGN) and isinstance(element.left, Token):
+                writes[element.left.value] = writes.get(element.left.value, 0) + 1  # type: ignore
+            elements += [element.left, element.right]
+        elif isinstance(element, Block):
+            elements += [element.condition, element.next_block, *element.body]
+
+    arguments = {arg.left.value for arg in function.args if isinstance(arg.left, Token)}
+    return {name for name, count in writes.items() if count == 2 and name not in arguments}
+
+
+def __fold_function(function: Function, changes: list[int]) -> Function:
+    # folds body of function; variable, which is declared and then assigned a literal once
+    # (both in body itself, not in nested blocks), is constant in all lines after assignment
+    candidates = __single_assignments(function)
+    declared: set[str] = set()
+    constants: dict[str, Token] = {}
+    body: list[Node | Block] = []
+
+    for line in function.body:
+        if isinstance(line, Block):
+            body.append(__fold_block(line, constants, changes))
+            continue
+
+        if not isinstance(line, Node):
+            body.append(line)
+            continue
+
+        line = __fold_line(line, constants, changes)
+        body.append(line)
+
+        name = line.left.value if isinstance(line.left, Token) else None
+        if line.operator == CREATE:
+            declared.add(name)  # type: ignore
+        elif line.operator == ASSIGN and name in candidates and name in declared and \
+                __is_literal(line.right):
+            constants[name] = line.right  # type: ignore
+
+    if all(new is old for new, old in zip(body, function.body)):
+        return function
+
+    return Function(function.name, function.args, body, function.line_number)
+
+
+def fold_constants(tree: list[Function | Node]) -> tuple[list[Function | Node], int]:
+    """
+    folds Nodes of arithmetical and logical operators with literal operands into literals, and
+    puts literals in place of variables, which are declared and assigned a literal once;
+    Nodes, which evaluation raises an error, are kept, so the error is raised at the same line
+
+    :param tree: logical tree
+    :return: tree with constants folded and number of Nodes folded and variables replaced
+    """
+    changes = [0]
+
+    new_tree = [__fold_function(element, changes)
+                if isinstance(element, Function) and __is_parsed(element) else element
+                for element in tree]
+
+    return new_tree, changes[0]
+
+
+register_pass('fold-constants', fold_constants, level=1)
+
+def __is_taken(condition: Any) -> Optional[bool]:
+    # tells if literal condition (folded by fold-constants) lets into block, None if not literal
+    return condition == TRUE if __is_literal(condition) else None
+
+
+def __terminates(line: Node | Block) -> bool:
+    # lines after 'return' and 'break' (which stops program, as interpreter does not run it)
+    # are never run, as well as lines after 'if' with 'else', which all branches terminate
+    if isinstance(line, Node):
+        return line.operator in (RETURN, BREAK)
+
+    if line.operator == WHILE:
+        return False
+
+    block: Optional[Block] = line
+    while block is not None:
+        if not block.body or not __terminates(block.body[-1]):
+            return False
+        if block.operator == ELSE:
+            return True
+        block = block.next_block
+
+    return False
+
+
+def __prune_chain(block: Block, removed: list[int]) -> list[Node | Block]:
+    # gives lines to be put in place of if/elif/else chain; branches, which are never taken,
+    # are dropped, and the chain is replaced by body of branch, which is always taken first
+    branches: list[tuple[Token, Any, list[Node | Block], int]] = []
+
+    current: Optional[Block] = block
+    while current is not None:
+        taken = True if current.operator == ELSE else __is_taken(current.condition)
+
+        if taken is False:
+            removed[0] += 1 + count_nodes(current.body)
+        else:
+            body = __prune_body(current.body, removed)
+            if taken and not branches:
+                removed[0] += 1 + count_nodes([current.next_block])
+                return body
+            if taken:
+                branches.append((ELSE, None, body, current.line_number))
+                removed[0] += count_nodes([current.next_block])
+                break
+            branches.append((current.operator, current.condition, body, current.line_number))
+
+        current = current.next_block
+
+    if branches and branches[-1][0] == ELSE and not branches[-1][2]:
+        removed[0] += 1  # empty 'else' does nothing
+        branches.pop()
+
+    if not branches:
+        return []
+
+    chain: Optional[Block] = None
+    for index, (operator, condition, body, line_number) in reversed(list(enumerate(branches))):
+        chain = Block(IF if index == 0 else operator, condition, body, line_number, chain)
+
+    return [chain]  # type: ignore
+
+
+def __prune_body(body: list[Node | Block], removed: list[int]) -> list[Node | Block]:
+    # drops lines, which are never run, and blocks, which are never entered
+    new_body: list[Node | Block] = []
+
+    for index, line in enumerate(body):
+        if not isinstance(line, Block):
+            new_body.append(line)
+        elif line.operator != WHILE:
+            new_body += __prune_chain(line, removed)
+        elif __is_taken(line.condition) is False:
+            removed[0] += 1 + count_nodes(line.body)
+        else:
+            loop_body = __prune_body(line.body, removed)
+            if len(loop_body) == len(line.body) and \
+                    all(new is old for new, old in zip(loop_body, line.body)):
+                new_body.append(line)
+            else:
+                new_body.append(Block(WHILE, line.condition, loop_body, line.line_number))
+
+        if new_body and __terminates(new_body[-1]):
+            removed[0] += count_nodes(body[index + 1:])
+            break
+
+    return new_body
+
+
+def __reachable_names(tree: list[Function | Node]) -> Optional[set[str]]:
+    # names of functions, which can be called from 'main', None if it can not be told
+    functions: dict[str, list[Function]] = {}
+    for element in tree:
+        if isinstance(element, Function):
+            functions.setdefault(element.name, []).append(element)
+
+    if 'main' not in functions:
+        return None
+
+    names: set[str] = {'main'}
+    stack: list[str] = ['main']
+    while stack:
+        for function in functions.get(stack.pop(), []):
+            if not __is_parsed(function):
+                return None  # calls in body, which is not parsed yet, are not known
+
+            for name in called_names(function.body):
+                if name not in names:
+                    names.add(name)
+                    stack.append(name)
+
+    return names
+
+
+def __is_reachable(element: Function | Node, names: set[str]) -> bool:
+    # tells if function or library (which is kept if it can not be linked, so the error is
+    # raised while linking program) can be used by 'main'
+    if isinstance(element, Function):
+        return element.name in names
+
+    if not isinstance(element, Node) or element.operator != USE:
+        return True
+
+    library = link_library(element.right.value)
+    return library is None or not names.isdisjoint(library.methods)
+
+
+def eliminate_dead_code(tree: list[Function | Node]) -> tuple[list[Function | Node], int]:
+    """
+    drops lines after 'return' and 'break' and after if/elif/else chains, which branches all
+    end with them; collapses branches with literal conditions (folded by fold-constants) to
+    the one taken, drops 'while' with literal false condition and empty 'else', then drops
+    functions and libraries, which 'main' can never use
+
+    :param tree: logical tree
+    :return: tree without dead code and number of Nodes and Blocks pruned
+    """
+    removed = [0]
+
+    new_tree: list[Function | Node] = []
+    for element in tree:
+        if isinstance(element, Function) and __is_parsed(element):
+            body = __prune_body(element.body, removed)
+            if len(body) != len(element.body) or \
+                    any(new is not old for new, old in zip(body, element.body)):
+                element = Function(element.name, element.args, body, element.line_number)
+        new_tree.append(element)
+
+    names = __reachable_names(new_tree)
+    if names is not None:
+        removed[0] += count_nodes([element for element in new_tree
+                                   if not __is_reachable(element, names)])
+        new_tree = [element for element in new_tree if __is_reachable(element, names)]
+
+    return new_tree, removed[0]
+
+
+register_pass('eliminate-dead-code', eliminate_dead_code, level=2)
+
+# endregion
@@ -12,16 +12,37 @@ text in .min file or use as module 'from parser import parse'
 
 # region Imported modules
 
+import gc
+import threading
+
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from itertools import chain, repeat
 from pprint import pprint
-from typing import Callable, Optional
+from typing import Iterable, Iterator, Optional
 
-from .min_lexer import get_tokens
-from .utils.structures import Token, Node, Function, Block
+from .min_cache import is_cache_enabled, is_cacheable, read_source, load_tree, store_tree
+from .min_lexer import iter_tokens
+from .utils.structures import Token, Node, Function, LazyFunction, Block, TokenStream
 from .utils.commons import TOKEN_TYPES, USE, START, PIPE, CREATE, COMMA, RETURN, BREAK
 from .utils.commons import ASSIGN, PLUS, MINUS, DIVIDE, MODULO, MULTIPLY
 from .utils.commons import LEFT_BRACKET, RIGHT_BRACKET, EQUALS, LESS_THAN, MORE_THAN, NO_LESS_THAN
-from .utils.commons import WHILE, IF, ELSE, END, NO_MORE_THAN
-from .utils.commons import TokenList
+from .utils.commons import IF, ELSE, END, NO_MORE_THAN, NOT_EQUALS
+from .utils.commons import BLOCK_HEADER_TOKENS, BLOCK_KEYWORD_TOKENS, BLOCK_OPENING_TOKENS
+from .utils.commons import TokenList, Source, PARALLEL_MIN_FUNCTIONS, LINE_CACHE_SIZE
+
+# endregion
+
+# region Line cache
+
+# same lines (like 'index = index + 1' or 'return 0') repeat all over programs, so parsed
+# subtree of each distinct line is kept and only stamped with line number of its copy;
+# keys are (type, value) of line's tokens, the least recently used lines are dropped first;
+# lazy functions may be parsed by programs run in several threads, so cache is locked
+__line_cache: OrderedDict[tuple, Optional[Node]] = OrderedDict()
+__line_cache_lock = threading.Lock()
+__line_cache_stats = {'hits': 0, 'misses': 0, 'max_size': LINE_CACHE_SIZE}
 
 # endregion
 
@@ -45,94 +66,6 @@ def __is_valid_type(token: Token) -> bool:
     return token.type == 'typ' and token.value in TOKEN_TYPES
 
 
-def __is_unpackable(tokens_list: TokenList) -> bool:
-    # returns True if there is only one element in tokens list, which is Token itself,
-    # otherwise False
-    return len(tokens_list) == 1 and isinstance(tokens_list[0], Node)
-
-
-def __extract_node(token_list: TokenList) -> Node | TokenList:
-    # unpacks single Token in list
-    match len(token_list):
-        case 0:
-            raise RuntimeError('EMPTY TOKEN LIST GIVEN')
-        case 1:
-            if isinstance(token_list[0], Node):
-                return token_list[0]
-
-            raise RuntimeError('FAILED TO UNPACK TOKEN LIST')
-        case _:
-            return token_list
-
-
-def __extract_token(token_list: TokenList) -> Token:
-    # extracts Token from list, raises an error on fail
-    match len(token_list):
-        case 1:
-            if isinstance(token_list[0], Token):
-                return token_list[0]
-            raise RuntimeError('FAILED TO UNPACK ARRAY OF NON-TOKEN TYPE')
-        case _:
-            raise RuntimeError('FAILED TO EXTRACT SINGLE TOKENS IN FINAL NODES')
-
-def __extract_inlist_tokens_from_node(node: Node) -> Node:
-    # extracts all one-in-list Tokens from Node
-    if isinstance(node.left, Node):
-        node.left = __extract_inlist_tokens_from_node(node.left)
-    elif isinstance(node.left, list):
-        node.left = __extract_token(node.left)
-
-    if isinstance(node.right, Node):
-        node.right = __extract_inlist_tokens_from_node(node.right)
-    elif isinstance(node.right, list):
-        node.right = __extract_token(node.right)
-
-    return node
-
-def __extract_inlist_tokens_from_block(block: Block) -> Block:
-    lines_count = len(block.body)
-    for index in range(lines_count):
-        line = block.body[index]
-
-        if isinstance(line, Node):
-            block.body[index] = __extract_inlist_tokens_from_node(line)
-        elif isinstance(line, Block):
-            block.body[index] = __extract_inlist_tokens_from_block(line)
-
-    if block.next_block:
-        block.next_block = __extract_inlist_tokens_from_block(block.next_block)
-
-    return block
-
-def __extract_inlist_tokens_from_tree(tree: list[Function | Node]) -> list[Function | Node]:
-    # extracts all one-in-list Tokens from tree
-    tree_length = len(tree)
-    for index in range(tree_length):
-        element = tree[index]
-        if isinstance(element, Node):
-            tree[index] = __extract_inlist_tokens_from_node(element)
-        elif isinstance(element, Function):
-            new_body: list[Node | Block] = []
-            for line in element.body:
-                if isinstance(line, Node):
-                    new_body.append(__extract_inlist_tokens_from_node(line))
-                elif isinstance(line, Block):
-                    new_body.append(__extract_inlist_tokens_from_block(line))
-
-            new_args: list[Node] = [__extract_inlist_tokens_from_node(n) for n in element.args]
-
-            name = element.name
-            line_number = element.line_number
-
-            if all(isinstance(node, Node) for node in new_args):
-                tree[index] = Function(name, new_args, new_body, line_number)
-            else:
-                raise TypeError('BLOCK DETECTED IN FUNCTION ARGUMENTS')
-        else:
-            raise TypeError('UNKNOWN ELEMENTS IN PARSED TREE')
-
-    return tree
-
 def __validate_use_syntax(line: TokenList, line_number: int) -> None:
     # raises SYNTAX ERROR if syntax with 'use' keyword is incorrect
     if len(line) == 2:
@@ -165,33 +98,37 @@ def __validate_start_syntax(line: TokenList, line_number: int) -> None:
             raise SyntaxError(f'INVALID SYNTAX AT LINE {line_number}: ' +
                               'NO ARGUMENTS AFTER PIPE OPERATOR')
 
-        tokens_count = len(line)
-        if (tokens_count + 1) % 4 != 0:
-            raise SyntaxError(f'INVALID SYNTAX AT LINE {line_number}: ' +
-                              'INVALID ARGUMENTS STRUCTURE')
-
-        for index in range(tokens_count):
-            token = line[index]
-            if not isinstance(token, Token):
-                raise SyntaxError(f'INVALID SYNTAX AT LINE {line_number}: NO BRACKETS ARE ALLOWED')
-
-            match index % 4:
-                case 0:
-                    if token.type != 'var':
-                        raise SyntaxError(f'INVALID SYNTAX AT LINE {line_number}: ' +
-                                          'ARGUMENTS MUST BE OF TYPE VAR')
-                case 1:
-                    if token != CREATE:
-                        raise SyntaxError(f'INVALID SYNTAX AT LINE {line_number}: ' +
-                                          'MISSING IS OPERATOR')
-                case 2:
-                    if token.type != 'typ':
-                        raise SyntaxError(f'INVALID SYNTAX AT LINE {line_number}: ' +
-                                          'INVALID TYPE')
-                case 3:
-                    if token != COMMA:
-                        raise SyntaxError(f'INVALID SYNTAX AT LINE {line_number}: ' +
-                                          'MISSING COMMA BETWEEN ARGUMENTS')
+        __validate_arguments_syntax(line, line_number)
+
+def __validate_arguments_syntax(line: TokenList, line_number: int) -> None:
+    # raise SYNTAX ERROR if arguments after pipe in 'start' line are not 'name is type, ...'
+    tokens_count = len(line)
+    if (tokens_count + 1) % 4 != 0:
+        raise SyntaxError(f'INVALID SYNTAX AT LINE {line_number}: ' +
+                          'INVALID ARGUMENTS STRUCTURE')
+
+    for index in range(tokens_count):
+        token = line[index]
+        if not isinstance(token, Token):
+            raise SyntaxError(f'INVALID SYNTAX AT LINE {line_number}: NO BRACKETS ARE ALLOWED')
+
+        match index % 4:
+            case 0:
+                if token.type != 'var':
+                    raise SyntaxError(f'INVALID SYNTAX AT LINE {line_number}: ' +
+                                      'ARGUMENTS MUST BE OF TYPE VAR')
+            case 1:
+                if token != CREATE:
+                    raise SyntaxError(f'INVALID SYNTAX AT LINE {line_number}: ' +
+                                      'MISSING IS OPERATOR')
+            case 2:
+                if token.type != 'typ':
+                    raise SyntaxError(f'INVALID SYNTAX AT LINE {line_number}: ' +
+                                      'INVALID TYPE')
+            case 3:
+                if token != COMMA:
+                    raise SyntaxError(f'INVALID SYNTAX AT LINE {line_number}: ' +
+                                      'MISSING COMMA BETWEEN ARGUMENTS')
 
 def __parse_start(line: TokenList, line_number: int) -> tuple[list[Node], str]:
     # parses arguments for function
@@ -208,7 +145,7 @@ def __parse_start(line: TokenList, line_number: int) -> tuple[list[Node], str]:
     if len(line) > 2:
         line = line[3:]
 
-        split: TokenList = []
+        split: list[Token] = []
 
         for token in line:
             # arguments are separated by coma
@@ -249,13 +186,10 @@ def __validate_return_syntax(block: TokenList, line_number: int) -> None:
 
 def __create_return_node(block: TokenList, line_number: int) -> Node:
     # creates Node for function return handling
-    right: Optional[Node | TokenList] = block[1:]
+    right: Optional[Node | Token] = None
 
-    if isinstance(right, list) and len(right) == 0:
-        right = None
-
-    if isinstance(right, list) and len(right) > 1:
-        right = parse_line(right, line_number)
+    if len(block) > 1:
+        right = __parse_tokens(block[1:], line_number)
 
     return Node(RETURN, line_number, right)
 
@@ -270,225 +204,490 @@ def __create_break_node(line_number: int) -> Node:
     return Node(BREAK, line_number)
 
 
-def __has_nesting_raw(line: TokenList) -> bool:
-    # returns True if line has nesting, otherwise False. Is used to nest raw line
-    if LEFT_BRACKET in line or RIGHT_BRACKET in line:
-        return True
+# operators of expressions by binding power, loosest first; operators of one level split
+# expression at the first of them, so they group to the right: 'a - b - c' is 'a - (b - c)'
+__COMPARISON, __ARGUMENTS, __CALL, __SUM, __PRODUCT = range(1, 6)
+__BINDING_POWERS: dict[Token, int] = {
+    **{operator: __COMPARISON for operator in [ASSIGN, EQUALS, NOT_EQUALS, LESS_THAN, MORE_THAN,
+                                               NO_LESS_THAN, NO_MORE_THAN]},
+    COMMA: __ARGUMENTS,
+    PIPE: __CALL,
+    PLUS: __SUM,
+    MINUS: __SUM,
+    MULTIPLY: __PRODUCT,
+    DIVIDE: __PRODUCT,
+    MODULO: __PRODUCT,
+    RIGHT_BRACKET: 0  # closes expression
+}
 
-    return False
 
-def __has_nesting_processed(line: TokenList) -> bool:
-    # returns True if line has nesting, otherwise False. Is used to check
-    # for nesting in already nested line
-    return any(isinstance(token, list | Node) for token in line)
+def __binding_power(line: TokenList, position: int) -> Optional[int]:
+    # returns binding power of operator at position, 0 for closing bracket and end of line,
+    # None for operands
+    if position == len(line):
+        return 0
 
+    token = line[position]
+    return __BINDING_POWERS.get(token)
 
-def __nest(line: TokenList, line_number: int) -> TokenList:
-    # nests given line recursively
 
-    # base case - no nesting
-    if not __has_nesting_raw(line):
-        return line
+def __fold_right(operands: list, operators: TokenList, line_number: int) -> Node | Token:
+    # builds 'a op (b op (c ...))' from operands and operators between them
+    expression = operands[-1]
+    for index in range(len(operators) - 1, -1, -1):
+        expression = Node(operators[index], line_number, expression, operands[index])
 
-    nested_line: TokenList = []
-    nested: int = 0
-    nested_segment: TokenList = []
-    for token in line:
-        if token == LEFT_BRACKET:
-            nested += 1
+    return expression
 
-            if nested == 1:
-                continue
 
-        if token == RIGHT_BRACKET:
-            nested -= 1
+def __parse_operand(line: TokenList, position: int, line_number: int,
+                    in_arguments: bool) -> tuple[Node | Token, int]:
+    # parses single token or expression in brackets
+    if position == len(line):
+        if position == 0:
+            raise SyntaxError(f'INVALID SYNTAX AT LINE {line_number}: MISSING EXPRESSION')
+        raise SyntaxError(f'MISSING OPERAND AFTER {line[position - 1].value} AT LINE {line_number}')
 
-        if not nested == 0:
-            nested_segment.append(token)
+    token = line[position]
+    if token == LEFT_BRACKET:
+        expression, position = __parse_expression(line, position + 1, line_number, in_arguments)
 
-        if nested == 0:
-            if len(nested_segment) == 0:
-                nested_line.append(token)
-            else:
-                nested_segment = __nest(nested_segment, line_number)
-                nested_line.append(nested_segment)
-                nested_segment = []
+        if position == len(line) or line[position] != RIGHT_BRACKET:
+            raise SyntaxError(f'INVALID SYNTAX AT LINE {line_number}: INVALID NESTING')
 
-    if nested != 0:
-        raise SyntaxError(f'INVALID SYNTAX AT LINE {line_number}: INVALID NESTING')
+        return expression, position + 1
 
-    return nested_line
+    if __binding_power(line, position) is not None:
+        raise SyntaxError(f'MISSING OPERAND BEFORE {token.value} AT LINE {line_number}')
+    if token.type == 'kwd':
+        raise SyntaxError(f'INVALID SYNTAX AT LINE {line_number}: UNEXPECTED {token.value}')
 
+    return token, position + 1
 
-def __parse_calls(segment: TokenList, operators: TokenList, line_number: int) -> TokenList:
-    # nests code segment by '|' (function) operator
-    if isinstance(segment, list) and not any(operator in segment for operator in operators):
-        if not __has_nesting_processed(segment):
-            return segment
 
-    operated_segment: TokenList = list(segment)
+def __parse_product(line: TokenList, position: int, line_number: int,
+                    in_arguments: bool) -> tuple[Node | Token, int]:
+    # parses operands joined by '*', '/' and '%'
+    operand, position = __parse_operand(line, position, line_number, in_arguments)
+    operands: list = [operand]
+    operators: list[Token] = []
 
-    tokens_count = len(segment)
-    for index in range(tokens_count):
-        token = segment[index]
+    while __binding_power(line, position) == __PRODUCT:
+        operators.append(line[position])
+        operand, position = __parse_operand(line, position + 1, line_number, in_arguments)
+        operands.append(operand)
 
-        if isinstance(token, Node | list):
-            token = __parse_helper(token, line_number, __parse_calls, [PIPE])
-        elif token in operators:
-            left = __parse_calls(operated_segment[:index], [PIPE], line_number)
+    return __fold_right(operands, operators, line_number), position
 
-            right = __parse_helper(operated_segment[index + 1:], line_number, __parse_by, [COMMA])
-            if not isinstance(right, Token):
-                right = __parse_helper(right, line_number, __parse_calls, [PIPE])
 
-            if not right:
-                operated_segment = [Node(token, line_number, None, left)]
-            else:
-                operated_segment = [Node(token, line_number, right, left)]
+def __parse_sum(line: TokenList, position: int, line_number: int,
+                in_arguments: bool) -> tuple[Node | Token, int]:
+    # parses products joined by '+' and '-'; leading '+' or '-' has 0 as left operand
+    # and takes everything after it, like any other operator of this level
+    operands: list = []
+    operators: list[Token] = []
+
+    while True:
+        if __binding_power(line, position) == __SUM:
+            operands.append(Token('int', 0))
+            operators.append(line[position])
+            right, position = __parse_sum(line, position + 1, line_number, in_arguments)
+            operands.append(right)
+            break
 
+        operand, position = __parse_product(line, position, line_number, in_arguments)
+        operands.append(operand)
+
+        if __binding_power(line, position) != __SUM:
             break
 
-        operated_segment[index] = token
-    return operated_segment
+        operators.append(line[position])
+        position += 1
+
+        if __binding_power(line, position) == 0:
+            raise SyntaxError(f'MISSING OPERAND AFTER {operators[-1].value} AT LINE {line_number}')
 
+    return __fold_right(operands, operators, line_number), position
 
-def __parse_helper(line: Node | TokenList, line_number: int,
-                   method: Callable, operators: TokenList) -> Node | TokenList:
-    # is needed to go through already modified line (partially nested)
-    if isinstance(line, Node):
-        if line.left is not None:
-            line.left = __parse_helper(line.left, line_number, method, operators)
-        if line.right is not None:
-            line.right = __parse_helper(line.right, line_number, method, operators)
-    else:
-        line = method(line, operators, line_number)
 
-    if isinstance(line, list):
-        if __is_unpackable(line):
-            line = __extract_node(line)
+def __parse_calls(line: TokenList, position: int, line_number: int,
+                  in_arguments: bool) -> tuple[Node | Token, int]:
+    # parses sums joined by '|'; outside of arguments right side of the first '|'
+    # is a list of arguments separated by comma, which are parsed as arguments
+    operands: list = []
+    operators: list[Token] = []
 
-    return line
+    while True:
+        operand, position = __parse_sum(line, position, line_number, in_arguments)
+        operands.append(operand)
 
+        if __binding_power(line, position) != __CALL:
+            break
 
-def __parse_by(segment: TokenList, operators: TokenList, line_number: int) -> TokenList:
-    # parse line by given operators
-    if isinstance(segment, list) and not any(operator in segment for operator in operators):
-        if not __has_nesting_processed(segment):
-            return segment
+        operators.append(line[position])
+        position += 1
 
-    operated_segment: TokenList = list(segment)
+        if __binding_power(line, position) in (0, __COMPARISON, __ARGUMENTS):
+            operands.append(None)  # function is called without arguments
+            break
 
-    tokens_count = len(segment)
-    for index in range(tokens_count):
-        token = segment[index]
-
-        if isinstance(token, Node | list):
-            token = __parse_helper(token, line_number, __parse_by, operators)
-        elif token in operators:
-            left = __parse_helper(operated_segment[:index], line_number, __parse_by, operators)
-            if not left:
-                if token in [PLUS, MINUS]:
-                    left = [Token('int', 0)]
-                else:
-                    raise SyntaxError(f'MISSING OPERAND BEFORE {token.value} AT LINE {line_number}')
-
-            right = __parse_helper(operated_segment[index + 1:], line_number, __parse_by, operators)
-            if not right:
-                raise SyntaxError(f'MISSING OPERAND AFTER {token.value} AT LINE {line_number}')
-
-            operated_segment = [Node(token, line_number, right, left)]
+        if not in_arguments:
+            arguments, position = __parse_arguments(line, position, line_number)
+            operands.append(arguments)
+            break
+
+    return __fold_right(operands, operators, line_number), position
+
+
+def __parse_arguments(line: TokenList, position: int,
+                      line_number: int) -> tuple[Node | Token, int]:
+    # parses calls separated by comma
+    operands: list = []
+    operators: list[Token] = []
+
+    while True:
+        if __binding_power(line, position) == __ARGUMENTS:
+            raise SyntaxError(f'MISSING OPERAND BEFORE , AT LINE {line_number}')
+
+        operand, position = __parse_calls(line, position, line_number, True)
+        operands.append(operand)
+
+        if __binding_power(line, position) != __ARGUMENTS:
             break
 
-        operated_segment[index] = token
+        operators.append(line[position])
+        position += 1
+
+    return __fold_right(operands, operators, line_number), position
+
+
+def __parse_expression(line: TokenList, position: int, line_number: int,
+                       in_arguments: bool) -> tuple[Node | Token, int]:
+    # parses expressions joined by comparison operators and '=', which is the loosest level;
+    # in brackets inside of function arguments each of them can be a list of arguments
+    operands: list = []
+    operators: list[Token] = []
+
+    while True:
+        if in_arguments:
+            operand, position = __parse_arguments(line, position, line_number)
+        else:
+            operand, position = __parse_calls(line, position, line_number, False)
+        operands.append(operand)
+
+        if __binding_power(line, position) != __COMPARISON:
+            break
 
-    return operated_segment
+        operators.append(line[position])
+        position += 1
+
+    return __fold_right(operands, operators, line_number), position
+
+
+def __parse_tokens(line: TokenList, line_number: int) -> Node | Token:
+    # parses whole line as one expression in a single pass
+    expression, position = __parse_expression(line, 0, line_number, False)
+
+    if position != len(line):
+        if line[position] == RIGHT_BRACKET:
+            raise SyntaxError(f'INVALID SYNTAX AT LINE {line_number}: INVALID NESTING')
+        raise SyntaxError(f'INVALID SYNTAX AT LINE {line_number}: FAILED TO OPERATE LINE')
+
+    return expression
 
 
 def __create_block_header(line: TokenList, line_number: int) -> tuple[Token, Optional[Node]]:
-    # nest code segment by if/else/while constructions
+    # nest code segment by if/elif/else/while constructions
     operator = line[0]
     if not isinstance(operator, Token):
         raise SyntaxError(f'WRONG BLOCK HEADER AT LINE {line_number}')
-    if operator not in [WHILE, IF, ELSE]:
+    if operator not in BLOCK_HEADER_TOKENS:
         raise SyntaxError(f'WRONG OPERATOR IN BLOCK HEADER AT LINE {line_number}')
 
     condition = parse_line(line[1:], line_number) if operator != ELSE else None
 
-    if condition:
-        condition = __extract_inlist_tokens_from_node(condition)
-
     return operator, condition
 
-def __create_if_else_block(body: list, start: int,
-                           end: int, line_numbers: list[int],
-                           condition: Optional[Node]) -> tuple[Block, int]:
-    else_line_index: Optional[int] = None
-    end_line_index: Optional[int] = None
-    for index in range(start, end):
-        line = body[index]
-        if isinstance(line, list) and ELSE in line:
-            else_line_index = index
-        if isinstance(line, list) and END in line:
-            end_line_index = index
-            break
+def __close_block(branches: list[tuple[Token, Optional[Node], list, int]]) -> Block:
+    # chains branches of block (if, elifs and else or a single while) through next_block
+    block: Optional[Block] = None
+    for operator, condition, body, line_number in reversed(branches):
+        block = Block(operator, condition, body, line_number, block)
+
+    return block  # type: ignore
+
+def __nest_blocks(lines: Iterator[tuple[int, TokenList]]
+                  ) -> tuple[list[Node | Block], int, bool]:
+    # builds function body in one pass, each open block is a list of its branches on stack;
+    # takes lines till closing 'end' of function, returns body, number of the last line taken
+    # and True if function was closed
+    body: list[Node | Block] = []
+    stack: list[list[tuple[Token, Optional[Node], list, int]]] = []
+    line_number = 0
+
+    for line_number, line in lines:
+        current_body = stack[-1][-1][2] if stack else body
+
+        # keywords are rare, so line is scanned once and only they are compared
+        keywords = {token for token in line if token.type == 'kwd'}
+
+        if START in keywords:
+            raise SyntaxError(f'INVALID SYNTAX AT LINE {line_number}:' +
+                              ' CAN NOT ASSIGN FUNCTION IN FUNCTION\'S BODY')
+
+        if BLOCK_KEYWORD_TOKENS.isdisjoint(keywords):
+            processed_line = parse_line(line, line_number)
+            if processed_line is not None:
+                current_body.append(processed_line)
+            continue
+
+        if line[0] == END:
+            if len(line) != 1:
+                raise SyntaxError(f'INVALID SYNTAX AT LINE {line_number}: ' +
+                                  'INVALID KEY AFTER \'end\'')
 
-    else_block = None
-    if else_line_index is not None:
-        else_block = Block(ELSE, None, body[else_line_index + 1:end_line_index],
-                           line_numbers[else_line_index])
+            if not stack:
+                return body, line_number, True
 
-    if end_line_index is None:
-        raise SyntaxError(f'MISSING END TO MATCH EXPRESSION AT LINE {line_numbers[start]}')
+            block = __close_block(stack.pop())
+            (stack[-1][-1][2] if stack else body).append(block)
+            continue
 
-    if else_line_index is None:
-        else_line_index = end_line_index
+        operator, condition = __create_block_header(line, line_number)
 
-    if_block = Block(IF, condition, body[start + 1:else_line_index],
-                     line_numbers[start], else_block)
+        if operator in BLOCK_OPENING_TOKENS:
+            stack.append([(operator, condition, [], line_number)])
+            continue
 
-    return if_block, end_line_index
+        if not stack or stack[-1][0][0] != IF:
+            raise SyntaxError(f'INVALID SYNTAX AT LINE {line_number}: ' +
+                              f'\'{operator.value}\' WITHOUT \'if\'')
+        if stack[-1][-1][0] == ELSE:
+            raise SyntaxError(f'INVALID SYNTAX AT LINE {line_number}: ' +
+                              f'\'{operator.value}\' AFTER \'else\'')
 
-def __nest_blocks(raw_body: list[Node | TokenList], line_numbers: list[int]) -> list[Node | Block]:
-    while True:
-        last_while_if_index = None
-        lines_count = len(raw_body)
+        stack[-1].append((operator, condition, [], line_number))
 
-        for index in range(lines_count - 1, -1, -1):
-            line = raw_body[index]
-            if isinstance(line, list):
-                if IF in line or WHILE in line:
-                    last_while_if_index = index
-                    break
+    if stack:
+        raise SyntaxError(f'MISSING END TO MATCH EXPRESSION AT LINE {stack[-1][0][3]}')
 
-        if last_while_if_index is None:
-            break
+    return body, line_number, False
+
+def __parse_body(block: list[TokenList], line_numbers: list[int]) -> list[Node | Block]:
+    # parses given lines of function body, closing 'end' of function (last line) may be given
+    lines = zip(line_numbers, block)
+    body, end_line_number, closed = __nest_blocks(lines)
+
+    if closed and next(lines, None) is not None:
+        raise SyntaxError(f'INVALID SYNTAX AT LINE {end_line_number}: ' +
+                          '\'end\' DOES NOT MATCH ANY BLOCK')
+
+    return body
+
+def __parse_function_lines(header: TokenList, header_line_number: int,
+                           lines: Iterator[tuple[int, TokenList]]
+                           ) -> tuple[Optional[Function], int]:
+    # parses function, taking lines of its body one by one till its closing 'end', so they
+    # are not kept; returns None as function, if lines ended before 'end'
+    __validate_start_syntax(header, header_line_number)
+    args, name = __parse_start(header, header_line_number)
+
+    first_line = next(lines, None)
+    if first_line is None:
+        return None, header_line_number
 
-        line = raw_body[last_while_if_index]
-        line_number = line_numbers[last_while_if_index]
+    body, last_line_number, closed = __nest_blocks(chain([first_line], lines))
+    if not closed:
+        return None, last_line_number
 
-        operator, condition = __create_block_header(line, line_number)  # type: ignore
-        if operator == IF:
-            if_block, end_line_index = __create_if_else_block(raw_body,
-                                                              last_while_if_index,
-                                                              lines_count, line_numbers,
-                                                              condition)
+    return Function(name, args, body, first_line[0]), last_line_number
 
-            raw_body = raw_body[:last_while_if_index] + raw_body[end_line_index + 1:]
-            line_numbers = line_numbers[:last_while_if_index] + line_numbers[end_line_index + 1:]
-            raw_body.insert(last_while_if_index, if_block)  # type: ignore
+def __iter_elements(lines: Iterable[tuple[int, TokenList]], fused: bool = False
+                    ) -> Iterator[tuple[int, int, Optional[Function | Node | tuple[list, list]]]]:
+    # groups lines into elements of tree: library calls are given as Nodes, functions as
+    # their lines with line numbers (not parsed yet) or, if fused, as Functions parsed right
+    # while lines are taken; unclosed function at the end is given as None
+    lines = iter(lines)
+    nested = 0
+    in_function_body = False
+
+    body: list[TokenList] = []
+    body_line_numbers: list[int] = []
+
+    for line_number, line in lines:
+        if in_function_body:
+            # keywords are rare, so line is scanned once and only they are compared
+            keywords = {token for token in line if token.type == 'kwd'}
+
+            if START in keywords:
+                raise SyntaxError(f'INVALID SYNTAX AT LINE {line_number}:' +
+                                  ' CAN NOT ASSIGN FUNCTION IN FUNCTION\'S BODY')
+
+            if not BLOCK_OPENING_TOKENS.isdisjoint(keywords):
+                nested += 1
+            if END in keywords:
+                nested -= 1
+
+            body.append(line)
+            body_line_numbers.append(line_number)
         else:
-            for index in range(last_while_if_index, lines_count):
-                line = raw_body[index]
-                if isinstance(line, list) and END in line:
-                    block_body = raw_body[last_while_if_index + 1:index]
-                    raw_body = raw_body[:last_while_if_index] + raw_body[index + 1:]
-                    line_numbers = line_numbers[:last_while_if_index] + line_numbers[index + 1:]
+            if USE in line:
+                __validate_use_syntax(line, line_number)
+                yield line_number, line_number, __create_use_node(line, line_number)
+
+            if not BLOCK_KEYWORD_TOKENS.isdisjoint(line):
+                raise SyntaxError(f'INVALID SYNTAX AT LINE {line_number}: ' +
+                                  'CAN NOT USE KEYWORD OUTSIDE OF FUNCTION\'S BODY')
 
-                    block = Block(WHILE, condition, block_body, line_number)
-                    raw_body.insert(last_while_if_index, block)  # type: ignore
-                    break
+            if START in line:
+                if fused:
+                    function, last_line_number = __parse_function_lines(line, line_number, lines)
+                    yield line_number, last_line_number, function
+                    continue
 
-    return raw_body  # type: ignore
+                body = [line]
+                body_line_numbers = [line_number]
+
+                nested += 1
+                in_function_body = True
+
+        if nested == 0 and in_function_body:
+            in_function_body = False
+            yield body_line_numbers[0], line_number, (body, body_line_numbers)
+
+    if in_function_body:
+        yield body_line_numbers[0], body_line_numbers[-1], None
+
+def __find_line(key: tuple, line_number: int) -> tuple[bool, Optional[Node]]:
+    # gives True and copy of kept subtree of line, stamped with line number, if line is kept
+    with __line_cache_lock:
+        if key not in __line_cache:
+            return False, None
+
+        __line_cache.move_to_end(key)
+        __line_cache_stats['hits'] += 1
+        cached_line = __line_cache[key]
+
+    return True, __stamp(cached_line, line_number)  # type: ignore
+
+def __keep_line(key: tuple, processed_line: Optional[Node], line_number: int) -> None:
+    # keeps parsed line, dropping the least recently used one if cache is full; cache keeps
+    # its own copy, so Node returned by parse_line is not shared with it
+    cached_line = __stamp(processed_line, line_number)
+    with __line_cache_lock:
+        __line_cache_stats['misses'] += 1
+        __line_cache[key] = cached_line  # type: ignore
+        if len(__line_cache) > __line_cache_stats['max_size']:
+            __line_cache.popitem(last=False)
+
+def __stamp(element: Optional[Node | Token], line_number: int) -> Optional[Node | Token]:
+    # copies cached subtree with another line number, Tokens are shared; long lines give
+    # deep subtrees, so Nodes are copied children first with stack instead of recursion
+    if not isinstance(element, Node):
+        return element
+
+    copies: dict[int, Node] = {}
+    stack: list[Node] = [element]
+    while stack:
+        node = stack[-1]
+        children = [child for child in (node.right, node.left)
+                    if isinstance(child, Node) and id(child) not in copies]
+        if children:
+            stack += children
+            continue
+
+        stack.pop()
+        copies[id(node)] = Node(node.operator, line_number, copies.get(id(node.right), node.right),
+                                copies.get(id(node.left), node.left))
+
+    return copies[id(element)]
+
+def __parse_new_line(line: TokenList, line_number: int) -> Optional[Node]:
+    # parses line, which was not found in cache
+    if not BLOCK_KEYWORD_TOKENS.isdisjoint(line):
+        return None
+
+    if CREATE in line:
+        __validate_is_syntax(line, line_number)
+        return __create_variable_node(line, line_number)
+    if RETURN in line:
+        __validate_return_syntax(line, line_number)
+        return __create_return_node(line, line_number)
+    if BREAK in line:
+        __validate_break_syntax(line, line_number)
+        return __create_break_node(line_number)
+
+    processed_line = __parse_tokens(line, line_number)
+
+    if isinstance(processed_line, Node):
+        return processed_line
+
+    raise SyntaxError(f'INVALID SYNTAX AT LINE {line_number}: FAILED TO OPERATE LINE')
+
+def __create_function(block: list[TokenList], line_numbers: list[int], lazy: bool) -> Function:
+    # parses lines of function, may run on worker processes
+    function = parse_function(block, line_numbers, lazy)
+
+    if not isinstance(function, Function):
+        raise SyntaxError(f'INVALID SYNTAX AT LINE {line_numbers[-1]}: ' +
+                          'BLOCK IS NOT RECOGNIZED AS FUNCTION')
+
+    return function
+
+def __create_functions(blocks: list[tuple[list, list]], workers: int) \
+        -> tuple[Iterator[Function], Optional[ProcessPoolExecutor]]:
+    # gives functions parsed from blocks in order, and process pool parsing them, if it is used
+    if len(blocks) < PARALLEL_MIN_FUNCTIONS or workers < 2:
+        return (__create_function(block, line_numbers, False)
+                for block, line_numbers in blocks), None
+
+    # trees have no reference cycles, while garbage collector passes, triggered by
+    # every few hundreds of new objects, take most of the time of unpickling them
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=gc.disable)
+    return executor.map(__create_function, *zip(*blocks), repeat(False),
+                        chunksize=max(1, len(blocks) // (workers * 4))), executor
+
+def __iter_tree_parallel(lines: Iterable[tuple[int, TokenList]],
+                         workers: int) -> Iterator[tuple[int, int, Optional[Function | Node]]]:
+    # finds boundaries of all functions first, then parses them on process pool;
+    # programs with few functions are not worth starting processes for
+    elements: list[tuple[int, int, Optional[Function | Node | tuple[list, list]]]] = []
+    boundaries_error: Optional[SyntaxError] = None
+
+    try:
+        for first_line, last_line, element in __iter_elements(lines):
+            if isinstance(element, tuple):
+                block, line_numbers = element
+                element = ([list(line) for line in block], line_numbers)  # views are not sent
+            elements.append((first_line, last_line, element))
+    except SyntaxError as error:
+        # serial parser would raise errors of functions before it first, so it waits for them
+        boundaries_error = error
+
+    blocks = [element for _, _, element in elements if isinstance(element, tuple)]
+    functions, executor = __create_functions(blocks, workers)
+
+    gc_enabled = gc.isenabled()
+    if executor is not None:
+        gc.disable()
+
+    try:
+        for first_line, last_line, element in elements:
+            if isinstance(element, tuple):
+                # results are given in order of submission
+                element = next(functions, None)
+                if element is None:
+                    raise RuntimeError(f'FAILED TO PARSE FUNCTION AT LINE {first_line}')
+
+            yield first_line, last_line, element
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        if gc_enabled:
+            gc.enable()
+
+    if boundaries_error is not None:
+        raise boundaries_error
 
 # endregion
 
@@ -499,6 +698,9 @@ def parse_line(line: TokenList, line_number: int) -> Optional[Node]:
     creates one full converted to nodes line of code
     if method can't parse line, raise a specific error
 
+    lines met before are not parsed again, their kept subtree is copied with given line
+    number (see line_cache_info); so returned Node SHOULD NOT be changed
+
     :param line: array of tokens from one line of code
     :param line_number: number of line given for error handling
     :return:
@@ -506,133 +708,143 @@ def parse_line(line: TokenList, line_number: int) -> Optional[Node]:
     if line is None or line_number < 1:
         return None
 
-    if any(kwd in line for kwd in [WHILE, IF, ELSE, END]):
-        return None
+    if not isinstance(line, list):
+        line = list(line)  # views of TokenStream are taken into list only while being parsed
 
-    line = __nest(line, line_number)
+    if __line_cache_stats['max_size'] == 0:
+        return __parse_new_line(line, line_number)
 
-    if CREATE in line:
-        __validate_is_syntax(line, line_number)
-        return __create_variable_node(line, line_number)
-    if RETURN in line:
-        __validate_return_syntax(line, line_number)
-        return __create_return_node(line, line_number)
-    if BREAK in line:
-        __validate_break_syntax(line, line_number)
-        return __create_break_node(line_number)
+    key = tuple((token.type, token.value) for token in line)
 
-    processed_line = __parse_helper(line, line_number, __parse_by,
-                                    [ASSIGN, EQUALS, LESS_THAN, MORE_THAN,
-                                     NO_LESS_THAN, NO_MORE_THAN])
-    processed_line = __parse_helper(processed_line, line_number, __parse_calls, [PIPE])
-    processed_line = __parse_helper(processed_line, line_number, __parse_by,
-                                    [PLUS, MINUS])
-    processed_line = __parse_helper(processed_line, line_number, __parse_by,
-                                    [MULTIPLY, DIVIDE, MODULO])
+    found, cached_line = __find_line(key, line_number)
+    if found:
+        return cached_line
 
-    if isinstance(processed_line, Node):
-        return processed_line
+    # lines with errors are not kept, the error is raised for each of them
+    processed_line = __parse_new_line(line, line_number)
+    __keep_line(key, processed_line, line_number)
 
-    raise SyntaxError(f'INVALID SYNTAX AT LINE {line_number}: FAILED TO OPERATE LINE')
+    return processed_line
+
+def line_cache_info() -> dict[str, int]:
+    """
+    numbers of lines found and not found in cache of parse_line since it was last cleared
+
+    :return: dictionary with 'hits', 'misses', 'size' (lines kept now) and 'max_size'
+    """
+    return {**__line_cache_stats, 'size': len(__line_cache)}
+
+def clear_line_cache(max_size: int = LINE_CACHE_SIZE) -> None:
+    """
+    drops lines kept by parse_line and resets numbers of hits and misses
+
+    :param max_size: number of distinct lines to be kept from now on, 0 turns cache off
+    """
+    if not isinstance(max_size, int) or max_size < 0:
+        raise TypeError('CACHE SIZE MUST BE NON-NEGATIVE INT')
+
+    with __line_cache_lock:
+        __line_cache.clear()
+        __line_cache_stats.update(hits=0, misses=0, max_size=max_size)
 
-def parse_function(block: list[TokenList], line_numbers: list[int]) -> Function:
+def parse_function(block: list[TokenList], line_numbers: list[int],
+                   lazy: bool = False) -> Function:
     """
     creates a function
 
     :param block: block of code to parse into function(including header)
     :param line_numbers: corresponding line numbers for each line
+    :param lazy: if True, only header is parsed now, and LazyFunction is returned, which
+                 parses body on first access
     """
     __validate_start_syntax(block[0], line_numbers[0])
     args, name = __parse_start(block[0], line_numbers[0])
-    body: list[Node | TokenList] = []
 
     block = block[1:]
     line_numbers = line_numbers[1:]
 
-    for line, line_number in zip(block, line_numbers):
-        if isinstance(line, list):
-            if any(kwd in line for kwd in [IF, ELSE, WHILE, END]):
-                body.append(line)
-                continue
+    if lazy:
+        return LazyFunction(name, args, lambda: __parse_body(block, line_numbers),
+                            line_numbers[0])
+
+    body: list[Node | Block] = __parse_body(block, line_numbers)
+    return Function(name, args, body, line_numbers[0])
 
-        processed_line = parse_line(line, line_number)
-        if processed_line is not None:
-            body.append(processed_line)
 
-    nested_body: list[Node | Block] = __nest_blocks(body, line_numbers)
-    return Function(name, args, nested_body, line_numbers[0])
+def iter_tree(lines: Iterable[tuple[int, TokenList]], lazy: bool = False, workers: int = 0
+              ) -> Iterator[tuple[int, int, Optional[Function | Node]]]:
+    """
+    lazily groups lines of tokens into elements of logical tree (functions and library calls)
+
+    :param lines: pairs of line number and tokens of that line, as iter_tokens gives them
+    :param lazy: if True, functions are given as LazyFunctions, see parse_function
+    :param workers: if more than one, boundaries of all functions are found first, and
+                    functions are parsed on that many processes (if there are enough of them);
+                    output stays exactly the same, is not used with lazy
+    :return: generator of (first line, last line, element) for each element; function which
+             is not closed till the end of source is given as None element
+    """
+    if workers > 1 and not lazy:
+        yield from __iter_tree_parallel(lines, workers)
+        return
+
+    # without lazy, lines of function body are parsed one by one, as lexer gives them
+    for first_line, last_line, element in __iter_elements(lines, fused=not lazy):
+        if isinstance(element, tuple):
+            element = __create_function(*element, lazy)
 
+        yield first_line, last_line, element  # type: ignore
 
-def parse(file_name: str) -> list[Function | Node]:
+
+def parse(file_name: Source | TokenStream, lazy: bool = False,
+          workers: int = 0, cache: bool = True) -> list[Function | Node]:
     """
     creates logical tree from code in .min file
-    :param file_name: path to .min file to be processed
+    :param file_name: path to .min file to be processed (or opened stream, or source code itself,
+                      or TokenStream made by lexer beforehand)
+    :param lazy: if True, only boundaries and headers of functions are parsed now, bodies are
+                 parsed when they are accessed for the first time (see LazyFunction), so syntax
+                 errors in bodies are raised only then
+    :param workers: number of processes for parsing programs with many functions (see iter_tree)
+    :param cache: if True and file_name is path, tree is loaded from '__mincache__' next to file
+                  if the same source was parsed before, or is stored there unless lazy is True
+                  (see min_cache.py)
     :return: logical tree created
     """
     if file_name is None:
         raise FileNotFoundError()
 
-    tree: list[Function | Node] = []
-    tokens, line_numbers = get_tokens(file_name)
-
-    nested = 0
-    in_function_body = False
-
-    body: list[TokenList] = []
-    body_line_numbers: list[int] = []
+    entry_path: Optional[str] = None
+    if cache and is_cache_enabled() and is_cacheable(file_name):  # type: ignore
+        file_name, entry_path = read_source(file_name)
 
-    tokens_count = len(tokens)
-    for index in range(tokens_count):
-        line = tokens[index]
-        line_number = line_numbers[index]
+        cached_tree = load_tree(entry_path)
+        if cached_tree is not None:
+            return cached_tree
 
-        if in_function_body:
-            if START in line:
-                raise SyntaxError(f'INVALID SYNTAX AT LINE {line_number}:' +
-                                  ' CAN NOT ASSIGN FUNCTION IN FUNCTION\'S BODY')
-
-            if IF in line or WHILE in line:
-                nested += 1
-            if END in line:
-                nested -= 1
+    lines = file_name.lines() if isinstance(file_name, TokenStream) else iter_tokens(file_name)
 
-            body.append(line)
-            body_line_numbers.append(line_number)
-        else:
-            if USE in line:
-                __validate_use_syntax(line, line_number)
-                tree.append(__create_use_node(line, line_number))
-
-            if START in line:
-                body = [line]
-                body_line_numbers = [line_number]
-
-                nested += 1
-                in_function_body = True
-
-            if any(kwd in line for kwd in [IF, ELSE, WHILE, END]):
-                raise SyntaxError(f'INVALID SYNTAX AT LINE {line_number}: ' +
-                                  'CAN NOT USE KEYWORD OUTSIDE OF FUNCTION\'S BODY')
-
-        if nested == 0 and in_function_body:
-            in_function_body = False
-
-            function = parse_function(body, body_line_numbers)
+    # lines are consumed as lexer produces them, so whole file is never tokenized at once;
+    # lexer is closed on syntax error too, so file it opened is not left open till collected
+    tree: list[Function | Node] = []
+    with closing(lines):
+        for first_line, _, element in iter_tree(lines, lazy, workers):
+            if element is None:
+                raise SyntaxError(f'MISSING END TO MATCH EXPRESSION AT LINE {first_line}')
 
-            if not isinstance(function, Function):
-                raise SyntaxError(f'INVALID SYNTAX AT LINE {line_number}: ' +
-                                  'BLOCK IS NOT RECOGNIZED AS FUNCTION')
+            tree.append(element)
 
-            tree.append(function)
+    # bodies of lazy functions would have to be parsed for storing, so lazy trees are not stored
+    if entry_path is not None and not lazy:
+        store_tree(entry_path, tree)
 
-    tree = __extract_inlist_tokens_from_tree(tree)
     return tree
 
 
-def print_tree(file_name: str) -> None:
+def print_tree(file_name: Source) -> None:
     """
     outputs logical tree created from code in .min file
-    :param file_name: path to .min file to be processed
+    :param file_name: path to .min file to be processed (or opened stream, or source code itself)
     """
     print("Produced tree:")
 
@@ -0,0 +1,128 @@
+"""
+This module compiles programs and links libraries once in parent process of pre-forked
+workers, so workers share them instead of compiling each on its own
+
+After preload() everything created is moved to permanent generation of garbage collector
+(gc.freeze), so collections in workers do not write to pages of shared objects and these pages
+stay shared after fork; workers only look programs up and run them, which changes neither
+programs nor libraries (every lazy part of them is done in parent)
+
+Objects, which are used by worker, still get their reference counts changed, so pages of
+functions, which are run, become private; worker_memory() tells how much of worker is shared
+
+Use as module 'from min_preload import preload, get_program'
+"""
+
+# region Imported modules
+
+import gc
+import os
+
+from typing import Iterable, Optional
+
+from .min_interpreter import Program, compile as compile_program
+from .min_libraries import MinLibrary, link_library
+from .utils.structures import Node
+from .utils.commons import USE
+
+# endregion
+
+# region Private functions
+
+__programs: dict[str, Program] = {}
+
+
+def __key(file_name: str | os.PathLike) -> str:
+    # programs are looked up by absolute path, so workers may use any path to the same file
+    return os.path.abspath(file_name)
+
+
+def __bind_library(name: str) -> None:
+    # links library and executes it, binding all its functions
+    library = link_library(name)
+    if library is None:
+        raise RuntimeError(f'UNABLE TO READ/FIND LIBRARY {name}')
+
+    if isinstance(library, MinLibrary):
+        for element in library.tree:
+            if isinstance(element, Node) and element.operator == USE:
+                __bind_library(element.right.value)
+        return
+
+    for function in library.methods.values():
+        function[0].bind()  # type: ignore
+
+# endregion
+
+# region Public functions
+
+def preload(programs: Iterable[str | os.PathLike] = (), libraries: Iterable[str] = ()) -> int:
+    """
+    compiles programs (fully, without lazy parsing) and links libraries, then freezes
+    all objects in garbage collector; should be called in parent before workers are forked
+
+    :param programs: paths to .min files
+    :param libraries: names of libraries, which are used by programs that are not preloaded
+    :return: number of programs preloaded so far
+    """
+    for file_name in programs:
+        program = compile_program(file_name, lazy=False)
+        __programs[__key(file_name)] = program
+
+        for element in program.tree:
+            if isinstance(element, Node) and element.operator == USE:
+                __bind_library(element.right.value)
+
+    for name in libraries:
+        __bind_library(name)
+
+    # objects left from compiling are freed before freezing, so they are not kept forever
+    gc.collect()
+    gc.freeze()
+
+    return len(__programs)
+
+
+def get_program(file_name: str | os.PathLike) -> Optional[Program]:
+    """
+    :param file_name: path to .min file
+    :return: preloaded program, or None if file was not preloaded
+    """
+    return __programs.get(__key(file_name))
+
+
+def clear_preload() -> None:
+    """
+    drops preloaded programs and moves frozen objects back to garbage collector
+    """
+    __programs.clear()
+    gc.unfreeze()
+
+
+def worker_memory() -> dict[str, int]:
+    """
+    memory of current process in kB, read from '/proc/self/smaps_rollup' on Linux; elsewhere
+    only peak resident memory is known (if any), given as 'rss'
+
+    :return: dictionary with 'rss', 'shared' (pages shared with other processes)
+             and 'private'
+    """
+    try:
+        with open('/proc/self/smaps_rollup', 'r', encoding='utf-8') as file:
+            fields = {line.split(':')[0]: int(line.split()[1])
+                      for line in file if line.rstrip().endswith(' kB')}
+    except (OSError, ValueError, IndexError):
+        try:
+            import resource  # pylint: disable=import-outside-toplevel
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        except ImportError:
+            rss = 0  # there is no resource module on Windows
+        return {'rss': rss, 'shared': 0, 'private': 0}
+
+    return {
+        'rss': fields.get('Rss', 0),
+        'shared': fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0),
+        'private': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0),
+    }
+
+# endregion
@@ -0,0 +1,348 @@
+"""
+This module keeps tokens and logical tree of source, which is being edited,
+so after an edit only changed lines are lexed again and only functions
+containing them are parsed again
+
+Use as module 'from min_session import CompileSession'
+"""
+
+# region Imported modules
+
+import io
+
+from bisect import bisect_right
+from typing import Any, Iterator, Optional
+
+from .min_lexer import lex_line
+from .min_parser import iter_tree
+from .utils.structures import Token, Node, Block, Function
+from .utils.commons import TokenList, START
+
+# endregion
+
+# region Public classes
+
+class CompileSession:
+    """
+    CompileSession holds source code with its tokens and logical tree, and updates them
+    after edits; the result is always the same as of lexing and parsing source from scratch
+
+    lines are lexed right when they are edited, while parsing is postponed till the tree is
+    needed, so source which is being typed and is not valid yet does not raise errors on edits
+    """
+    def __init__(self, source_code: str):
+        """
+        creates CompileSession, tokenizes source code and marks all of it to be parsed
+
+        :param source_code: source code itself
+        """
+        if not isinstance(source_code, str):
+            raise TypeError('SOURCE CODE MUST BE A STRING')
+
+        self.__interned: dict[tuple[str, str], Token] = {}
+
+        self.__lines: list[str] = []
+        self.__tokens: list[TokenList] = []
+        self.__last_raw: list[str] = []  # last raw token of each line, see lex_line
+
+        # elements of tree as [first line, last line, element, shift of line numbers
+        # which is not applied to element yet]; lines between elements have no tokens
+        # or have tokens, which are ignored outside of function body
+        self.__elements: list[list] = []
+        self.__open_function: Optional[int] = None  # line of 'start' which has no 'end'
+        self.__not_parsed: Optional[tuple[int, int]] = None  # lines to be parsed again
+
+        self.__relexed: int = 0
+        self.__reparsed: int = 0
+
+        self.edit(1, 0, source_code)
+
+    @property
+    def source_code(self) -> str:
+        """
+        source code with all edits applied
+
+        :return: source code
+        """
+        return ''.join(self.__lines)
+
+    @property
+    def lines_count(self) -> int:
+        """
+        :return: number of lines in source code
+        """
+        return len(self.__lines)
+
+    @property
+    def tree(self) -> list[Function | Node]:
+        """
+        logical tree of source code, functions which were not changed since last time
+        are given as they were, if their lines did not move
+
+        raises an error if source code has invalid syntax
+
+        :return: logical tree, the same parse() gives for the source code
+        """
+        if self.__not_parsed is not None:
+            self.__parse()
+
+        if self.__open_function is not None:
+            raise SyntaxError(f'MISSING END TO MATCH EXPRESSION AT LINE {self.__open_function}')
+
+        for element in self.__elements:
+            if element[3] != 0:
+                element[2] = self.__shift(element[2], element[3])
+                element[3] = 0
+
+        return [element[2] for element in self.__elements]
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """
+        numbers of lines lexed and elements of tree parsed since session was created
+
+        :return: dictionary with 'relexed_lines' and 'reparsed_elements'
+        """
+        return {'relexed_lines': self.__relexed, 'reparsed_elements': self.__reparsed}
+
+    def get_tokens(self) -> tuple[list[TokenList], list[int]]:
+        """
+        :return: nested array of tokens and line numbers to each line, the same get_tokens()
+                 from min_lexer.py gives for the source code
+        """
+        tokens: list[TokenList] = []
+        line_numbers: list[int] = []
+
+        for index, line in enumerate(self.__tokens):
+            if line:
+                tokens.append(line)
+                line_numbers.append(index + 1)
+
+        return tokens, line_numbers
+
+    def edit(self, first_line: int, last_line: int, text: str) -> None:
+        """
+        replaces lines from first_line to last_line (both included) with text;
+        to insert text before first_line, last_line must be first_line - 1
+
+        :param first_line: first line to be replaced, lines are counted from 1
+        :param last_line: last line to be replaced
+        :param text: new text of these lines, empty text removes lines
+        """
+        if not isinstance(text, str):
+            raise TypeError('TEXT MUST BE A STRING')
+        if not 1 <= first_line <= len(self.__lines) + 1 or \
+                not first_line - 1 <= last_line <= len(self.__lines):
+            raise IndexError('LINE RANGE OUT OF SOURCE')
+
+        new_lines: list[str] = io.StringIO(text, newline=None).readlines()
+
+        # lines must not be glued together, this changes neither tokens nor line numbers
+        if new_lines and last_line < len(self.__lines) and not new_lines[-1].endswith('\n'):
+            new_lines[-1] += '\n'
+        if new_lines and first_line > 1 and not self.__lines[first_line - 2].endswith('\n'):
+            self.__lines[first_line - 2] += '\n'
+
+        start = first_line - 1  # index of first replaced line
+        end = last_line  # index of first line after replaced ones
+        offset = len(new_lines) - (end - start)
+
+        prev_token: str = self.__last_raw[start - 1] if start > 0 else ''
+        new_tokens: list[TokenList] = []
+        new_last_raw: list[str] = []
+
+        for raw_line in new_lines:
+            line_of_tokens, prev_token = lex_line(raw_line, prev_token, self.__interned)
+            new_tokens.append(line_of_tokens)
+            new_last_raw.append(prev_token)
+
+        # lines after edit are lexed again only while they get another previous token
+        old_prev_token: str = self.__last_raw[end - 1] if end > 0 else ''
+        while end < len(self.__lines) and prev_token != old_prev_token:
+            old_prev_token = self.__last_raw[end]
+
+            line_of_tokens, prev_token = lex_line(self.__lines[end], prev_token, self.__interned)
+            new_lines.append(self.__lines[end])
+            new_tokens.append(line_of_tokens)
+            new_last_raw.append(prev_token)
+
+            end += 1
+
+        self.__relexed += len(new_lines)
+
+        self.__lines[start:end] = new_lines
+        self.__tokens[start:end] = new_tokens
+        self.__last_raw[start:end] = new_last_raw
+
+        # lexed lines and lines around removed ones have to be parsed again
+        self.__mark_not_parsed(first_line, last_line, offset, first_line + len(new_lines) - 1)
+
+    # region Private methods
+
+    def __mark_not_parsed(self, first_line: int, last_line: int, offset: int,
+                          last_changed_line: int) -> None:
+        # moves lines of elements after edit and merges edited lines with lines,
+        # which were not parsed yet; elements touching these lines are dropped
+        def moved(line_number: int, default: int) -> int:
+            if line_number < first_line:
+                return line_number
+            if line_number > last_line:
+                return line_number + offset
+            return default
+
+        first, last = first_line, max(first_line, last_changed_line)
+
+        if self.__not_parsed is not None:
+            first = min(first, moved(self.__not_parsed[0], first_line))
+            last = max(last, moved(self.__not_parsed[1], last_changed_line))
+
+        if self.__open_function is not None:
+            self.__open_function = moved(self.__open_function, first_line)
+            if self.__open_function <= last:
+                # lines after unclosed 'start' are all its body
+                first = min(first, self.__open_function)
+                last = len(self.__lines)
+                self.__open_function = None
+
+        # elements with replaced lines are dropped, others are moved
+        elements: list[list] = []
+        for element in self.__elements:
+            if element[1] >= first_line and element[0] <= last_line:
+                first = min(first, element[0])
+                last = max(last, moved(element[1], last_changed_line))
+                continue
+
+            if element[0] > last_line:
+                element[0] += offset
+                element[1] += offset
+                element[3] += offset
+            elements.append(element)
+
+        # elements touching lines to be parsed (lexed lines may reach next element) are dropped too
+        self.__elements = []
+        for element in elements:
+            if element[1] < first or element[0] > last:
+                self.__elements.append(element)
+            else:
+                first = min(first, element[0])
+                last = max(last, element[1])
+        self.__not_parsed = (first, min(last, max(len(self.__lines), 1)))
+
+    def __parse(self) -> None:
+        # parses lines, which were not parsed yet, and lines after them till
+        # both old and new trees agree that next line is not in function body
+        first, last = self.__not_parsed  # type: ignore
+
+        before_count = bisect_right([element[1] for element in self.__elements], first)
+        after = self.__elements[before_count:]
+        after_firsts = [element[0] for element in after]
+
+        synced_at: Optional[int] = None
+        state = {'in_function_body': False}
+
+        def lines() -> Iterator[tuple[int, TokenList]]:
+            nonlocal synced_at
+
+            for index in range(first - 1, len(self.__tokens)):
+                line_number = index + 1
+                line = self.__tokens[index]
+
+                if not line:
+                    continue
+
+                if line_number > last and not state['in_function_body'] and \
+                        self.__is_outside_elements(line_number, after, after_firsts):
+                    synced_at = line_number
+                    return
+
+                if START in line and not state['in_function_body']:
+                    state['in_function_body'] = True
+
+                yield line_number, line
+
+        new_elements: list[list] = []
+        open_function: Optional[int] = None
+
+        for element_first, element_last, element in iter_tree(lines()):
+            if element is None:
+                open_function = element_first
+                continue
+
+            state['in_function_body'] = False
+            new_elements.append([element_first, element_last, element, 0])
+
+        self.__reparsed += len(new_elements)
+
+        if synced_at is None:
+            after = []
+            self.__open_function = open_function
+        else:
+            after = after[bisect_right(after_firsts, synced_at - 1):]
+
+        self.__elements = self.__elements[:before_count] + new_elements + after
+        self.__not_parsed = None
+
+    def __is_outside_elements(self, line_number: int, elements: list[list],
+                              firsts: list[int]) -> bool:
+        # returns True if line was not inside of function body before the edit
+        if self.__open_function is not None and line_number > self.__open_function:
+            return False
+
+        index = bisect_right(firsts, line_number - 1) - 1
+        return index < 0 or elements[index][1] < line_number
+
+    @staticmethod
+    def __children(element) -> list:
+        # nested elements, which have line numbers to be shifted
+        if isinstance(element, Node):
+            children = [element.right, element.left]
+        elif isinstance(element, Block):
+            children = [element.condition, *element.body, element.next_block]
+        elif isinstance(element, Function):
+            children = [*element.args, *element.body]
+        else:
+            children = []
+
+        return [child for child in children if isinstance(child, Node | Block | Function)]
+
+    @staticmethod
+    def __shift(element, offset: int):
+        # creates copy of element (with all nested ones) with line numbers moved by offset;
+        # long lines give deep subtrees, so elements are copied children first with stack
+        # instead of recursion
+        if not isinstance(element, Node | Block | Function):
+            return element  # Tokens and None have no line numbers
+
+        copies: dict[int, Any] = {}
+        stack: list[Node | Block | Function] = [element]
+        while stack:
+            current = stack[-1]
+            children = [child for child in CompileSession.__children(current)
+                        if id(child) not in copies]
+            if children:
+                stack += children
+                continue
+
+            stack.pop()
+            copy = copies.get  # children which are not copied (Tokens) are shared
+            if isinstance(current, Node):
+                copies[id(current)] = Node(current.operator, current.line_number + offset,
+                                           copy(id(current.right), current.right),
+                                           copy(id(current.left), current.left))
+            elif isinstance(current, Block):
+                copies[id(current)] = Block(current.operator,
+                                            copy(id(current.condition), current.condition),
+                                            [copy(id(line), line) for line in current.body],
+                                            current.line_number + offset,
+                                            copy(id(current.next_block), current.next_block))
+            else:
+                copies[id(current)] = Function(current.name,
+                                               [copy(id(arg), arg) for arg in current.args],
+                                               [copy(id(line), line) for line in current.body],
+                                               current.line_number + offset)
+
+        return copies[id(element)]
+
+    # endregion
+
+# endregion
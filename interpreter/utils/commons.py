@@ -2,66 +2,130 @@
 This module contains constants and declared types used in interpreter 
 """
 
-from typing import Callable, Optional
+import copyreg
+import os
+
+from typing import Callable, Optional, Sequence, TextIO
 
 from .structures import Token, Node, Function
 
-KEYWORDS = ['start', 'end', 'use', 'return', 'break',
-            'while', 'if', 'else', 'elif']
-OPERATORS = ['+', '-', '*', '/', '%', '(', ')', 'is', 'and',
-             'or', 'not', '>', '<', '<=', '>=', '==', '!=', '|', '=']
-BOOLEANS = ['true', 'false']
+# lexical grammar of MINIMUM, lexer builds its scanner and lookups from this table
+# each row is (token type, fixed lexemes of this type OR regular expression for them);
+# rows are tried in order, names which match no row become 'fnc', 'lib' or 'var'
+LEXICAL_GRAMMAR: list[tuple[str, list[str] | str]] = [
+    ('kwd', ['start', 'end', 'use', 'return', 'break', 'while', 'if', 'else', 'elif']),
+    ('opr', ['+', '-', '*', '/', '%', '(', ')', 'is', 'and', 'or', 'not',
+             '>', '<', '<=', '>=', '==', '!=', '|', '=']),
+    ('sep', [',']),
+    ('typ', ['int', 'float', 'str', 'bool']),
+    ('bool', ['true', 'false']),
+    ('int', r'-?[0-9]+'),
+    ('float', r'-?[0-9]+\.[0-9]+'),
+    ('str', r'".*"'),
+]
+
+PARALLEL_MIN_FUNCTIONS = 500  # programs with fewer functions are parsed without processes
+LINE_CACHE_SIZE = 4096  # distinct lines, which parsed subtrees are kept by parse_line
+CACHE_DIRECTORY = '__mincache__'  # parsed trees are stored in it next to .min files
+MAX_OPTIMIZATION_LEVEL = 2  # -O2, see min_optimizer.py
+LIBRARIES_DIRECTORY = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, 'libraries')
+
+# symbols which separate tokens without being tokens themselves
+WHITESPACES = [' ']
+
+FIXED_LEXEMES: dict[str, str] = {lexeme: type_ for type_, lexemes in LEXICAL_GRAMMAR
+                                 if isinstance(lexemes, list) for lexeme in lexemes}
+LITERAL_PATTERNS: dict[str, str] = {type_: pattern for type_, pattern in LEXICAL_GRAMMAR
+                                    if isinstance(pattern, str)}
+
+KEYWORDS = [lexeme for lexeme, type_ in FIXED_LEXEMES.items() if type_ == 'kwd']
+OPERATORS = [lexeme for lexeme, type_ in FIXED_LEXEMES.items() if type_ == 'opr']
+BOOLEANS = [lexeme for lexeme, type_ in FIXED_LEXEMES.items() if type_ == 'bool']
 NUMERALS = ['0', '1', '2', '3', '4', '5', '6', '7', '8', '9']
-INNER_TYPES = ['int', 'float', 'str', 'bool']
+INNER_TYPES = [lexeme for lexeme, type_ in FIXED_LEXEMES.items() if type_ == 'typ']
 TOKEN_TYPES = ['kwd', 'int', 'float', 'str', 'bool', 'opr', 'fnc',
                'var', 'sep', 'lib', 'typ']
 
-SPECIAL_SYMBOLS = ['=', '|', ' ', '+', '-', '/', '*', '%', '(', ')', '>', '<', ',', '!']
-
-PIPE = Token('opr', '|')
-CREATE = Token('opr', 'is')
-ASSIGN = Token('opr', '=')
-PLUS = Token('opr', '+')
-MINUS = Token('opr', '-')
-MULTIPLY = Token('opr', '*')
-DIVIDE = Token('opr', '/')
-MODULO = Token('opr', '%')
-MORE_THAN = Token('opr', '>')
-LESS_THAN = Token('opr', '<')
-NO_LESS_THAN = Token('opr', '>=')
-NO_MORE_THAN = Token('opr', '<=')
-EQUALS = Token('opr', '==')
-NOT_EQUALS = Token('opr', '!=')
-
-USE = Token('kwd', 'use')
-RETURN = Token('kwd', 'return')
-BREAK = Token('kwd', 'break')
-IF = Token('kwd', 'if')
-ELSE = Token('kwd', 'else')
-WHILE = Token('kwd', 'while')
-START = Token('kwd', 'start')
-END = Token('kwd', 'end')
-
-LEFT_BRACKET = Token('opr', '(')
-RIGHT_BRACKET = Token('opr', ')')
-
-COMMA = Token('sep', ',')
-
-INT = Token('typ', 'int')
-FLOAT = Token('typ', 'float')
-BOOL = Token('typ', 'bool')
-STR = Token('typ', 'str')
-
-TRUE = Token('bool', True)
-FALSE = Token('bool', False)
-
-TokenList = list[Token | Node | list]
-
-OPERATOR_TOKENS: TokenList = [PIPE, CREATE, ASSIGN, PLUS, MINUS, MULTIPLY, DIVIDE,
-                              MODULO, MORE_THAN, LESS_THAN, EQUALS]
-KEYWORD_TOKENS: TokenList = [RETURN, BREAK, IF, ELSE, WHILE, START, END]
+# lexemes made of punctuation are split off from neighbours even without spaces
+SYMBOLIC_LEXEMES = [lexeme for lexeme in FIXED_LEXEMES if not lexeme.isalnum()]
+SPECIAL_SYMBOLS = sorted({lexeme[0] for lexeme in SYMBOLIC_LEXEMES} | set(WHITESPACES))
+
+# canonical (flyweight) token for every fixed lexeme, lexer returns these very objects,
+# so same lexeme anywhere in program is one shared Token
+FIXED_TOKENS: dict[str, Token] = {
+    lexeme: Token(type_, lexeme == 'true' if type_ == 'bool' else lexeme)
+    for lexeme, type_ in FIXED_LEXEMES.items()
+}
+
+# Tokens are pickled (e.g. sent between worker processes) by type and value, and unpickled
+# tokens of fixed lexemes are the very same shared objects again
+SHARED_TOKENS: dict[tuple[str, int | float | str | bool], Token] = {
+    (token.type, token.value): token for token in FIXED_TOKENS.values()
+}
+copyreg.pickle(Token, lambda token: (shared_token, (token.type, token.value)))
+
+
+def shared_token(type_: str, value: int | float | str | bool) -> Token:
+    """
+    :param type_: type of token
+    :param value: value of token
+    :return: shared Token of fixed lexeme if there is such, otherwise new Token
+    """
+    return SHARED_TOKENS.get((type_, value)) or Token(type_, value)
+
+
+PIPE = FIXED_TOKENS['|']
+CREATE = FIXED_TOKENS['is']
+ASSIGN = FIXED_TOKENS['=']
+PLUS = FIXED_TOKENS['+']
+MINUS = FIXED_TOKENS['-']
+MULTIPLY = FIXED_TOKENS['*']
+DIVIDE = FIXED_TOKENS['/']
+MODULO = FIXED_TOKENS['%']
+MORE_THAN = FIXED_TOKENS['>']
+LESS_THAN = FIXED_TOKENS['<']
+NO_LESS_THAN = FIXED_TOKENS['>=']
+NO_MORE_THAN = FIXED_TOKENS['<=']
+EQUALS = FIXED_TOKENS['==']
+NOT_EQUALS = FIXED_TOKENS['!=']
+
+USE = FIXED_TOKENS['use']
+RETURN = FIXED_TOKENS['return']
+BREAK = FIXED_TOKENS['break']
+IF = FIXED_TOKENS['if']
+ELIF = FIXED_TOKENS['elif']
+ELSE = FIXED_TOKENS['else']
+WHILE = FIXED_TOKENS['while']
+START = FIXED_TOKENS['start']
+END = FIXED_TOKENS['end']
+
+LEFT_BRACKET = FIXED_TOKENS['(']
+RIGHT_BRACKET = FIXED_TOKENS[')']
+
+COMMA = FIXED_TOKENS[',']
+
+INT = FIXED_TOKENS['int']
+FLOAT = FIXED_TOKENS['float']
+BOOL = FIXED_TOKENS['bool']
+STR = FIXED_TOKENS['str']
+
+TRUE = FIXED_TOKENS['true']
+FALSE = FIXED_TOKENS['false']
+
+TokenList = Sequence[Token]
+Source = str | os.PathLike | TextIO
+
+# Tokens are hashable, so groups of them are sets to be tested for membership at once
+OPERATOR_TOKENS: frozenset[Token] = frozenset([PIPE, CREATE, ASSIGN, PLUS, MINUS, MULTIPLY, DIVIDE,
+                                               MODULO, MORE_THAN, LESS_THAN, EQUALS])
+KEYWORD_TOKENS: frozenset[Token] = frozenset([RETURN, BREAK, IF, ELIF, ELSE, WHILE, START, END])
+BLOCK_HEADER_TOKENS: frozenset[Token] = frozenset([IF, ELIF, ELSE, WHILE])
+BLOCK_OPENING_TOKENS: frozenset[Token] = frozenset([IF, WHILE])  # others continue 'if'
+BLOCK_KEYWORD_TOKENS: frozenset[Token] = BLOCK_HEADER_TOKENS | {END}
 
 PyFunction = list[Callable | list[str]]
 CallablesList = dict[str, PyFunction | Function]
 VariablesList = dict[int, dict]
 ExecutionResult = tuple[Optional[Token], bool]
+LineContext = tuple[int, int, VariablesList, CallablesList]  # line number, nesting level, ...
+OptimizationPass = Callable[[list[Function | Node]], tuple[list[Function | Node], int]]
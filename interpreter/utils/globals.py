@@ -1,12 +1,92 @@
+import io
+import sys
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional, TextIO
+
 # If on, interpreter will send signal if waiting for user input, so web app can act properly
 # See: https://github.com/KalenskyyAlex/omni-com
 def enable_API_mode():
-    with open("config", "w") as f:
+    with open("config", "w", encoding="utf-8") as f:
         f.write("API_MODE")
 
 def is_API_mode_enabled():
-    with open("config", "r") as f:
+    with open("config", "r", encoding="utf-8") as f:
         if "API_MODE" in f.read():
             return True
         else:
-            return False
\ No newline at end of file
+            return False
+
+# Streams of program being run, libraries read and write through them; they are set for
+# current thread (context) only, so programs run in several threads do not mix their i/o
+__input_stream: ContextVar[Optional[TextIO]] = ContextVar('input_stream', default=None)
+__output_stream: ContextVar[Optional[TextIO | io.TextIOBase]] = \
+    ContextVar('output_stream', default=None)
+
+@contextmanager
+def redirect_streams(stdin: Optional[str | TextIO] = None,
+                     stdout: Optional[TextIO | io.TextIOBase] = None) -> Iterator[None]:
+    """
+    sets streams of program in current thread (context) for time of 'with' block
+
+    :param stdin: input of program, string is read as its whole input; None keeps sys.stdin
+    :param stdout: output of program; None keeps sys.stdout
+    """
+    input_token = __input_stream.set(io.StringIO(stdin) if isinstance(stdin, str) else stdin)
+    output_token = __output_stream.set(stdout)
+    try:
+        yield
+    finally:
+        __input_stream.reset(input_token)
+        __output_stream.reset(output_token)
+
+def read_line() -> str:
+    """
+    reads line from input of program, raises EOFError at its end
+
+    :return: line without line break
+    """
+    stream = __input_stream.get()
+    if stream is None:
+        return input()
+
+    line = stream.readline()
+    if not line:
+        raise EOFError('EOF WHEN READING A LINE')
+
+    return line[:-1] if line.endswith('\n') else line
+
+def write(text: str) -> None:
+    """
+    writes text to output of program
+
+    :param text: text to be written, as it is
+    """
+    stream = __output_stream.get()
+    (sys.stdout if stream is None else stream).write(text)
+
+class TeeStream(io.TextIOBase):
+    """
+    TeeStream is output stream, which writes the same text to all of given streams
+    """
+    def __init__(self, *streams: TextIO):
+        """
+        creates TeeStream
+
+        :param streams: streams to be written to, in order
+        """
+        super().__init__()
+        self.__streams = streams
+
+    def write(self, text: str) -> int:
+        """
+        writes text to each of streams
+
+        :param text: text to be written
+        :return: number of characters written
+        """
+        for stream in self.__streams:
+            stream.write(text)
+
+        return len(text)
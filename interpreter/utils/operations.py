@@ -0,0 +1,86 @@
+"""
+This module implements operations on values and walks over logical trees, which are shared by
+interpreter and optimizer, so none of them has to import the other one
+"""
+
+from operator import add, sub, mul, truediv, mod, eq, gt, lt, le, ge, ne
+from typing import Any, Callable
+
+from .structures import Token, Node, Block
+from .commons import PLUS, MINUS, MULTIPLY, DIVIDE, MODULO, EQUALS, NOT_EQUALS, MORE_THAN
+from .commons import LESS_THAN, NO_MORE_THAN, NO_LESS_THAN, PIPE, TRUE, FALSE
+
+# operations of arithmetical and logical operators
+ARITHMETICAL_OPERATIONS: dict[Token, Callable[[Any, Any], Any]] = {
+    PLUS: add, MINUS: sub, MULTIPLY: mul, DIVIDE: truediv, MODULO: mod
+}
+LOGICAL_OPERATIONS: dict[Token, Callable[[Any, Any], bool]] = {
+    EQUALS: eq, MORE_THAN: gt, LESS_THAN: lt, NO_MORE_THAN: le, NO_LESS_THAN: ge, NOT_EQUALS: ne
+}
+
+
+def operate_arithmetical(left: Token, operator: Token, right: Token, line_number: int) -> Token:
+    """
+    raises a runtime error if operator is unknown or types of operands don't match
+
+    :param left: left operand, literal
+    :param operator: arithmetical operator
+    :param right: right operand, literal
+    :param line_number: number of line for error handling
+    :return: result of operation
+    """
+    if not isinstance(left.value, (int, float)) or not isinstance(right.value, (int, float)):
+        raise RuntimeError(f'UNABLE TO RECOGNIZE TYPE OF VARIABLES AT LINE {line_number}')
+
+    if left.type not in 'int float' or right.type not in 'int float':
+        raise RuntimeError(f'COMPILATION ERROR AT LINE {line_number}: OPERANDS SUPPOSED TO '
+                           f'BE OF TYPE int OR float, GOT {left.type} AND {right.type}')
+
+    operation = ARITHMETICAL_OPERATIONS.get(operator)
+    if operation is None:
+        raise RuntimeError(f'UNKNOWN IDENTIFIER ERROR AT LINE {line_number}')
+    if operator == DIVIDE and right.value == 0:
+        raise RuntimeError(f'ZERO-DIVISION ERROR AT LINE {line_number}')
+
+    result: float | int = operation(left.value, right.value)
+
+    new_type = 'int' if int(result) == result else 'float'
+    return Token(new_type, result)
+
+
+def operate_logical(left: Token, operator: Token, right: Token) -> Token:
+    """
+    raises an error if operands can not be compared
+
+    :param left: left operand, literal
+    :param operator: logical operator
+    :param right: right operand, literal
+    :return: TRUE or FALSE
+    """
+    try:
+        result: bool = LOGICAL_OPERATIONS[operator](left.value, right.value)
+    except TypeError as error:
+        raise TypeError(f'{left.type} AND {right.type} CAN NOT BE COMPARED') from error
+
+    return TRUE if result else FALSE
+
+
+def called_names(body: list[Node | Block]) -> list[str]:
+    """
+    :param body: body of function
+    :return: names of functions called in body, with repeats
+    """
+    names: list[str] = []
+    elements: list[Any] = list(body)
+
+    # nodes are walked with stack, as they may be deep
+    while elements:
+        element = elements.pop()
+        if isinstance(element, Node):
+            if element.operator == PIPE and isinstance(element.left, Token):
+                names.append(element.left.value)  # type: ignore
+            elements += [element.left, element.right]
+        elif isinstance(element, Block):
+            elements += [element.condition, element.next_block, *element.body]
+
+    return names
@@ -4,18 +4,53 @@ This module implements structures used in whole interpreter, like Tokens, Nodes
 It is made, to provide error-handling just on site (inside of constructors), like type-checking;
 implementation of private fields with only public getters. The whole idea is to make sure objects
 keep being unchanged since creation
+
+Nodes, Blocks and Functions are created in large numbers, so they keep plain fields in slots and
+their constructors check arguments only in debug mode (see set_debug_mode)
 """
 
-from typing import Optional, Any
+import os
+
+from array import array
+from collections.abc import Sequence
+from typing import Optional, Any, Callable, Generator, Iterator, overload
+
 TOKEN_TYPES = ['kwd', 'int', 'float', 'str', 'bool', 'opr', 'fnc',
                'var', 'sep', 'lib', 'typ']
+TOKEN_TYPE_CODES = {type_: code for code, type_ in enumerate(TOKEN_TYPES)}
+
+# constructors of Node, Block and Function check their arguments only in debug mode (tests
+# run in it), it is on if environment variable MIN_DEBUG is set to anything but '0';
+# single underscore, as double one would be mangled inside of classes
+_debug_mode: bool = os.environ.get('MIN_DEBUG', '0') != '0'
+
+
+def set_debug_mode(enabled: bool) -> None:
+    """
+    turns checking of arguments in constructors of Node, Block and Function on or off
+
+    :param enabled: True to check arguments
+    """
+    global _debug_mode  # pylint: disable=global-statement
+    _debug_mode = bool(enabled)
+
+
+def is_debug_mode() -> bool:
+    """
+    :return: True if constructors of Node, Block and Function check their arguments
+    """
+    return _debug_mode
+
 
 class Token:
     """
     contains all info needed about code token (basically, it's type and value)
 
-    once Token is created, it SHOULD NOT be changed for purpose of avoiding malfunctioning
+    Token is immutable (fields are read-only and no others can be added) and hashable, so
+    Tokens can be keys of dispatch tables and members of sets
     """
+    __slots__ = ('__type', '__value')
+
     def __init__(self, __type: Optional[str], __value: Optional[int | float | str | bool]):
         """
         creates Token instance
@@ -64,18 +99,38 @@ class Token:
         return self.__str__()
 
     def __eq__(self, other: object):
+        # shared (flyweight) tokens are compared by identity first
+        if self is other:
+            return True
+
         if not isinstance(other, Token):
             return False
 
         return self.__type == other.type and self.__value == other.value
 
+    def __hash__(self) -> int:
+        # equal Tokens have equal types and values, so they get equal hashes
+        return hash((self.__type, self.__value))
+
+    def __copy__(self) -> 'Token':
+        # Token never changes, so it can be shared instead of copied
+        return self
+
+    def __deepcopy__(self, memo: dict) -> 'Token':
+        return self
+
 
 class Node:
     """
     Nodes are needed to form logical tree in min_parser.py
 
+    Nodes are created by parser for every operation and by interpreter while running, so they
+    keep fields in slots without __dict__; arguments are checked only in debug mode
+
     once created, Node SHOULD NOT be changed for purpose of avoiding malfunctioning
     """
+    __slots__ = ('operator', 'line_number', 'right', 'left')
+
     def __init__(self, __operator: Optional[Token], __line_number: Optional[int],
                  right: Any = None, left: Any = None):
         """
@@ -86,47 +141,28 @@ class Node:
         :param __operator: operator of node -- Token ONLY
         :param __line_number: line number
         """
-
+        if _debug_mode:
+            if __operator is None:
+                raise TypeError('NODE\'S OPERATOR CANNOT BE NONE')
+            if not isinstance(__operator, Token):
+                raise TypeError('NODE\'S OPERATOR MUST BE OF TYPE TOKEN ONLY')
+
+            if __line_number is None:
+                raise TypeError('NODE\'S LINE NUMBER CANNOT BE NONE')
+            if not isinstance(__line_number, int):
+                raise TypeError('NODE\'S LINE NUMBER MUST BE INT')
+            if __line_number <= 0:
+                raise TypeError('NODE\'S LINE NUMBER MUST BE GREATER THAN ZERO')
+
+        self.operator: Token = __operator  # type: ignore
+        self.line_number: int = __line_number  # type: ignore
         self.right = right
         self.left = left
 
-        if __operator is None:
-            raise TypeError('NODE\'S OPERATOR CANNOT BE NONE')
-        if not isinstance(__operator, Token):
-            raise TypeError('NODE\'S OPERATOR MUST BE OF TYPE TOKEN ONLY')
-
-        if __line_number is None:
-            raise TypeError('NODE\'S LINE NUMBER CANNOT BE NONE')
-        if not isinstance(__line_number, int):
-            raise TypeError('NODE\'S LINE NUMBER MUST BE INT')
-        if __line_number <= 0:
-            raise TypeError('NODE\'S LINE NUMBER MUST BE GREATER THAN ZERO')
-
-        self.__line_number = __line_number
-        self.__operator = __operator
-
-    @property
-    def operator(self) -> Token:
-        """
-        Node's operator should only be accessed via this method
-
-        :return: operator of Node (token)
-        """
-        return self.__operator
-
-    @property
-    def line_number(self) -> int:
-        """
-        line number of Node should only be accessed via this method
-
-        :return: line number of Node
-        """
-        return self.__line_number
-
     def __str__(self) -> str:
-        return {'line': self.__line_number,
+        return {'line': self.line_number,
                 'left': self.left,
-                'operator': self.__operator.value,
+                'operator': self.operator.value,
                 'right': self.right}.__repr__()
 
     def __repr__(self) -> str:
@@ -136,213 +172,361 @@ class Node:
         if not isinstance(other, Node):
             return False
 
-        return self.__line_number == other.line_number and \
+        return self.line_number == other.line_number and \
             self.left == other.left and \
             self.right == other.right and \
-            self.__operator == other.operator
+            self.operator == other.operator
 
 
 class Block:
     """
     Blocks contains other blocks and nodes and are used to form nested conditional code
-    like if/else blocks, while blocks and so on
+    like if/else blocks, while blocks and so on; fields are kept in slots, arguments
+    are checked only in debug mode
 
     once created, Block SHOULD NOT be changed for purpose of avoiding malfunctioning
     """
-    def __init__(self, __operator: Optional[Token], __condition: Optional[Node],
+    __slots__ = ('operator', 'condition', 'body', 'line_number', 'next_block')
+
+    def __init__(self, __operator: Optional[Token], __condition: Optional[Node | Token],
                  __body: Optional[list[Any]], __line_number: int,
                  next_block: Optional[Any] = None):
         """
         creates a Block of Nodes
 
         :param __operator: operator of block -- Token ONLY
-        :param __condition: condition to step in block Node ONLY
+        :param __condition: condition to step in block, Node (or literal Token, if it was
+                            folded by optimizer) ONLY
         :param __line_number: line number
         :param next_block: next block to check if condition is False (optional)
         """
-        if __operator is None:
-            raise TypeError('BLOCK\'S OPERATOR NOT SPECIFIED')
-        if not isinstance(__operator, Token):
-            raise TypeError('BLOCK\'S OPERATOR CAN BE TOKEN ONLY')
-
-        self.__operator = __operator
+        if _debug_mode:
+            if __operator is None:
+                raise TypeError('BLOCK\'S OPERATOR NOT SPECIFIED')
+            if not isinstance(__operator, Token):
+                raise TypeError('BLOCK\'S OPERATOR CAN BE TOKEN ONLY')
+
+            if not isinstance(__condition, Node | Token | type(None)) or \
+                    isinstance(__condition, Token) and \
+                    __condition.type not in ('int', 'float', 'str', 'bool'):
+                raise TypeError('BLOCK\'S CONDITION CAN BE NODE, LITERAL OR NONE ONLY')
+
+            if __body is None:
+                raise TypeError('BLOCK\'S BODY CANNOT BE NONE (BUT CAN BE AN EMPTY LIST)')
+            if not isinstance(__body, list):
+                raise TypeError('BLOCK\'S BODY MUST BE A LIST')
+
+            if __line_number is None:
+                raise TypeError('FUNCTIONS\'S LINE NUMBER CANNOT BE NONE')
+            if not isinstance(__line_number, int):
+                raise TypeError('NODE\'S LINE NUMBER MUST BE INT')
+            if __line_number <= 0:
+                raise TypeError('FUNCTIONS\'S LINE NUMBER CANNOT BE LOWER THAN ONE')
+
+        self.operator: Token = __operator  # type: ignore
+        self.condition: Optional[Node | Token] = __condition
+        self.body: list = __body  # type: ignore
+        self.line_number: int = __line_number
+        self.next_block = next_block
 
-        if not isinstance(__condition, Node | type(None)):
-            raise TypeError('BLOCK\'S CONDITION CAN BE NODE OR NONE ONLY')
+    def __str__(self) -> str:
+        return {'operator': self.operator.value,
+                'condition': self.condition,
+                'body': self.body,
+                'next': self.next_block,
+                'line': self.line_number}.__repr__()
 
-        self.__condition = __condition
+    def __repr__(self) -> str:
+        return self.__str__()
 
-        if __body is None:
-            raise TypeError('BLOCK\'S BODY CANNOT BE NONE (BUT CAN BE AN EMPTY LIST)')
-        if not isinstance(__body, list):
-            raise TypeError('BLOCK\'S BODY MUST BE A LIST')
+    def __eq__(self, other: object):
+        if not isinstance(other, Block):
+            return False
 
-        self.__body = __body
+        return self.line_number == other.line_number and \
+            self.operator == other.operator and \
+            self.body == other.body and \
+            self.condition == other.condition and \
+            self.next_block == other.next_block
 
-        if __line_number is None:
-            raise TypeError('FUNCTIONS\'S LINE NUMBER CANNOT BE NONE')
-        if not isinstance(__line_number, int):
-            raise TypeError('NODE\'S LINE NUMBER MUST BE INT')
-        if __line_number <= 0:
-            raise TypeError('FUNCTIONS\'S LINE NUMBER CANNOT BE LOWER THAN ONE')
 
-        self.__line_number = __line_number
+class Function:
+    """
+    Functions are root elements in logical tree created in min_parser.py; fields are kept
+    in slots, arguments are checked only in debug mode
 
-        self.next_block = next_block
+    once created, Function SHOULD NOT be changed for purpose of avoiding malfunctioning
+    """
+    __slots__ = ('name', 'args', 'body', 'line_number')
 
-    @property
-    def operator(self) -> Token:
+    def __init__(self, __name: Optional[str], __args: Optional[list[Node]],
+                 __body: Optional[list[Node | Block]], __line_number: Optional[int]):
         """
-        operator of block should only be accessed via this method
+        creates Function
 
-        :return: operator of block(token)
-        """
-        return self.__operator
+        raises an error if parameters are invalid or None (in debug mode)
 
-    @property
-    def condition(self):
-        """
-        condition of block should only be accessed via this method
+        once created, Function SHOULD NOT be changed for purpose of avoiding malfunctioning
 
-        :return: condition of block(node)
+        :param __name: name of the function
+        :param __args: list arguments of the function
+        :param __body: body of the function (list of lines of code)
+        :param __line_number: line number of function (the line where function is declared)
         """
-        return self.__condition
+        if _debug_mode:
+            if __name is None:
+                raise TypeError('FUNCTION\'S NAME CANNOT BE NONE')
+            if not __name.strip():
+                raise TypeError('FUNCTION\'S NAME CANNOT BE AN EMPTY STRING')
 
-    @property
-    def body(self) -> list:
-        """
-        body of block should only be accessed via this method
+            if __args is None:
+                raise TypeError('FUNCTION\'S ARGUMENTS CANNOT BE NONE (BUT CAN BE AN EMPTY LIST)')
 
-        :return: body of block(list of nodes/blocks)
-        """
-        return self.__body
+            if __body is None:
+                raise TypeError('FUNCTION\'S BODY CANNOT BE NONE (BUT CAN BE AN EMPTY LIST)')
 
-    @property
-    def line_number(self) -> int:
-        """
-        line number of block should only be accessed via this method
+            if __line_number is None:
+                raise TypeError('FUNCTIONS\'S LINE NUMBER CANNOT BE NONE')
+            if not isinstance(__line_number, int):
+                raise TypeError('NODE\'S LINE NUMBER MUST BE INT')
+            if __line_number <= 0:
+                raise TypeError('FUNCTIONS\'S LINE NUMBER CANNOT BE LOWER THAN ONE')
 
-        :return: line number of block(int)
-        """
-        return self.__line_number
+        self.name: str = __name  # type: ignore
+        self.args: list[Node] = __args  # type: ignore
+        self.body: list[Node | Block] = __body  # type: ignore
+        self.line_number: int = __line_number  # type: ignore
 
     def __str__(self) -> str:
-        return {'operator': self.__operator.value,
-                'condition': self.__condition,
-                'body': self.__body,
-                'next': self.next_block,
-                'line': self.__line_number}.__repr__()
+        return {'name': self.name,
+                'args': self.args,
+                'body': self.body,
+                'line': self.line_number}.__repr__()
 
     def __repr__(self) -> str:
         return self.__str__()
 
     def __eq__(self, other: object):
-        if not isinstance(other, Block):
+        if not isinstance(other, Function):
             return False
 
-        return self.__line_number == other.line_number and \
-            self.__operator == other.operator and \
-            self.__body == other.body and \
-            self.__condition == other.condition and \
-            self.next_block == other.next_block
+        return self.line_number == other.line_number and \
+            self.name == other.name and \
+            self.args == other.args and \
+            self.body == other.body
 
 
-class Function:
+class LazyFunction(Function):
     """
-    Functions are root elements in logical tree created in min_parser.py
+    Function which body is parsed only when it is accessed for the first time; name, arguments
+    and line number are known right away. Syntax errors in body are raised on that first access
 
-    once created, Function SHOULD NOT be changed for purpose of avoiding malfunctioning
+    once created, LazyFunction SHOULD NOT be changed for purpose of avoiding malfunctioning
     """
+    __slots__ = ('__parse_body', '__parsed_body')
+
     def __init__(self, __name: Optional[str], __args: Optional[list[Node]],
-                 __body: Optional[list[Node | Block]], __line_number: Optional[int]):
+                 __parse_body: Optional[Callable[[], list[Node | Block]]],
+                 __line_number: Optional[int]):
         """
-        creates Function
+        creates LazyFunction
 
         raises an error if parameters are invalid or None
 
-        once created, Function SHOULD NOT be changed for purpose of avoiding malfunctioning
-
         :param __name: name of the function
         :param __args: list arguments of the function
-        :param __body: body of the function (list of lines of code)
+        :param __parse_body: callable without arguments which parses and returns body
+                             of the function, it is called once
         :param __line_number: line number of function (the line where function is declared)
         """
-        if __name is None:
-            raise TypeError('FUNCTION\'S NAME CANNOT BE NONE')
-        if not __name.strip():
-            raise TypeError('FUNCTION\'S NAME CANNOT BE AN EMPTY STRING')
+        if _debug_mode:
+            if __parse_body is None:
+                raise TypeError('FUNCTION\'S BODY PARSER CANNOT BE NONE')
+            if not callable(__parse_body):
+                raise TypeError('FUNCTION\'S BODY PARSER MUST BE CALLABLE')
+
+        self.__parse_body: Optional[Callable[[], list[Node | Block]]] = __parse_body
+        self.__parsed_body: list[Node | Block] = []
+        super().__init__(__name, __args, [], __line_number)
 
-        self.__name = __name
+    @property
+    def body(self) -> list[Node | Block]:
+        """
+        body of function, it is parsed on first access
 
-        if __args is None:
-            raise TypeError('FUNCTION\'S ARGUMENTS CANNOT BE NONE (BUT CAN BE AN EMPTY LIST)')
+        :return: body of function as a list of Nodes
+        """
+        if self.__parse_body is not None:
+            self.__parsed_body = self.__parse_body()
+            self.__parse_body = None  # raw lines are not kept after parsing
 
-        self.__args = __args
+        return self.__parsed_body
 
-        if __body is None:
-            raise TypeError('FUNCTION\'S BODY CANNOT BE NONE (BUT CAN BE AN EMPTY LIST)')
+    @body.setter
+    def body(self, body: list[Node | Block]) -> None:
+        self.__parsed_body = body
 
-        self.__body = __body
+    @property
+    def is_parsed(self) -> bool:
+        """
+        :return: True if body of function was already parsed
+        """
+        return self.__parse_body is None
 
-        if __line_number is None:
-            raise TypeError('FUNCTIONS\'S LINE NUMBER CANNOT BE NONE')
-        if not isinstance(__line_number, int):
-            raise TypeError('NODE\'S LINE NUMBER MUST BE INT')
-        if __line_number <= 0:
-            raise TypeError('FUNCTIONS\'S LINE NUMBER CANNOT BE LOWER THAN ONE')
 
-        self.__line_number = __line_number
+class TokenStream:
+    """
+    compact form of lexer output: instead of list of lists of Tokens, tokens are kept in flat
+    arrays -- type code of each token in array('B'), index of its value in a deduplicated
+    constant pool in array('I'), and line numbers in array('I')
 
-    @property
-    def name(self) -> str:
+    Tokens are given back (the very same objects that were appended) through cheap
+    TokenStreamView objects, which never copy underlying arrays
+    """
+    def __init__(self):
         """
-        name of function should only be accessed via this method
+        creates an empty TokenStream, fill it with append_line()
+        """
+        self.__types = array('B')  # index in TOKEN_TYPES of each token
+        self.__values = array('I')  # index in constant pool of each token
+        self.__line_starts = array('I', [0])  # index of first token of each line, then total
+        self.__line_numbers = array('I')
+
+        self.__pool: list[int | float | str | bool] = []
+        self.__pool_indexes: dict[tuple[type, Any], int] = {}
+        self.__tokens: dict[tuple[int, int], Token] = {}  # (type code, pool index) -> Token
 
-        :return: name of function as a string
+    def append_line(self, line_number: int, tokens: Sequence) -> None:
         """
-        return self.__name
+        adds one line of tokens to the end of stream
 
-    @property
-    def args(self) -> list[Node]:
+        :param line_number: number of the line in source code
+        :param tokens: tokens of the line
         """
-        arguments of function should only be accessed via this method
+        for token in tokens:
+            type_code = TOKEN_TYPE_CODES[token.type]
+
+            # 1, 1.0 and True are equal in Python, but must stay different values here
+            key = (type(token.value), token.value)
+            pool_index = self.__pool_indexes.get(key)
+            if pool_index is None:
+                pool_index = self.__pool_indexes[key] = len(self.__pool)
+                self.__pool.append(token.value)
 
-        :return: arguments of function as a list of Nodes
+            self.__tokens.setdefault((type_code, pool_index), token)
+
+            self.__types.append(type_code)
+            self.__values.append(pool_index)
+
+        self.__line_starts.append(len(self.__types))
+        self.__line_numbers.append(line_number)
+
+    def token(self, index: int) -> Token:
+        """
+        :param index: position of token in the whole stream
+        :return: token at given position
         """
-        return self.__args
+        return self.__tokens[(self.__types[index], self.__values[index])]
 
-    @property
-    def body(self) -> list[Node | Block]:
+    def line(self, index: int) -> 'TokenStreamView':
+        """
+        :param index: index of the line in stream (not its line number)
+        :return: view of tokens of that line
         """
-        body of function should only be accessed via this method
+        return TokenStreamView(self, self.__line_starts[index], self.__line_starts[index + 1])
 
-        :return: body of function as a list of Nodes
+    def line_number(self, index: int) -> int:
+        """
+        :param index: index of the line in stream
+        :return: number of that line in source code
         """
-        return self.__body
+        return self.__line_numbers[index]
+
+    def lines(self) -> Generator[tuple[int, 'TokenStreamView'], None, None]:
+        """
+        :return: (line number, view of line) pairs, same as min_lexer.iter_tokens() gives
+        """
+        for index, line_number in enumerate(self.__line_numbers):
+            yield line_number, self.line(index)
 
     @property
-    def line_number(self) -> int:
+    def tokens_count(self) -> int:
+        """
+        :return: number of tokens in all lines
         """
-        line number of function should only be accessed via this method
+        return len(self.__types)
 
-        :return: line number of function
+    @property
+    def pool(self) -> list[int | float | str | bool]:
+        """
+        :return: distinct values of tokens in stream
         """
-        return self.__line_number
+        return self.__pool
+
+    def __len__(self) -> int:
+        return len(self.__line_numbers)
 
     def __str__(self) -> str:
-        return {'name': self.__name,
-                'args': self.__args,
-                'body': self.__body,
-                'line': self.__line_number}.__repr__()
+        return {line_number: list(line) for line_number, line in self.lines()}.__repr__()
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+class TokenStreamView(Sequence):
+    """
+    read-only window over part of TokenStream, behaves like list of Tokens
+    slicing a view gives another view, no tokens are copied
+    """
+    def __init__(self, stream: TokenStream, start: int, stop: int):
+        """
+        creates view of tokens with positions from start (inclusive) to stop (exclusive)
+
+        :param stream: stream to look into
+        :param start: position of first token in stream
+        :param stop: position after last token in stream
+        """
+        self.__stream = stream
+        self.__start = start
+        self.__stop = max(start, stop)
+
+    @overload
+    def __getitem__(self, index: int) -> Token: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> 'TokenStreamView': ...
+
+    def __getitem__(self, index: int | slice) -> 'Token | TokenStreamView':
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError('TOKEN STREAM VIEWS DO NOT SUPPORT SLICING WITH STEP')
+
+            return TokenStreamView(self.__stream, self.__start + start, self.__start + stop)
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('TOKEN INDEX OUT OF RANGE')
+
+        return self.__stream.token(self.__start + index)
+
+    def __len__(self) -> int:
+        return self.__stop - self.__start
+
+    def __iter__(self) -> Iterator[Token]:
+        token = self.__stream.token
+        for index in range(self.__start, self.__stop):
+            yield token(index)
+
+    def __str__(self) -> str:
+        return list(self).__repr__()
 
     def __repr__(self) -> str:
         return self.__str__()
 
     def __eq__(self, other: object):
-        if not isinstance(other, Function):
+        if not isinstance(other, Sequence) or isinstance(other, str):
             return False
 
-        return self.__line_number == other.line_number and \
-            self.__name == other.name and \
-            self.__args == other.args and \
-            self.__body == other.body
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
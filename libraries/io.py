@@ -4,31 +4,46 @@ This library implements standard i/o operations in MINIMUM
 from typing import Optional
 
 from interpreter.utils.structures import Token
-from interpreter.utils.globals import is_API_mode_enabled
+from interpreter.utils.globals import is_API_mode_enabled, read_line, write
+
+# functions as [name in MINIMUM, name of python function, types of arguments], interpreter
+# reads them without running library, so they are written as is
+METHODS = [
+    ['in', 'in_', ['typ']],
+    ['out', 'out', ['int|float|str|bool']]
+]
+
+# functions, which results depend on anything but their arguments
+IMPURE_METHODS = ['in']
+
 
 def get_methods():
     """
     used for MINIMUM interpreter to interact with library
     """
-    return [
-            ['in', in_, ['typ']],
-            ['out', out, ['int|float|str|bool']]
-    ]
+    return [[name, globals()[function], args] for name, function, args in METHODS]
+
+
+def get_impure_methods():
+    """
+    used for MINIMUM interpreter to find programs, which output depends on anything but code
+    """
+    return IMPURE_METHODS
 
 
 def out(arg: list) -> None:
     """
-    outputs an arg
+    outputs an arg to output of program (standard output, unless program is run with other)
     :param arg: variable to print
     """
-    print(arg[0], end="")
+    write(str(arg[0]))
 
 
 def in_(arg: list) -> Token:
     """
     API_MODE=True: will signal about waiting for input into input_needed
-    reads from standard input
-    :return: string read from standard input
+    reads from input of program (standard input, unless program is run with other)
+    :return: string read from input
     """
     if is_API_mode_enabled():
         with open("input_needed", "w") as f:
@@ -39,16 +54,16 @@ def in_(arg: list) -> Token:
     match arg[0]:
         case 'int':
             type_ = 'int'
-            result = int(input())
+            result = int(read_line())
         case 'float':
             type_ = 'float'
-            result = float(input())
+            result = float(read_line())
         case 'str':
             type_ = 'str'
-            result = input()
+            result = read_line()
         case 'bool':
             type_ = 'bool'
-            result = bool(input())
+            result = bool(read_line())
 
     # clearing file - no input needed no more
     if is_API_mode_enabled():
@@ -3,14 +3,27 @@ This library implements standard mathematical operations in MINIMUM
 """
 from interpreter.utils.structures import Token
 
+# functions as [name in MINIMUM, name of python function, types of arguments], interpreter
+# reads them without running library, so they are written as is
+METHODS = [
+    ['sqrt', 'sqrt_', ['float|int']],
+    ['pow', 'pow_', ['float|int']]
+]
+
+# functions, which results depend on anything but their arguments
+IMPURE_METHODS: list[str] = []
+
 def get_methods():
     """
     used for MINIMUM interpreter to interact with library
     """
-    return [
-        ['sqrt', sqrt_, ['float|int']],
-        ['pow', pow_, ['float|int']]
-    ]
+    return [[name, globals()[function], args] for name, function, args in METHODS]
+
+def get_impure_methods():
+    """
+    used for MINIMUM interpreter to find programs, which output depends on anything but code
+    """
+    return IMPURE_METHODS
 
 def sqrt_(arg: list[int | float]) -> Token:
     """
@@ -3,8 +3,10 @@ Python Script used to read and interpret users input into actions in interpreter
 """
 
 import sys
+from interpreter.min_cache import prune_cache
 from interpreter.min_interpreter import print_code, execute
 from interpreter.min_lexer import print_tokens
+from interpreter.min_optimizer import print_pass_info
 from interpreter.min_parser import print_tree
 from interpreter.utils.globals import enable_API_mode
 
@@ -22,8 +24,19 @@ if __name__ == '__main__':
             print('\t-l - shot lexer result (raw tokens)')
             print('\t-p - show parser result (code tree)')
             print('\t-a - enable API_MODE (notify about waiting for input when running on server side)')
+            print('\t--lazy - parse bodies of functions when they are called for the first time '
+                  '(syntax errors in functions which are never called are not reported)')
+            print('\t--no-cache - do not load or store parsed code in __mincache__ next to file')
+            print('\t-O0, -O1, -O2 - optimization level, -O0 (no optimizations) by default')
+            print('\t--time-passes - show time and changes of each optimization pass')
+            print('Usage: python runner.py --prune-cache [directory] - remove stale entries '
+                  'of __mincache__ directories')
+        elif FIRST_ARG == '--prune-cache':
+            ROOT = sys.argv[2] if len(sys.argv) > 2 else '.'
+            print(f'Removed {prune_cache(ROOT)} stale cache entries')
         else:
-            available_flags = ['-p', '-c', '-l', '-a']
+            available_flags = ['-p', '-c', '-l', '-a', '--lazy', '--no-cache', '-O0', '-O1',
+                               '-O2', '--time-passes']
             flags = sys.argv[2:]
 
             unknown_token = any(flag for flag in flags if flag not in available_flags)
@@ -43,11 +56,19 @@ if __name__ == '__main__':
                 if '-a' in flags:
                     enable_API_mode()
 
+                # the last level given is taken
+                levels = [int(flag[2:]) for flag in flags if flag.startswith('-O')]
+                LEVEL = levels[-1] if levels else 0
+
                 print("Produced output:")
-                execute(FIRST_ARG)
+                execute(FIRST_ARG, lazy='--lazy' in flags, cache='--no-cache' not in flags,
+                        optimization=LEVEL)
+
+                if '--time-passes' in flags:
+                    print_pass_info()
 
             if '-a' in flags:
-                with open('finished', 'w') as f:
+                with open('finished', 'w', encoding='utf-8') as f:
                     f.write('finished')
 
     except (FileNotFoundError, IndexError):
@@ -0,0 +1,10 @@
+# pylint: skip-file
+import os
+
+from interpreter.utils.structures import set_debug_mode
+
+# constructors of tree structures check their arguments while testing
+set_debug_mode(True)
+
+# files are parsed each time they are tested, tests of cache turn it on themselves
+os.environ['MIN_NO_CACHE'] = '1'
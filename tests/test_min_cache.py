@@ -0,0 +1,172 @@
+# pylint: skip-file
+import io
+import os
+import pickle
+import shutil
+
+import pytest
+
+from interpreter.min_cache import load_tree, prune_cache, read_source, output_cache_info, \
+    cache_version
+from interpreter.min_interpreter import execute, compile
+from interpreter.min_parser import parse
+from interpreter.utils.structures import Function, LazyFunction
+
+
+@pytest.fixture
+def source_path(tmp_path, monkeypatch):
+    monkeypatch.delenv('MIN_NO_CACHE')
+    path = tmp_path / 'test_3.min'
+    shutil.copy('./tests/test_scripts/test_3.min', path)
+    return path
+
+
+class Unpickled:
+    def __init__(self, path):
+        self.path = path
+
+    def __reduce__(self):
+        return open, (self.path, 'w')
+
+
+def entries(path):
+    directory = path.parent / '__mincache__'
+    return sorted(os.listdir(directory)) if directory.exists() else []
+
+# region Testing cache of trees
+
+def test_cache_stores_and_loads(source_path):
+    tree = parse(source_path)
+
+    names = entries(source_path)
+    assert len(names) == 1
+    assert names[0].startswith('test_3.min.') and names[0].endswith(f'.min-{cache_version()}.json')
+
+    _, entry_path = read_source(source_path)
+    assert load_tree(entry_path) == tree
+    assert parse(source_path) == tree == parse(source_path, cache=False)
+
+def test_cache_of_changed_source(source_path):
+    first_tree = parse(source_path)
+
+    source_path.write_text(source_path.read_text().replace('5', '6'))
+    tree = parse(source_path)
+
+    assert tree != first_tree
+    assert tree == parse(source_path, cache=False)
+    assert len(entries(source_path)) == 1  # entry of previous content is replaced
+
+def test_cache_lazy(source_path):
+    # lazy trees are not stored, as their bodies would have to be parsed for it
+    tree = parse(source_path, lazy=True)
+    assert isinstance(tree[1], LazyFunction) and not tree[1].is_parsed
+    assert entries(source_path) == []
+
+    tree = parse(source_path, lazy=True)
+    assert isinstance(tree[1], LazyFunction) and not tree[1].is_parsed
+
+    # tree stored by eager parse has all bodies parsed
+    full_tree = parse(source_path)
+    cached_tree = parse(source_path, lazy=True)
+    assert type(cached_tree[1]) is Function
+    assert cached_tree == full_tree == tree
+
+    # functions with syntax errors are raised only when called
+    source_path.write_text(source_path.read_text().replace('return num', 'return +'))
+    tree = parse(source_path, lazy=True)
+    _, entry_path = read_source(source_path)
+    assert not os.path.exists(entry_path)
+
+    with pytest.raises(SyntaxError):
+        tree[1].body
+
+def test_cache_disabled(source_path, monkeypatch):
+    parse(source_path, cache=False)
+    assert entries(source_path) == []
+
+    monkeypatch.setenv('MIN_NO_CACHE', '1')
+    parse(source_path)
+    assert entries(source_path) == []
+
+def test_cache_broken_entry(source_path):
+    tree = parse(source_path)
+    _, entry_path = read_source(source_path)
+
+    with open(entry_path, 'wb') as file:
+        file.write(b'not a tree')
+
+    assert load_tree(entry_path) is None
+    assert parse(source_path) == tree
+    assert load_tree(entry_path) == tree
+
+def test_cache_entry_runs_no_code(source_path):
+    tree = parse(source_path)
+    _, entry_path = read_source(source_path)
+
+    # pickle, which would create a file when unpickled
+    marker = source_path.parent / 'unpickled'
+    with open(entry_path, 'wb') as file:
+        file.write(pickle.dumps(Unpickled(str(marker))))
+
+    assert load_tree(entry_path) is None
+    assert not marker.exists()
+    assert parse(source_path) == tree
+
+def test_prune_cache(source_path):
+    parse(source_path)
+    assert prune_cache(source_path.parent) == 0
+
+    cache_directory = source_path.parent / '__mincache__'
+    (cache_directory / 'test_3.min.0123456789abcdef.min-0.0.0.pickle').write_bytes(b'')
+    (cache_directory / 'removed.min.0123456789abcdef.min-1.0.0.pickle').write_bytes(b'')
+    assert prune_cache(source_path.parent) == 2
+    assert len(entries(source_path)) == 1
+
+    source_path.unlink()
+    assert prune_cache(source_path.parent) == 1
+    assert not cache_directory.exists()
+
+# endregion
+
+# region Testing cache of outputs
+
+def output_entries(path):
+    return [name for name in entries(path) if name.endswith('.out')]
+
+def test_output_cache_replays_pure_program(source_path, capsys):
+    execute(source_path)
+    output = capsys.readouterr().out
+    assert len(output_entries(source_path)) == 1
+
+    hits = output_cache_info()['hits']
+    execute(source_path)
+    assert capsys.readouterr().out == output
+    assert output_cache_info()['hits'] == hits + 1
+
+    # changed source is run again
+    source_path.write_text(source_path.read_text().replace('5', '6'))
+    execute(source_path)
+    assert capsys.readouterr().out != output
+    assert len(output_entries(source_path)) == 1
+
+def test_output_cache_skips_impure_program(tmp_path, monkeypatch, capsys):
+    monkeypatch.delenv('MIN_NO_CACHE')
+    path = tmp_path / 'sayhi.min'
+    shutil.copy('./examples/sayhi.min', path)
+
+    assert not compile(path).is_pure
+
+    monkeypatch.setattr('sys.stdin', io.StringIO('Alice\n'))
+    execute(path)
+    assert 'Alice' in capsys.readouterr().out
+    assert output_entries(path) == []
+
+def test_output_cache_skips_failed_program(source_path, capsys):
+    source_path.write_text(source_path.read_text().replace('return num', 'return num / 0'))
+    assert compile(source_path, lazy=True).is_pure
+
+    with pytest.raises(RuntimeError):
+        execute(source_path)
+    assert output_entries(source_path) == []
+
+# endregion
@@ -1,7 +1,10 @@
 # pylint: skip-file
+import io
+import threading
+
 import pytest
 
-from interpreter.min_interpreter import execute_line, execute
+from interpreter.min_interpreter import execute_line, execute, compile, Program
 from interpreter.utils.commons import END, PLUS, MINUS, MULTIPLY, COMMA, EQUALS, NOT_EQUALS, MORE_THAN, LESS_THAN, \
     NO_MORE_THAN, NO_LESS_THAN
 from interpreter.utils.commons import DIVIDE, MODULO, ASSIGN, CREATE
@@ -156,3 +159,57 @@ def test_execute_general_3():
 
 def test_execute_general_4():
     execute('./tests/test_scripts/test_4.min')  # TODO
+
+def test_execute_lazy():
+    source = 'use io\n' \
+             'start unused\n' \
+             '\tout | | 1\n' \
+             'end\n' \
+             'start main\n' \
+             '\tout | 1\n' \
+             'end\n'
+
+    execute(source, lazy=True)
+
+    with pytest.raises(SyntaxError, match='AT LINE 3'):
+        execute(source)
+
+def test_compile_run_many_times():
+    program = compile('./examples/factorial.min')
+    assert isinstance(program, Program)
+    assert {'factorial', 'main', 'in', 'out'} <= set(program.functions)
+
+    for number, expected in [(0, '1'), (5, '120'), (10, '3628800')]:
+        output = io.StringIO()
+        program.run(stdin=f'{number}\n', stdout=output)
+        assert output.getvalue() == f'Enter the number: {expected}\n'
+
+    with pytest.raises(EOFError):
+        program.run(stdin='', stdout=io.StringIO())
+
+    with pytest.raises(AttributeError):
+        program.tree = ()
+
+    with pytest.raises(RuntimeError, match='\'main\' FUNCTION NOT FOUND'):
+        compile('start helper\n\treturn 1\nend\n')
+
+def test_compile_run_in_threads():
+    program = compile('./examples/factorial.min')
+    outputs: dict[int, str] = {}
+
+    def run(number: int) -> None:
+        for _ in range(5):
+            output = io.StringIO()
+            program.run(stdin=io.StringIO(f'{number}\n'), stdout=output)
+            outputs[number] = output.getvalue()
+
+    threads = [threading.Thread(target=run, args=(number,)) for number in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    factorial = 1
+    for number in range(8):
+        assert outputs[number] == f'Enter the number: {factorial}\n'
+        factorial *= number + 1
@@ -4,176 +4,78 @@ import contextlib
 
 import pytest
 
-from interpreter.min_lexer import __is_keyword, __give_type, __give_types_for_tokens
-from interpreter.min_lexer import __in_string, __is_boolean, __is_float, __is_integer
-from interpreter.min_lexer import __is_operator, __is_separator, __is_string, __is_type
-from interpreter.min_lexer import __clear_lines, get_tokens, print_tokens
+from interpreter.min_lexer import __give_type, __give_types_for_line, get_tokens, print_tokens
+from interpreter.min_lexer import __split_line, __strip_comment, iter_tokens, get_token_stream
 from interpreter.utils.structures import Token
+from interpreter.utils.commons import PIPE, START, TRUE
 
-# region Testing is_...() methods
-
-def test_is_keyword_wrong():
-	assert not __is_keyword('typ')
-	assert not __is_keyword('is')
-
-def test_is_keyword_right():
-	assert __is_keyword('start')
-	assert __is_keyword('end')
-	assert __is_keyword('use')
-	assert __is_keyword('return')
-	assert __is_keyword('break')
-	assert __is_keyword('while')
-	assert __is_keyword('if')
-	assert __is_keyword('else')
-
-def test_is_keyword_none():
-	assert not __is_keyword(None)
-
-def test_is_operator_wrong():
-	assert not __is_operator('1')
-	assert not __is_operator('name')
-
-def test_is_operator_right():
-	assert __is_operator('+')
-	assert __is_operator('-')
-	assert __is_operator('=')
-	assert __is_operator('is')
-	assert __is_operator('|')
-	assert __is_operator('*')
-	assert __is_operator('/')
-	assert __is_operator('+')
-
-def test_is_operator_none():
-	assert not __is_operator(None)
-
-def test_is_type_wrong():
-	assert not __is_type('+')
-	assert not __is_type('buul') # noqa
-
-def test_is_type_right():
-	assert __is_type('bool')
-	assert __is_type('int')
-	assert __is_type('float')
-	assert __is_type('str')
-
-def test_it_type_none():
-	assert not __is_type(None)
-
-def test_is_boolean_wrong():
-	assert not __is_boolean('wrong')
-	assert not __is_boolean('right')
-
-def test_is_boolean_right():
-	assert __is_boolean('true')
-	assert __is_boolean('false')
-
-def test_is_boolean_none():
-	assert not __is_boolean(None)
-
-def test_is_integer_wrong():
-	assert not __is_integer('1a')
-	assert not __is_integer('1.0')
-	assert not __is_integer('-a')
-	assert not __is_integer('12 - 34')
-
-def test_is_integer_right():
-	assert __is_integer('11')
-	assert __is_integer('-2')
-	assert __is_integer('1234')
-	assert __is_integer('-223')
-
-def test_is_integer_none():
-	assert not __is_integer(None)
-
-def test_is_float_wrong():
-	assert not __is_float('1,1')
-	assert not __is_float('1..1')
-	assert not __is_float('-1,1')
-	assert not __is_float('1.1a1')
-	assert not __is_float('123')
-
-def test_is_float_right():
-	assert __is_float('1.1')
-	assert __is_float('-1.1')
-
-def test_is_float_none():
-	assert not __is_float(None)
-
-def test_is_string_wrong():
-	assert not __is_string('"')
-	assert not __is_string('\'a"')
-	assert not __is_string('"a')
-	assert not __is_string('string')
-
-def test_is_string_right():
-	assert __is_string('""')
-	assert __is_string('"this is string"')
-	assert __is_string('"this is also " string"')
-
-def test_is_string_none():
-	assert not __is_string(None)
-
-def test_is_separator_wrong():
-	assert not __is_separator('.')
-	assert not __is_separator(';')
-	assert not __is_separator('a')
-	assert not __is_separator(',,')
-
-def test_is_separator_right():
-	assert __is_separator(',')
-
-def test_is_separator_none():
-	assert not __is_separator(None)
+# region Testing classification of lexemes
 
-# endregion
+def type_of(lexeme):
+	return __give_type(lexeme, '').type
+
+def test_classify_keywords():
+	for lexeme in ('start', 'end', 'use', 'return', 'break', 'while', 'if', 'elif', 'else'):
+		assert type_of(lexeme) == 'kwd'
+
+	assert type_of('typ') != 'kwd'
+
+def test_classify_operators():
+	for lexeme in ('+', '-', '=', 'is', '|', '*', '/', '%', '<=', '!='):
+		assert type_of(lexeme) == 'opr'
+
+	assert type_of('1') != 'opr'
+	assert type_of('name') != 'opr'
+
+def test_classify_types():
+	for lexeme in ('bool', 'int', 'float', 'str'):
+		assert type_of(lexeme) == 'typ'
+
+	assert type_of('buul') != 'typ' # noqa
 
-# region Testing __in_string() methods
+def test_classify_booleans():
+	assert __give_type('true', '') == Token('bool', True)
+	assert __give_type('false', '') == Token('bool', False)
+	assert type_of('wrong') != 'bool'
 
-def test_in_string_dry_run_none():
-	assert not __in_string(None, None)
-	assert not __in_string(None, 0)
-	assert not __in_string('string', None)
+def test_classify_integers():
+	for lexeme in ('11', '-2', '1234', '-223'):
+		assert type_of(lexeme) == 'int'
 
-def test_in_string_dry_run_invalid():
-	assert not __in_string('short', 100)
-	assert not __in_string('string', -20)
+	for lexeme in ('1a', '1.0', '-a'):
+		assert type_of(lexeme) != 'int'
 
-def test_in_string_general():
-	assert __in_string('out | "Hello"', 7)
-	assert not __in_string('out | "Hello"', 6)
-	assert not __in_string('out | "Hello"', 12)
+def test_classify_floats():
+	for lexeme in ('1.1', '-1.1'):
+		assert type_of(lexeme) == 'float'
 
-def test_in_string_many_strings():
-	assert not __in_string('out | "Hello" + "World"', 13)
-	assert __in_string('out | "Hello" + "World"', 7)
-	assert __in_string('out | "Hello" + "World"', 17)
+	for lexeme in ('1,1', '1..1', '-1,1', '1.1a1', '123'):
+		assert type_of(lexeme) != 'float'
 
-def test_in_string_quotes_in_string():
-	assert __in_string('out | "Hello\\"World\\""', 7)
-	assert __in_string('out | "Hello\\"World\\""', 12)
-	assert __in_string('out | "Hello\\"World\\""', 13)
-	assert __in_string('out | "Hello\\"World\\""', 18)
+def test_classify_strings():
+	for lexeme in ('""', '"this is string"', '"this is also " string"'):
+		assert type_of(lexeme) == 'str'
+
+	for lexeme in ('"', '\'a"', '"a', 'string'):
+		assert type_of(lexeme) != 'str'
+
+def test_classify_separators():
+	assert type_of(',') == 'sep'
+
+	for lexeme in ('.', ';', 'a', ',,'):
+		assert type_of(lexeme) != 'sep'
 
 # endregion
 
-# region Testing __clear_lines() methods
+# region Testing clearing of lines
 
-def test_clear_lines_dry_run_none():
-	lines, line_numbers = __clear_lines(None)
-	assert lines is None
-	assert line_numbers is None
+def clear_lines(lines):
+	cleared = [(index + 1, __strip_comment(line).strip()) for index, line in enumerate(lines)]
+	cleared = [(number, line) for number, line in cleared if line != '']
+	return [line for _, line in cleared], [number for number, _ in cleared]
 
 def test_clear_lines_dry_run_empty():
-	assert __clear_lines([]) == ([], [])
-
-def test_clear_lines_dry_run_invalid():
-	assert __clear_lines('string') == (None, None)
-	assert __clear_lines(1) == (None, None)
-	assert __clear_lines(['string', ['line']]) == (None, None)
-	assert __clear_lines([[['string']]]) == (None, None)
-	assert __clear_lines([[], ['string']]) == (None, None)
-	assert __clear_lines([None, 'string']) == (None, None)
-	assert __clear_lines(('string', 'string')) == (None, None)
+	assert clear_lines([]) == ([], [])
 
 def test_clear_lines_general():
 	given = [
@@ -200,7 +102,7 @@ def test_clear_lines_general():
 		]
 	)
 
-	assert __clear_lines(given) == expected
+	assert clear_lines(given) == expected
 
 def test_clear_lines_many_comments():
 	given = [
@@ -227,7 +129,7 @@ def test_clear_lines_many_comments():
 			7
 		]
 	)
-	assert __clear_lines(given) == expected
+	assert clear_lines(given) == expected
 
 def test_clear_lines_many_tabs():
 	given = [
@@ -255,7 +157,7 @@ def test_clear_lines_many_tabs():
 		]
 	)
 
-	assert __clear_lines(given) == expected
+	assert clear_lines(given) == expected
 
 def test_clear_lines_trailing_whitespace():
 	given = [
@@ -283,23 +185,59 @@ def test_clear_lines_trailing_whitespace():
 		]
 	)
 
-	assert __clear_lines(given) == expected
+	assert clear_lines(given) == expected
+
+# endregion
+
+# region Testing __strip_comment() and __split_line()
+
+def test_strip_comment_general():
+	assert __strip_comment('out | "Hello" ~ comment') == 'out | "Hello" '
+	assert __strip_comment('out | "~ not a comment ~"') == 'out | "~ not a comment ~"'
+	assert __strip_comment('out | "\\"~" ~ comment') == 'out | "\\"~" '
+
+def test_split_line_general():
+	assert __split_line('out | many_tabs | (0, 1.0)') == [
+		'out', '|', 'many_tabs', '|', '(', '0', ',', '1.0', ')'
+	]
+	assert __split_line('if a>=b') == ['if', 'a', '>=', 'b']
+
+def test_split_line_multi_symbol_operators():
+	assert __split_line('a<=b>=c==d!=e') == ['a', '<=', 'b', '>=', 'c', '==', 'd', '!=', 'e']
+	assert __split_line('a = -b') == ['a', '=', '-', 'b']
+	assert __split_line('a ! b') == ['a', '!', 'b']
+
+def test_split_line_strings():
+	assert __split_line('out | "a + b, (c)"') == ['out', '|', '"a + b, (c)"']
+	assert __split_line('out | "\\n\\"\\\\"') == ['out', '|', '"\n"\\"']
+
+def test_split_line_long_line():
+	line = 'out | ' + ', '.join(f'arg{index}' for index in range(5000))
+	tokens = __split_line(line)
+
+	assert len(tokens) == 2 + 5000 * 2 - 1
+	assert tokens[-1] == 'arg4999'
 
 # endregion
 
-# region Testing __give_types_for_tokens()
+# region Testing __give_types_for_line()
+
+def give_types(lines):
+	prev_token = ''
+	tokens = []
+
+	for line in lines:
+		line_with_types, prev_token = __give_types_for_line(line, prev_token)
 
-def test_give_types_for_tokens_dry_run_none():
-	assert __give_types_for_tokens(None) is None
+		if line_with_types:
+			tokens.append(line_with_types)
+
+	return tokens
 
-def test_give_types_for_tokens_dry_run_invalid():
-	assert __give_types_for_tokens([['token'], 'token']) is None
-	assert __give_types_for_tokens((['token'], ['token'])) is None
-	assert __give_types_for_tokens({}) is None
 
 def test_give_types_for_tokens_dry_run_empty():
-	assert __give_types_for_tokens([]) == []
-	assert __give_types_for_tokens([[], []]) == []
+	assert give_types([]) == []
+	assert give_types([[], []]) == []
 
 def test_give_types_for_tokens_general():
 	given = [
@@ -316,7 +254,7 @@ def test_give_types_for_tokens_general():
 		[Token('kwd', 'end')]
 	]
 
-	assert __give_types_for_tokens(given) == expected
+	assert give_types(given) == expected
 
 def test_give_types_for_tokens_literals():
 	given = [
@@ -343,7 +281,7 @@ def test_give_types_for_tokens_literals():
 		[Token('str', 'string')]
 	]
 
-	assert __give_types_for_tokens(given) == expected
+	assert give_types(given) == expected
 
 def test_give_types_for_tokens_keywords():
 	given = [
@@ -368,7 +306,7 @@ def test_give_types_for_tokens_keywords():
 		[Token('kwd', 'break')],
 	]
 
-	assert __give_types_for_tokens(given) == expected
+	assert give_types(given) == expected
 
 def test_give_types_for_tokens_operators():
 	given = [
@@ -393,7 +331,7 @@ def test_give_types_for_tokens_operators():
 		[Token('opr', '%')],
 	]
 
-	assert __give_types_for_tokens(given) == expected
+	assert give_types(given) == expected
 
 # endregion
 
@@ -408,6 +346,21 @@ def test_give_type_dry_run_invalid():
 	assert __give_type(1, 'string') is None
 	assert __give_type('string', 1) is None
 
+def test_give_type_general():
+	assert __give_type('!=', '') == Token('opr', '!=')
+	assert __give_type('elif', '') == Token('kwd', 'elif')
+	assert __give_type('true', '') == Token('bool', True)
+	assert __give_type('-12', '') == Token('int', -12)
+	assert __give_type('1.5', '') == Token('float', 1.5)
+	assert __give_type('"a"', '') == Token('str', 'a')
+	assert __give_type('name', 'start') == Token('fnc', 'name')
+	assert __give_type('name', 'use') == Token('lib', 'name')
+	assert __give_type('name', 'out') == Token('var', 'name')
+
+def test_give_type_malformed_numbers():
+	assert __give_type('1.', '') == Token('var', '1.')
+	assert __give_type('.5', '') == Token('var', '.5')
+
 # endregion
 
 # region Testing get_tokens()
@@ -526,6 +479,93 @@ def test_get_tokens_special_symbols_in_strings():
 	assert get_tokens('./tests/test_scripts/test_4.min') == expected
 # endregion
 
+# region Testing iter_tokens()
+
+def test_iter_tokens_dry_run_invalid():
+	with pytest.raises(FileNotFoundError):
+		list(iter_tokens(None))
+
+	with pytest.raises(FileNotFoundError):
+		list(iter_tokens('invalid.filename'))
+
+def test_iter_tokens_sources():
+	expected = list(zip(*get_tokens('./tests/test_scripts/test_3.min')))
+	expected = [(line_number, line) for line, line_number in expected]
+
+	assert list(iter_tokens('./tests/test_scripts/test_3.min')) == expected
+
+	with open('./tests/test_scripts/test_3.min', 'r') as file:
+		assert list(iter_tokens(file)) == expected
+		file.seek(0)
+		source = file.read()
+
+	assert list(iter_tokens(source)) == expected
+	assert list(iter_tokens(io.StringIO(source))) == expected
+
+def test_iter_tokens_is_lazy():
+	stream = io.StringIO('use io\n\nstart main\n\tout | "Hi"\nend\n')
+	tokens = iter_tokens(stream)
+
+	assert next(tokens) == (1, [Token('kwd', 'use'), Token('lib', 'io')])
+	assert stream.tell() == len('use io\n')  # lexer has not read further than it needed
+	assert next(tokens) == (3, [Token('kwd', 'start'), Token('fnc', 'main')])
+
+def test_iter_tokens_shares_tokens():
+	source = 'start main\n\tx is bool\n\tx = true\n\tout | x\n\tout | x\nend\n'
+	lines = [line for _, line in iter_tokens(source)]
+
+	assert lines[0][0] is START
+	assert lines[2][2] is TRUE
+	assert lines[3][1] is PIPE
+	assert lines[3][0] is lines[4][0]  # fnc: out
+	assert lines[1][0] is lines[2][0] is lines[3][2] is lines[4][2]  # var: x
+
+def test_get_token_stream_general():
+	tokens, line_numbers = get_tokens('./tests/test_scripts/test_3.min')
+	stream = get_token_stream('./tests/test_scripts/test_3.min')
+
+	assert len(stream) == len(tokens)
+	for (line_number, line), expected_line, expected_number in zip(stream.lines(), tokens, line_numbers):
+		assert line_number == expected_number
+		assert line == expected_line
+
+def test_iter_tokens_line_breaks(tmp_path):
+	path = tmp_path / 'line_breaks.min'
+	path.write_bytes('use io\r\n\r\nstart main\rout | "\\"ünï ~ côdé\\"" ~ comment\n\x0cend'.encode())
+
+	tokens = list(iter_tokens(str(path)))
+
+	assert [line_number for line_number, _ in tokens] == [1, 3, 4, 5]
+	assert tokens[2][1][2] == Token('str', '"ünï ~ côdé"')
+
+def opened_files(monkeypatch):
+	files = []
+
+	def tracked_open(*args, **kwargs):
+		files.append(open(*args, **kwargs))
+		return files[-1]
+
+	monkeypatch.setattr('interpreter.min_lexer.open', tracked_open, raising=False)
+	return files
+
+def test_iter_tokens_closes_abandoned_file(monkeypatch):
+	files = opened_files(monkeypatch)
+
+	tokens = iter_tokens('./tests/test_scripts/test_3.min')
+	next(tokens)
+	assert not files[-1].closed
+
+	tokens.close()
+	assert files[-1].closed
+
+	with open('./tests/test_scripts/test_3.min', 'r') as file:
+		tokens = iter_tokens(file)
+		next(tokens)
+		tokens.close()
+		assert not file.closed  # stream given by caller is left open
+
+# endregion
+
 # region Testing print_tokens
 
 def test_print_tokens_dry_run_none():
@@ -0,0 +1,167 @@
+# pylint: skip-file
+import io
+import os
+import shutil
+
+import pytest
+
+from interpreter.min_interpreter import compile
+from interpreter.min_libraries import link_library, library_cache_info, clear_library_cache
+
+
+@pytest.fixture(autouse=True)
+def clean_libraries():
+    clear_library_cache()
+    yield
+    clear_library_cache()
+
+
+@pytest.fixture
+def libraries_directory(tmp_path, monkeypatch):
+    monkeypatch.setattr('interpreter.min_libraries.LIBRARIES_DIRECTORY', str(tmp_path))
+    shutil.copy('./libraries/io.py', tmp_path)
+    return tmp_path
+
+
+PROGRAM = 'use numbers\n\nstart main\n\tout | (double | 21)\nend\n'
+LIBRARY = 'use io\n\nstart double | num is int\n\treturn num * 2\nend\n\nstart main\nend\n'
+
+
+def run(source):
+    stdout = io.StringIO()
+    compile(source).run(stdout=stdout)
+    return stdout.getvalue()
+
+# region Testing library registry
+
+def test_link_library_once():
+    library = link_library('io')
+
+    assert link_library('io') is library
+    assert set(library.methods) == {'in', 'out'}
+    assert library.methods['out'][1] == ['int|float|str|bool']
+    assert library.impure == {'in'}
+    assert library_cache_info() == {'linked': 1, 'loaded': 0, 'parsed': 0}
+
+def test_link_missing_library():
+    assert link_library('missing') is None
+
+    with pytest.raises(RuntimeError):
+        compile('use missing\n\nstart main\nend\n')
+
+def test_library_loaded_when_called():
+    program = compile('use io\nuse math\n\nstart main\n\tout | (sqrt | 16)\nend\n')
+    assert not link_library('io').is_loaded
+    assert not link_library('math').is_loaded
+
+    stdout = io.StringIO()
+    program.run(stdout=stdout)
+    program.run(stdout=stdout)
+
+    assert stdout.getvalue() == '44'
+    assert library_cache_info() == {'linked': 2, 'loaded': 2, 'parsed': 0}
+
+def test_library_not_written_as_is(libraries_directory):
+    (libraries_directory / 'dynamic.py').write_text(
+        'def get_methods():\n'
+        '    return [[name, lambda arg: None, []] for name in ("first", "second")]\n')
+
+    library = link_library('dynamic')
+
+    assert library.is_loaded  # names can not be read without executing library
+    assert set(library.methods) == {'first', 'second'}
+    assert library.impure == {'first', 'second'}
+
+def test_library_table_read_without_executing(libraries_directory):
+    (libraries_directory / 'table.py').write_text(
+        'METHODS = [["twice", "twice_", ["int"]]]\n'
+        'IMPURE_METHODS: list[str] = []\n'
+        'def twice_(args):\n'
+        '    return args[0] * 2\n')
+
+    library = link_library('table')
+
+    assert not library.is_loaded
+    assert library.impure == frozenset()
+    assert library.methods['twice'][1] == ['int']
+    assert library.methods['twice'][0]([21]) == 42
+    assert library.is_loaded
+
+def test_library_table_not_literal(libraries_directory):
+    (libraries_directory / 'computed.py').write_text(
+        'METHODS = [[name, name + "_", []] for name in ("first",)]\n'
+        'def first_(args):\n'
+        '    return None\n'
+        'def get_methods():\n'
+        '    return [["first", first_, []]]\n')
+
+    library = link_library('computed')
+
+    assert library.is_loaded  # table is taken from get_methods() of executed library
+    assert set(library.methods) == {'first'}
+    assert library.impure == {'first'}
+
+# endregion
+
+# region Testing libraries written with MINIMUM
+
+def test_min_library(libraries_directory):
+    (libraries_directory / 'numbers.min').write_text(LIBRARY)
+
+    assert run(PROGRAM) == run(PROGRAM) == '42'
+    assert library_cache_info()['parsed'] == 1
+
+    library = link_library('numbers')
+    assert set(library.methods) == {'double', 'in', 'out'}  # 'main' of library is not linked
+    assert library.impure == {'in'}
+    assert compile(PROGRAM).is_pure
+
+def test_min_library_changed(libraries_directory):
+    (libraries_directory / 'numbers.min').write_text(LIBRARY)
+    assert run(PROGRAM) == '42'
+
+    (libraries_directory / 'numbers.min').write_text(LIBRARY.replace('* 2', '* 3'))
+    assert run(PROGRAM) == '63'
+    assert library_cache_info()['parsed'] == 2
+
+def test_min_library_stored(libraries_directory, monkeypatch):
+    monkeypatch.delenv('MIN_NO_CACHE')
+    (libraries_directory / 'numbers.min').write_text(LIBRARY)
+
+    tree = link_library('numbers').tree
+    assert len(os.listdir(libraries_directory / '__mincache__')) == 1
+
+    clear_library_cache()
+    assert link_library('numbers').tree == tree
+
+def test_program_function_overrides_library():
+    source = 'use io\nuse math\n\nstart sqrt | num is int\n\treturn 7\nend\n\n' \
+             'start main\n\tout | (sqrt | 16)\nend\n'
+
+    assert run(source) == '7'
+    assert compile(source).is_pure
+
+def test_min_library_function_overrides_library(libraries_directory):
+    (libraries_directory / 'numbers.min').write_text(
+        LIBRARY + '\nstart out | num is int\n\treturn num\nend\n')
+
+    library = link_library('numbers')
+    assert library.methods['out'] is not link_library('io').methods['out']
+    assert run(PROGRAM) == ''  # 'out' of library does not print
+
+def test_libraries_redefine_function(libraries_directory):
+    (libraries_directory / 'numbers.min').write_text(
+        LIBRARY + '\nstart out | num is int\n\treturn num\nend\n')
+
+    with pytest.raises(RuntimeError, match='LIBRARY numbers REDEFINES FUNCTION out AT LINE 2'):
+        compile('use io\n' + PROGRAM)
+
+def test_min_library_circular_use(libraries_directory):
+    (libraries_directory / 'first.min').write_text('use second\n')
+    (libraries_directory / 'second.min').write_text('use first\n')
+
+    with pytest.raises(RuntimeError, match='first -> second -> first'):
+        link_library('first')
+    assert link_library('io') is not None
+
+# endregion
@@ -0,0 +1,273 @@
+# pylint: skip-file
+import glob
+import io
+
+import pytest
+
+from interpreter.min_interpreter import compile
+from interpreter.min_optimizer import register_pass, remove_pass, get_passes, optimize, \
+    pass_info, count_nodes, verify_tree, fold_constants, eliminate_dead_code
+from interpreter.min_parser import parse
+from interpreter.utils.commons import ELSE, PLUS, PIPE, RETURN, ASSIGN, WHILE, LESS_THAN, TRUE
+from interpreter.utils.structures import Block, Function, LazyFunction, Node, Token
+
+
+@pytest.fixture
+def test_pass():
+    calls = []
+
+    def rename(tree):
+        calls.append(tree)
+        return [Function(element.name + '_', element.args, element.body, element.line_number)
+                if isinstance(element, Function) and element.name != 'main' else element
+                for element in tree], 1
+
+    register_pass('rename', rename, level=2)
+    yield calls
+    remove_pass('rename')
+
+
+SOURCE = 'start sum | a is int, b is int\n\treturn a + b\nend\n\nstart main\n\tsum | 1, 2\nend\n'
+
+# region Testing pass manager
+
+def test_register_pass(test_pass):
+    assert 'rename' in get_passes(2)
+    assert 'rename' not in get_passes(1)
+
+    with pytest.raises(ValueError):
+        register_pass('rename', lambda tree: (tree, 0))
+    with pytest.raises(ValueError):
+        register_pass('other', lambda tree: (tree, 0), level=3)
+
+    remove_pass('rename')
+    assert 'rename' not in get_passes(2)
+    register_pass('rename', lambda tree: (tree, 0), level=2)
+
+def test_optimize_levels(test_pass):
+    tree = parse(SOURCE)
+
+    assert optimize(tree, 0) is tree
+    assert optimize(tree, 1) == tree
+    assert test_pass == []
+    assert get_passes(1) == ['fold-constants']
+
+    optimized = optimize(tree, 2)
+    assert [element.name for element in optimized] == ['sum_', 'main']
+    assert [element.name for element in tree] == ['sum', 'main']
+
+    stats = pass_info()[-1]
+    assert stats['name'] == 'rename' and stats['changed'] == 1 and stats['seconds'] >= 0
+    assert stats['nodes'] == count_nodes(tree) == 4
+
+    with pytest.raises(ValueError):
+        optimize(tree, 3)
+
+def test_compile_optimized(test_pass):
+    program = compile(SOURCE, lazy=True, optimization=2)
+
+    assert 'sum_' in program.functions
+    assert not any(isinstance(element, LazyFunction) for element in program.tree)
+
+# endregion
+
+# region Testing verifier
+
+def test_verify_parsed_trees():
+    for path in glob.glob('./examples/*.min') + glob.glob('./tests/test_scripts/*.min'):
+        verify_tree(parse(path, cache=False))
+
+    verify_tree(parse(SOURCE, lazy=True))  # bodies of lazy functions are not parsed
+
+def test_verify_broken_trees():
+    def broken_trees():
+        return_ = Node(RETURN, 2, Node(PLUS, 2, Token('var', 'b'), Token('var', 'a')))
+        yield [Node(PLUS, 1, Token('int', 1), Token('int', 2))]
+        yield [Function('main', [], [Block(ELSE, None, [], 2)], 1)]
+        yield [Function('main', [], [Token('int', 1)], 1)]
+        yield [Function('main', [], [Node(RETURN, 2, Block(ELSE, None, [], 2))], 1)]
+        yield [Function('main', [], [Node(Token('opr', '('), 2)], 1)]
+        yield [Function('main', [], [return_], 1), Token('var', 'a')]
+
+    for tree in broken_trees():
+        def break_tree(_, tree=tree):
+            return tree, 1
+
+        register_pass('break', break_tree)
+        try:
+            with pytest.raises(RuntimeError, match='MALFORMED TREE AFTER PASS break'):
+                optimize(parse(SOURCE), 1)
+        finally:
+            remove_pass('break')
+
+# endregion
+
+# region Testing constant folding
+
+def run(source, level):
+    stdout = io.StringIO()
+    compile(source, optimization=level).run(stdout=stdout)
+    return stdout.getvalue()
+
+def test_fold_literals():
+    tree = parse('start main\n\tx is int\n\tx = (4 + 1) * 2\n\tx = x + (6 - 6)\nend\n')
+    folded, changed = fold_constants(tree)
+
+    assert folded[0].body[1] == Node(ASSIGN, 3, Token('int', 10), Token('var', 'x'))
+    assert folded[0].body[2] == Node(ASSIGN, 4, Node(PLUS, 4, Token('int', 0), Token('var', 'x')),
+                                     Token('var', 'x'))
+    assert changed == 3
+    assert tree != folded  # tree given to pass is not changed
+
+    assert fold_constants(folded) == (folded, 0)
+
+def test_propagate_constants():
+    source = '\n'.join([
+        'use io',
+        'start main',
+        '\tlimit is int',
+        '\tcounter is int',
+        '\tout | limit',  # limit is not constant before it is assigned
+        '\tlimit = 1 + 2',
+        '\tcounter = 0',
+        '\twhile counter < limit',
+        '\t\tout | counter',
+        '\t\tcounter = counter + 1',
+        '\tend',
+        '\tif limit == 3',
+        '\t\tout | limit',
+        '\tend',
+        'end',
+    ]) + '\n'
+
+    main = optimize(parse(source), 1)[1]
+    assert main.body[2].right == Token('var', 'limit')
+    assert main.body[5].condition == Node(LESS_THAN, 8, Token('int', 3), Token('var', 'counter'))
+    assert main.body[6].condition == TRUE
+
+    assert run(source, 1) == run(source, 0) == '00123'
+
+def test_fold_keeps_errors():
+    source = 'start main\n\tx is int\n\tx = 0\n\tx = 5\n\tx = 1 / (3 - 3)\nend\n'
+
+    for level in (0, 1):
+        with pytest.raises(RuntimeError, match='ZERO-DIVISION ERROR AT LINE 5'):
+            compile(source, optimization=level).run()
+
+    source = 'use io\nstart main\n\tout | 1\n\tout | ("s" + 1)\nend\n'
+    with pytest.raises(RuntimeError, match='AT LINE 4'):
+        run(source, 1)
+
+def test_fold_examples():
+    for path in glob.glob('./examples/*.min') + glob.glob('./tests/test_scripts/*.min'):
+        if compile(path).is_pure:  # others read input
+            assert run(path, 1) == run(path, 0)
+
+# endregion
+
+# region Testing dead code elimination
+
+def test_remove_unreachable_lines():
+    source = '\n'.join([
+        'use io',
+        'start main',
+        '\tx is int',
+        '\tx = 1',
+        '\tif x > 0',
+        '\t\treturn 1',
+        '\telse',
+        '\t\treturn 2',
+        '\tend',
+        '\tout | x',
+        '\tout | x',
+        'end',
+    ]) + '\n'
+    tree = parse(source)
+    pruned, removed = eliminate_dead_code(tree)
+
+    assert len(pruned[0].body) == 3
+    assert removed == count_nodes(tree) - count_nodes(pruned) == 3  # io is no more used
+    assert eliminate_dead_code(pruned) == (pruned, 0)
+
+def test_collapse_literal_branches():
+    source = '\n'.join([
+        'use io',
+        'start main',
+        '\tif 1 == 2',
+        '\t\tout | "never"',
+        '\telif 1 == 1',
+        '\t\tout | "taken"',
+        '\telse',
+        '\t\tout | "never"',
+        '\tend',
+        '\twhile 1 > 2',
+        '\t\tout | "never"',
+        '\tend',
+        '\tif 2 > 1',
+        '\t\tout | "!"',
+        '\tend',
+        'end',
+    ]) + '\n'
+
+    main = optimize(parse(source), 2)[1]
+    assert main.body == [Node(PIPE, 6, Token('str', 'taken'), Token('fnc', 'out')),
+                         Node(PIPE, 14, Token('str', '!'), Token('fnc', 'out'))]
+    assert run(source, 2) == run(source, 0) == 'taken!'
+
+def test_keep_unchanged_loops():
+    source = '\n'.join([
+        'use io',
+        'start main',
+        '\tx is int',
+        '\tx = 0',
+        '\twhile x < 3',
+        '\t\tx = x + 1',
+        '\tend',
+        '\twhile x > 0',
+        '\t\treturn x',
+        '\t\tout | x',
+        '\tend',
+        '\tout | x',
+        'end',
+    ]) + '\n'
+    tree = parse(source)
+    main = eliminate_dead_code(tree)[0][1]
+
+    assert main.body[2] is tree[1].body[2]
+    assert main.body[3] is not tree[1].body[3]
+    assert len(main.body[3].body) == 1
+
+def test_drop_unused_functions():
+    source = '\n'.join([
+        'use io',
+        'use math',
+        'start unused | x is int',
+        '\treturn x',
+        'end',
+        'start main',
+        '\tout | 1',
+        'end',
+    ]) + '\n'
+
+    pruned = optimize(parse(source), 2)
+    assert [element.name if isinstance(element, Function) else element.right.value
+            for element in pruned] == ['io', 'main']
+    assert pass_info()[-1]['removed'] == 2  # use of math and return of function
+
+    # calls in bodies, which are not parsed, are not known
+    assert eliminate_dead_code(parse(source, lazy=True))[1] == 0
+
+def test_eliminate_keeps_errors():
+    source = 'start main\n\tif 1 / 0 > 1\n\tend\n\treturn 1\n\tx = 1\nend\n'
+    with pytest.raises(RuntimeError, match='ZERO-DIVISION ERROR AT LINE 2'):
+        compile(source, optimization=2).run()
+
+    with pytest.raises(RuntimeError, match='UNABLE TO READ/FIND LIBRARY lib: nothing'):
+        compile('use nothing\nstart main\nend\n', optimization=2)
+
+def test_eliminate_examples():
+    for path in glob.glob('./examples/*.min') + glob.glob('./tests/test_scripts/*.min'):
+        if compile(path).is_pure:
+            assert run(path, 2) == run(path, 0)
+
+# endregion
@@ -1,4 +1,6 @@
 # pylint: skip-file
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 
 from interpreter.min_parser import *  # noqa
@@ -14,31 +16,31 @@ def test_parse_line_dry_run():
 
 def test_parse_line_simple_inputs():
     line1 = [Token('int', 1), PLUS, Token('int', 2)]
-    expected1 = Node(PLUS, 1, [Token('int', 2)], [Token('int', 1)])
+    expected1 = Node(PLUS, 1, Token('int', 2), Token('int', 1))
     assert parse_line(line1, 1) == expected1
 
     line2 = [Token('int', 2), MULTIPLY, Token('float', 3.3)]
-    expected2 = Node(MULTIPLY, 1, [Token('float', 3.3)], [Token('int', 2)])
+    expected2 = Node(MULTIPLY, 1, Token('float', 3.3), Token('int', 2))
     assert parse_line(line2, 1) == expected2
 
     line3 = [Token('float', 3.5), DIVIDE, Token('int', 2)]
-    expected3 = Node(DIVIDE, 1, [Token('int', 2)], [Token('float', 3.5)])
+    expected3 = Node(DIVIDE, 1, Token('int', 2), Token('float', 3.5))
     assert parse_line(line3, 1) == expected3
 
     line4 = [Token('float', 3.5), MINUS, Token('int', 2)]
-    expected4 = Node(MINUS, 1, [Token('int', 2)], [Token('float', 3.5)])
+    expected4 = Node(MINUS, 1, Token('int', 2), Token('float', 3.5))
     assert parse_line(line4, 1) == expected4
 
     line5 = [Token('float', 3.5), MODULO, Token('int', 2)]
-    expected5 = Node(MODULO, 1, [Token('int', 2)], [Token('float', 3.5)])
+    expected5 = Node(MODULO, 1, Token('int', 2), Token('float', 3.5))
     assert parse_line(line5, 1) == expected5
 
     line6 = [Token('fnc', 'out'), PIPE, Token('var', 'num2')]
-    expected6 = Node(PIPE, 1, [Token('var', 'num2')], [Token('fnc', 'out')])
+    expected6 = Node(PIPE, 1, Token('var', 'num2'), Token('fnc', 'out'))
     assert parse_line(line6, 1) == expected6
 
     line7 = [Token('fnc', 'add'), PIPE, Token('var', 'num1'), COMMA, Token('var', 'num2')]
-    expected7 = Node(PIPE, 1, Node(COMMA, 1, [Token('var', 'num2')], [Token('var', 'num1')]), [Token('fnc', 'add')])
+    expected7 = Node(PIPE, 1, Node(COMMA, 1, Token('var', 'num2'), Token('var', 'num1')), Token('fnc', 'add'))
     assert parse_line(line7, 1) == expected7
 
     line8 = [Token('var', 'num1'), CREATE, INT]
@@ -46,7 +48,7 @@ def test_parse_line_simple_inputs():
     assert parse_line(line8, 1) == expected8
 
     line9 = [Token('var', 'num1'), ASSIGN, Token('int', 2)]
-    expected9 = Node(ASSIGN, 1, [Token('int', 2)], [Token('var', 'num1')])
+    expected9 = Node(ASSIGN, 1, Token('int', 2), Token('var', 'num1'))
     assert parse_line(line9, 1) == expected9
 
     line10 = [BREAK]
@@ -58,9 +60,14 @@ def test_parse_line_simple_inputs():
     assert parse_line(line11, 1) == expected11
 
     line12 = [RETURN, Token('var', 'num')]
-    expected12 = Node(RETURN, 1, [Token('var', 'num')])
+    expected12 = Node(RETURN, 1, Token('var', 'num'))
     assert parse_line(line12, 1) == expected12
 
+def test_parse_line_not_equals():
+    line = [Token('var', 'a'), NOT_EQUALS, Token('int', 2)]
+    expected = Node(NOT_EQUALS, 1, Token('int', 2), Token('var', 'a'))
+    assert parse_line(line, 1) == expected
+
 def test_parse_line_simple_invalid():
     line = [Token('var', 1), CREATE, INT]
     with pytest.raises(SyntaxError):
@@ -76,11 +83,11 @@ def test_parse_line_complex_variable_expr():
 
     expected = Node(ASSIGN, 1, Node(
         DIVIDE, 1,
-        Node(MODULO, 1, [Token('int', 4)], [Token('int', 3)]),
+        Node(MODULO, 1, Token('int', 4), Token('int', 3)),
         Node(PLUS, 1, Node(
-            MULTIPLY, 1, [Token('float', 3.5)], [Token('var', 'num2')]
-        ), [Token('int', 1)])
-    ), [Token('var', 'num')])
+            MULTIPLY, 1, Token('float', 3.5), Token('var', 'num2')
+        ), Token('int', 1))
+    ), Token('var', 'num'))
 
     assert parse_line(line, 1) == expected
 
@@ -91,9 +98,9 @@ def test_parse_line_complex_function_expr():
 
     expected = Node(PIPE, 1, Node(
         MULTIPLY, 1,
-        [Token('var', 'num')],
-        [Token('int', 1)]
-    ), [Token('fnc', 'out')])
+        Token('var', 'num'),
+        Token('int', 1)
+    ), Token('fnc', 'out'))
 
     assert parse_line(line, 1) == expected
 
@@ -104,16 +111,111 @@ def test_parse_line_complex_return_expr():
 
     expected = Node(RETURN, 1, Node(
         MINUS, 1,
-        [Token('int', 5)],
+        Token('int', 5),
         Node(
             MULTIPLY, 1,
-            [Token('var', 'num')],
-            [Token('int', 1)]
+            Token('var', 'num'),
+            Token('int', 1)
         )
     ))
 
     assert parse_line(line, 1) == expected
 
+def test_parse_line_bracketed_operand():
+    line = [RETURN, LEFT_BRACKET, Token('var', 'num'), RIGHT_BRACKET]
+    assert parse_line(line, 1) == Node(RETURN, 1, Token('var', 'num'))
+
+    line = [Token('fnc', 'out'), PIPE, LEFT_BRACKET, Token('var', 'num'), RIGHT_BRACKET]
+    assert parse_line(line, 1) == Node(PIPE, 1, Token('var', 'num'), Token('fnc', 'out'))
+
+def test_parse_line_invalid_expr():
+    lines = [
+        [Token('var', 'a'), Token('var', 'b')],
+        [Token('var', 'a'), PLUS, LEFT_BRACKET, Token('var', 'b')],
+        [Token('var', 'a'), RIGHT_BRACKET, PLUS, Token('var', 'b')],
+        [Token('var', 'a'), MULTIPLY],
+        [MULTIPLY, Token('var', 'a')],
+        [LEFT_BRACKET, RIGHT_BRACKET, PLUS, Token('var', 'a')],
+    ]
+
+    for line in lines:
+        with pytest.raises(SyntaxError):
+            parse_line(line, 1)
+
+def test_parse_line_long_expr():
+    operands_count = 5000
+    line = [Token('var', 'num')]
+    for _ in range(operands_count):
+        line += [PLUS, Token('int', 1)]
+
+    node = parse_line(line, 1)
+    assert node.left == Token('var', 'num')
+
+    for _ in range(operands_count):
+        assert node.operator == PLUS
+        node = node.right
+
+    assert node == Token('int', 1)
+
+    # the same line again is copied from cache, without recursion on its depth
+    node = parse_line(line, 2)
+    assert node.right.right.line_number == 2
+
+def test_parse_line_cache():
+    clear_line_cache()
+    line = [Token('var', 'index'), ASSIGN, Token('var', 'index'), PLUS, Token('int', 1)]
+
+    first = parse_line(line, 3)
+    second = parse_line(list(line), 7)
+
+    assert line_cache_info() == {'hits': 1, 'misses': 1, 'size': 1, 'max_size': LINE_CACHE_SIZE}
+    assert second is not first and second.right is not first.right
+    assert second == Node(ASSIGN, 7, Node(PLUS, 7, Token('int', 1), Token('var', 'index')),
+                          Token('var', 'index'))
+    assert first.line_number == 3 and first.right.line_number == 3
+
+    # lines with errors are not kept
+    for line_number in (4, 5):
+        with pytest.raises(SyntaxError, match=f'AT LINE {line_number}'):
+            parse_line([Token('var', 'a'), MULTIPLY], line_number)
+    assert line_cache_info()['size'] == 1
+
+    clear_line_cache(0)
+    parse_line(line, 1)
+    assert line_cache_info() == {'hits': 0, 'misses': 0, 'size': 0, 'max_size': 0}
+
+    with pytest.raises(TypeError):
+        clear_line_cache(-1)
+
+    clear_line_cache()
+
+def test_parse_line_cache_not_shared():
+    clear_line_cache()
+    line = [Token('var', 'index'), ASSIGN, Token('var', 'index'), PLUS, Token('int', 1)]
+
+    first = parse_line(line, 3)
+    first.right.right = Token('int', 2)  # tree of caller is changed, cached line is not
+
+    assert parse_line(line, 3).right.right == Token('int', 1)
+
+    clear_line_cache()
+
+def test_parse_line_cache_threads():
+    clear_line_cache(2)  # lines are dropped all the time
+    lines = [[Token('var', 'x'), ASSIGN, Token('var', 'x'), PLUS, Token('int', index)]
+             for index in range(4)]
+
+    def parse_lines(_):
+        return [parse_line(line, 1).right.right for line in lines * 200]
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        for operands in executor.map(parse_lines, range(8)):
+            assert operands == [Token('int', index) for index in range(4)] * 200
+
+    assert line_cache_info()['hits'] + line_cache_info()['misses'] == 8 * 800
+
+    clear_line_cache()
+
 # endregion
 
 # region Testing parse
@@ -224,4 +326,123 @@ def test_parse_valid_file_4():
     print(parse('./tests/test_scripts/test_4.min'))
     assert str(parse('./tests/test_scripts/test_4.min')) == expected
 
+def test_parse_token_stream():
+    from interpreter.min_lexer import get_token_stream
+
+    for index in range(1, 5):
+        file_name = f'./tests/test_scripts/test_{index}.min'
+        assert str(parse(get_token_stream(file_name))) == str(parse(file_name))
+
+def test_parse_source_string():
+    with open('./tests/test_scripts/test_3.min', 'r') as file:
+        source = file.read()
+
+    assert parse(source) == parse('./tests/test_scripts/test_3.min')
+
+def test_parse_elif_chain():
+    source = 'start main | n is int\n' \
+             '\tif n > 2\n' \
+             '\t\tout | 2\n' \
+             '\telif n > 1\n' \
+             '\t\twhile n > 0\n' \
+             '\t\t\tn = n - 1\n' \
+             '\t\tend\n' \
+             '\telif n > 0\n' \
+             '\telse\n' \
+             '\t\tout | 0\n' \
+             '\tend\n' \
+             'end\n'
+
+    block = parse(source)[0].body[0]
+
+    assert (block.operator, block.line_number) == (IF, 2)
+    assert block.body == [Node(PIPE, 3, Token('int', 2), Token('fnc', 'out'))]
+
+    block = block.next_block
+    assert (block.operator, block.line_number) == (ELIF, 4)
+    assert block.condition == Node(MORE_THAN, 4, Token('int', 1), Token('var', 'n'))
+    assert block.body[0].operator == WHILE and len(block.body[0].body) == 1
+
+    block = block.next_block
+    assert (block.operator, block.line_number, block.body) == (ELIF, 8, [])
+
+    block = block.next_block
+    assert (block.operator, block.line_number, block.condition) == (ELSE, 9, None)
+    assert block.next_block is None
+
+def test_parse_mismatched_blocks():
+    sources = [
+        'start main\n\telse\n\tend\nend\n',
+        'start main\n\twhile a > 1\n\telif a > 1\n\tend\nend\n',
+        'start main\n\tif a > 1\n\telse\n\telif a > 1\n\tend\nend\n',
+        'start main\n\tif a > 1\n\telse\n\telse\n\tend\nend\n',
+        'start main\n\tif a > 1\n\tend\n\tend\nend\n',
+        'start main\n\tif a > 1\nend\n',
+        'start main\n\tif a > 1\n\tend 5\nend\n',
+        'start main\n\twhile\n\tend\nend\n',
+    ]
+
+    for source in sources:
+        with pytest.raises(SyntaxError):
+            parse(source)
+
+    with pytest.raises(SyntaxError, match='AT LINE 3'):
+        parse('start main\n\tout | 1\n\telse\nend\n')
+
+    with pytest.raises(SyntaxError, match='AT LINE 1'):
+        parse('start foo\n\tif a > 1\n\tout | 1\nend\n')  # last 'end' closes 'if'
+
+    with pytest.raises(SyntaxError, match='AT LINE 2'):
+        parse('use io\nstart main\n\tout | 1\n')
+
+def test_parse_closes_file_on_error(tmp_path, monkeypatch):
+    path = tmp_path / 'broken.min'
+    path.write_text('start main\n\telse\nend\n' + 'start other\nend\n' * 100)
+
+    files = []
+
+    def tracked_open(*args, **kwargs):
+        files.append(open(*args, **kwargs))
+        return files[-1]
+
+    monkeypatch.setattr('interpreter.min_lexer.open', tracked_open, raising=False)
+    with pytest.raises(SyntaxError) as error:
+        parse(path, cache=False)
+
+    assert error.traceback  # frames of parser are kept alive by traceback
+    assert len(files) == 1 and files[0].closed
+
+def test_parse_lazy():
+    for index in range(1, 5):
+        file_name = f'./tests/test_scripts/test_{index}.min'
+        assert parse(file_name, lazy=True) == parse(file_name)
+
+    tree = parse('start broken | a is int\n\ta = = 1\nend\nstart main\nend\n', lazy=True)
+    assert [function.name for function in tree] == ['broken', 'main']
+    assert tree[0].args == [Node(CREATE, 1, INT, Token('var', 'a'))]
+
+    with pytest.raises(SyntaxError, match='AT LINE 2'):
+        tree[0].body
+
+    with pytest.raises(SyntaxError):
+        parse('start main\n\tif true\nend\n', lazy=True)  # boundaries are checked at once
+
+def test_parse_parallel():
+    functions = ''.join(f'start f{index} | a is int\n'
+                        f'\tif a > {index}\n\t\treturn a - {index}\n\tend\n'
+                        f'\treturn a\nend\n' for index in range(PARALLEL_MIN_FUNCTIONS))
+    source = 'use io\n' + functions + 'start main\n\tout | (f0 | 1)\nend\n'
+
+    tree = parse(source, workers=2)
+    assert tree == parse(source)
+    assert tree[1].body[0].operator is IF  # tokens of fixed lexemes are still shared
+
+    # the first error in source is raised, as without workers
+    invalid = source.replace('return a - 3\n', 'return a - \n') + 'end\n'
+    with pytest.raises(SyntaxError, match='MISSING OPERAND AFTER - AT LINE 22'):
+        parse(invalid, workers=2)
+
+    with pytest.raises(SyntaxError, match='OUTSIDE OF FUNCTION'):
+        parse(source + 'end\n', workers=2)
+
 # endregion
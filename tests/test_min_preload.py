@@ -0,0 +1,48 @@
+# pylint: skip-file
+import gc
+import io
+import os
+
+import pytest
+
+from interpreter.min_libraries import link_library, clear_library_cache
+from interpreter.min_preload import preload, get_program, clear_preload, worker_memory
+
+
+@pytest.fixture(autouse=True)
+def clean_preload():
+    clear_library_cache()
+    yield
+    clear_preload()
+    clear_library_cache()
+
+# region Testing preload
+
+def test_preload_programs():
+    assert preload(['./examples/factorial.min', './examples/hello-world.min']) == 2
+    assert gc.get_freeze_count() > 0
+
+    program = get_program(os.path.abspath('examples/factorial.min'))
+    assert program is get_program('./examples/factorial.min')
+    assert link_library('io').is_loaded  # nothing is left to be done in workers
+
+    stdout = io.StringIO()
+    program.run(stdin='5\n', stdout=stdout)
+    assert '120' in stdout.getvalue()
+
+def test_preload_libraries():
+    preload(libraries=['math'])
+
+    assert get_program('./examples/factorial.min') is None
+    assert link_library('math').is_loaded
+
+    with pytest.raises(RuntimeError):
+        preload(libraries=['missing'])
+
+def test_worker_memory():
+    memory = worker_memory()
+
+    assert set(memory) == {'rss', 'shared', 'private'}
+    assert memory['rss'] > 0
+
+# endregion
@@ -0,0 +1,122 @@
+# pylint: skip-file
+import pytest
+
+from interpreter.min_lexer import get_tokens
+from interpreter.min_parser import parse
+from interpreter.min_session import CompileSession
+from interpreter.utils.structures import Token
+
+with open('./tests/test_scripts/test_3.min', 'r') as file:
+    SOURCE = file.read()
+
+# region Testing CompileSession
+
+def test_session_dry_run_invalid():
+    with pytest.raises(TypeError):
+        CompileSession(None)
+
+    session = CompileSession(SOURCE)
+
+    with pytest.raises(IndexError):
+        session.edit(0, 0, 'end')
+
+    with pytest.raises(IndexError):
+        session.edit(5, 3, 'end')
+
+    with pytest.raises(IndexError):
+        session.edit(16, 17, 'end')
+
+    with pytest.raises(TypeError):
+        session.edit(1, 1, None)
+
+def test_session_general():
+    session = CompileSession(SOURCE)
+
+    assert session.source_code == SOURCE
+    assert session.lines_count == 16
+    assert session.tree == parse(SOURCE)
+    assert session.get_tokens() == get_tokens(SOURCE)
+
+def test_session_edit_in_function():
+    session = CompileSession(SOURCE)
+    factorial, main = session.tree[1:]
+    reparsed = session.stats['reparsed_elements']
+
+    session.edit(14, 14, '\tout | (factorial | 6)')
+
+    assert session.source_code == SOURCE.replace('5', '6')
+    assert session.tree == parse(session.source_code)
+    assert session.tree[1] is factorial
+    assert session.tree[2] is not main
+    assert session.stats['reparsed_elements'] == reparsed + 1
+
+def test_session_lines_added_and_removed():
+    session = CompileSession(SOURCE)
+    main = session.tree[2]
+
+    session.edit(8, 9, '\telse\n\t\tnum = num - 1\n\t\treturn num * (factorial | num)\n')
+
+    tree = session.tree
+    assert tree == parse(session.source_code)
+    assert tree[2].line_number == main.line_number + 1
+    assert tree[2].body[0].line_number == main.body[0].line_number + 1
+
+    session.edit(1, 4, '')
+
+    assert session.tree == parse(session.source_code)
+    assert session.tree[0].args[0].line_number == 1
+
+def test_session_previous_token():
+    # type of name depends on the last token of previous line, so next line is lexed again
+    session = CompileSession('use\nio\n')
+    assert session.get_tokens()[0][1] == [Token('lib', 'io')]
+
+    session.edit(1, 1, 'out | 1')
+    assert session.get_tokens()[0][1] == [Token('var', 'io')]
+    assert session.stats['relexed_lines'] == 4
+
+def test_session_invalid_syntax():
+    session = CompileSession(SOURCE)
+
+    session.edit(11, 11, '')  # 'end' of factorial is removed
+
+    with pytest.raises(SyntaxError):
+        session.tree
+
+    session.edit(12, 11, 'end\n')
+
+    assert session.tree == parse(session.source_code)
+
+    session.edit(16, 16, '')  # now 'main' is not closed
+
+    with pytest.raises(SyntaxError):
+        session.tree
+
+    with pytest.raises(SyntaxError):
+        parse(session.source_code)
+
+    session.edit(16, 15, 'end')
+
+    assert session.source_code.endswith('"\\n"\nend')
+    assert session.tree == parse(session.source_code)
+    assert len(session.tree) == 3
+
+# endregion
+
+def test_session_edit_above_deep_line():
+    # line is too deep to be compared with ==, so its nodes are walked with stack
+    source = 'start main\n\tx is int\n\tx = 0' + ' + 1' * 3000 + '\nend\n'
+    session = CompileSession(source)
+    session.tree
+
+    session.edit(1, 0, '\n')
+
+    line_numbers = []
+    nodes = [session.tree[0].body[1]]
+    while nodes:
+        node = nodes.pop()
+        line_numbers.append(node.line_number)
+        nodes += [child for child in (node.left, node.right) if hasattr(child, 'line_number')]
+
+    assert session.tree[0].line_number == 3
+    assert line_numbers == [4] * 3001
@@ -1,7 +1,10 @@
 # pylint: skip-file
+import copy
+
 import pytest
 
-from interpreter.utils.structures import Block
+from interpreter.utils.structures import Block, LazyFunction, TokenStream
+from interpreter.utils.structures import set_debug_mode, is_debug_mode
 from interpreter.utils.commons import *
 
 # region Testing Token class
@@ -47,6 +50,30 @@ def test_token_eq():
 
     assert token1 == token2
 
+def test_token_copy_is_shared():
+    token = Token('var', 'name')
+
+    assert copy.copy(token) is token
+    assert copy.deepcopy(token) is token
+    assert copy.deepcopy(Node(PIPE, 1, token)).right is token
+
+def test_token_hash():
+    assert hash(Token('opr', '+')) == hash(PLUS)
+    assert Token('kwd', 'end') in {IF, END}
+    assert Token('str', 'end') not in {IF, END}
+    assert {PLUS: 1}[Token('opr', '+')] == 1
+
+def test_token_immutable():
+    token = Token('int', 1)
+
+    with pytest.raises(AttributeError):
+        token.value = 2  # type: ignore
+
+    with pytest.raises(AttributeError):
+        token.line_number = 1  # type: ignore
+
+    assert token == Token('int', 1)
+
 # endregion
 
 # region Testing Node class
@@ -114,6 +141,21 @@ def test_node_eq():
 
     assert node1 == node2
 
+def test_node_without_debug_mode():
+    assert is_debug_mode()
+    assert not hasattr(Node(PIPE, 1), '__dict__')
+
+    set_debug_mode(False)
+    try:
+        node = Node(None, 0)  # arguments are not checked
+        assert node.operator is None and node.line_number == 0
+        assert Block(IF, None, None, 0).body is None
+    finally:
+        set_debug_mode(True)
+
+    with pytest.raises(TypeError):
+        Node(None, 0)
+
 
 # endregion
 
@@ -201,6 +243,29 @@ def test_function_str():
         'line': 10
     })
 
+def test_lazy_function():
+    calls = []
+    body = [Node(RETURN, 2)]
+
+    def parse_body():
+        calls.append(1)
+        return body
+
+    function = LazyFunction('write', [], parse_body, 1)
+    assert not function.is_parsed
+    assert calls == []
+
+    assert function == Function('write', [], body, 1)
+    assert function.body is body
+    assert function.is_parsed
+    assert calls == [1]
+
+    with pytest.raises(TypeError):
+        LazyFunction('write', [], None, 1)
+
+    with pytest.raises(TypeError):
+        LazyFunction('write', [], body, 1)
+
 # endregion
 
 # region Testing Block class
@@ -265,3 +330,53 @@ def test_block_eq_comparing_non_blocks():
     assert block != ELSE
 
 # endregion
+
+# region Testing TokenStream class
+
+def test_token_stream_general():
+    stream = TokenStream()
+    stream.append_line(1, [USE, Token('lib', 'io')])
+    stream.append_line(3, [Token('fnc', 'out'), PIPE, Token('int', 1)])
+    stream.append_line(4, [Token('fnc', 'out'), PIPE, Token('bool', True), COMMA, Token('float', 1.0)])
+
+    assert len(stream) == 3
+    assert stream.tokens_count == 10
+    assert stream.line_number(1) == 3
+    assert stream.line(0) == [USE, Token('lib', 'io')]
+    assert [line_number for line_number, _ in stream.lines()] == [1, 3, 4]
+
+    # 1, True and 1.0 must not be merged in constant pool
+    assert stream.line(1)[2].value == 1 and stream.line(1)[2].type == 'int'
+    assert stream.line(2)[2].value is True
+    assert isinstance(stream.line(2)[4].value, float)
+    assert len(stream.pool) == 8
+
+def test_token_stream_gives_same_tokens():
+    name = Token('var', 'name')
+
+    stream = TokenStream()
+    stream.append_line(1, [name, ASSIGN, name])
+
+    assert stream.line(0)[0] is name
+    assert stream.line(0)[1] is ASSIGN
+    assert stream.line(0)[2] is name
+
+def test_token_stream_view():
+    stream = TokenStream()
+    stream.append_line(1, [START, Token('fnc', 'add'), PIPE, Token('var', 'a'), CREATE, INT])
+
+    line = stream.line(0)
+    arguments = line[3:]
+
+    assert len(arguments) == 3
+    assert arguments == [Token('var', 'a'), CREATE, INT]
+    assert arguments[-1] == INT
+    assert arguments[1:][0] == CREATE
+    assert CREATE in line and END not in line
+    assert list(line[10:]) == []
+
+    with pytest.raises(IndexError):
+        arguments[3]
+
+# endregion
+